@@ -1,20 +1,10 @@
-from backend.controllers.category_controller import CategoryController
-from backend.controllers.sub_category_controller import SubCategoryController
-from backend.controllers.product_controller import ProductController
-from backend.controllers.variant_group_controller import VariantGroupController
-from backend.controllers.variant_value_controller import VariantValueController
-from backend.controllers.kiosk_menu_controller import KioskMenuController
-from backend.controllers.session_controller import SessionController
+# backend/__init__.py
+# Keep package import cheap: every `import backend.x` runs this file first,
+# so controllers are not imported here (AppApi builds them on first use).
 
 
-
-class AppApi:
-    def __init__(self):
-        self.category = CategoryController()
-        self.sub_category = SubCategoryController()
-        self.product = ProductController()
-        self.variant_group = VariantGroupController()
-        self.variant_value = VariantValueController()
-        self.kiosk_menu = KioskMenuController()
-        self.session = SessionController(minutes=7)
-
+def __getattr__(name):
+    if name == "AppApi":
+        from backend.app_api import AppApi
+        return AppApi
+    raise AttributeError(f"module 'backend' has no attribute {name!r}")
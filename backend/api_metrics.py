@@ -0,0 +1,245 @@
+# backend/api_metrics.py
+"""
+Opt-in AppApi instrumentation (KIOSK_API_METRICS=1).
+
+instrument(api) wraps every public AppApi method and records per method:
+call count, error count (exception, {"status": "error"} or {"ok": False}),
+a latency histogram (p50/p95/p99 estimated from log buckets) and JSON payload
+sizes in/out. A daemon thread dumps the snapshot to
+logs/api_metrics_<process>.json every DUMP_INTERVAL_SEC, so the dashboard can
+chart the kiosk process too.
+"""
+import atexit
+import functools
+import inspect
+import json
+import math
+import os
+import sys
+import threading
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+
+from backend.paths import app_root
+
+ENABLED = os.environ.get("KIOSK_API_METRICS", "").strip().lower() in ("1", "true", "yes", "on")
+DUMP_INTERVAL_SEC = 60
+METRICS_DIR = app_root() / "logs"
+SKIP_PREFIX = "metrics_"   # don't measure the dashboard polling the metrics
+
+# latency buckets: 4 per doubling, 0.05 ms .. ~2 min
+_BUCKET_MIN_MS = 0.05
+_BUCKETS_PER_DOUBLING = 4
+_N_BUCKETS = 88
+
+
+def _bucket(ms: float) -> int:
+    if ms <= _BUCKET_MIN_MS:
+        return 0
+    i = int(math.log2(ms / _BUCKET_MIN_MS) * _BUCKETS_PER_DOUBLING) + 1
+    return min(i, _N_BUCKETS - 1)
+
+
+def _bucket_bounds(i: int):
+    if i == 0:
+        return 0.0, _BUCKET_MIN_MS
+    lo = _BUCKET_MIN_MS * 2 ** ((i - 1) / _BUCKETS_PER_DOUBLING)
+    hi = _BUCKET_MIN_MS * 2 ** (i / _BUCKETS_PER_DOUBLING)
+    return lo, hi
+
+
+def _size(value) -> int:
+    """JSON size in bytes (what crosses the pywebview bridge)."""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+def _is_error(result) -> bool:
+    if isinstance(result, dict):
+        return result.get("status") == "error" or result.get("ok") is False
+    return False
+
+
+class _MethodStats:
+    __slots__ = ("count", "errors", "total_ms", "max_ms", "buckets",
+                 "bytes_in", "bytes_out", "max_in", "max_out")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * _N_BUCKETS
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.max_in = 0
+        self.max_out = 0
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if not n:
+                continue
+            if seen + n >= rank:
+                lo, hi = _bucket_bounds(i)
+                # linear inside the bucket, never above the observed max
+                return min(lo + (hi - lo) * (rank - seen) / n, self.max_ms)
+            seen += n
+        return self.max_ms
+
+    def as_dict(self) -> dict:
+        n = max(self.count, 1)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / n, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "bytes_in_avg": round(self.bytes_in / n, 1),
+            "bytes_out_avg": round(self.bytes_out / n, 1),
+            "bytes_in_max": self.max_in,
+            "bytes_out_max": self.max_out,
+        }
+
+
+class ApiMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+        self._since = time.time()
+        self._dumper = None
+        self._stop = threading.Event()
+
+    # -------------------------
+    # recording
+    # -------------------------
+    def record(self, name: str, ms: float, error: bool, bytes_in: int, bytes_out: int) -> None:
+        with self._lock:
+            st = self._methods.get(name)
+            if st is None:
+                st = self._methods[name] = _MethodStats()
+            st.count += 1
+            st.errors += 1 if error else 0
+            st.total_ms += ms
+            st.max_ms = max(st.max_ms, ms)
+            st.buckets[_bucket(ms)] += 1
+            st.bytes_in += bytes_in
+            st.bytes_out += bytes_out
+            st.max_in = max(st.max_in, bytes_in)
+            st.max_out = max(st.max_out, bytes_out)
+
+    def wrap(self, name: str, fn):
+        @functools.wraps(fn)
+        def call(_self, *args, **kwargs):
+            bytes_in = _size([args, kwargs]) if (args or kwargs) else 0
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self.record(name, (time.perf_counter() - t0) * 1000.0, True, bytes_in, 0)
+                raise
+            ms = (time.perf_counter() - t0) * 1000.0
+            self.record(name, ms, _is_error(result), bytes_in, _size(result))
+            return result
+
+        return call
+
+    # -------------------------
+    # reporting
+    # -------------------------
+    def snapshot(self) -> dict:
+        with self._lock:
+            methods = {name: st.as_dict() for name, st in self._methods.items()}
+        return {
+            "enabled": True,
+            "process": process_label(),
+            "since": datetime.fromtimestamp(self._since).isoformat(timespec="seconds"),
+            "taken_at": datetime.now().isoformat(timespec="seconds"),
+            "uptime_sec": round(time.time() - self._since, 1),
+            "methods": dict(sorted(methods.items())),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+            self._since = time.time()
+
+    # -------------------------
+    # periodic dump
+    # -------------------------
+    def dump(self, path: Path = None) -> Path:
+        path = Path(path or dump_path())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def start_dumper(self, interval_sec: float = DUMP_INTERVAL_SEC) -> None:
+        if self._dumper is not None and self._dumper.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval_sec):
+                try:
+                    self.dump()
+                except Exception:
+                    pass
+
+        self._stop.clear()
+        self._dumper = threading.Thread(target=loop, name="api-metrics-dump", daemon=True)
+        self._dumper.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.dump()
+        except Exception:
+            pass
+
+
+def process_label() -> str:
+    """kiosk / dashboard (exe name) or the script name in dev."""
+    return Path(sys.executable if getattr(sys, "frozen", False) else (sys.argv[0] or "app")).stem or "app"
+
+
+def dump_path() -> Path:
+    return METRICS_DIR / f"api_metrics_{process_label()}.json"
+
+
+def read_dumps() -> dict:
+    """Latest dump of every process that wrote one: {process: snapshot}."""
+    out = {}
+    for p in sorted(METRICS_DIR.glob("api_metrics_*.json")):
+        try:
+            snap = json.loads(p.read_text(encoding="utf-8"))
+            out[snap.get("process") or p.stem[len("api_metrics_"):]] = snap
+        except Exception:
+            continue
+    return out
+
+
+def instrument(api, metrics: ApiMetrics) -> int:
+    """Wrap every public bound method of `api` in place. Returns how many were wrapped."""
+    n = 0
+    for name in dir(type(api)):
+        if name.startswith("_") or name.startswith(SKIP_PREFIX):
+            continue
+        # look at the class first: instance lookups would build lazy attributes
+        if not inspect.isfunction(getattr(type(api), name, None)):
+            continue
+        attr = getattr(api, name)
+        # bound wrapper -> still a method for pywebview's js_api discovery
+        setattr(api, name, types.MethodType(metrics.wrap(name, attr), api))
+        n += 1
+    return n
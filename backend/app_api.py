@@ -1,18 +1,63 @@
 # backend/app_api.py
-from backend.db import init_db
+import importlib
+import threading
+import time
 
-from backend.controllers.category_controller import CategoryController
-from backend.controllers.sub_category_controller import SubCategoryController
-from backend.controllers.product_controller import ProductController
-from backend.controllers.variant_group_controller import VariantGroupController
-from backend.controllers.variant_value_controller import VariantValueController
-from backend.controllers.kiosk_menu_controller import KioskMenuController
-from backend.controllers.session_controller import SessionController
-from backend.controllers.order_controller import OrderController
+_T_IMPORT = time.perf_counter()
 
+from backend.db import init_db, pool_stats, db_report, start_checkpointer, read_snapshot
+from backend.boot_timing import BootTimer
+from backend.print_queue import PrintQueue
+from backend.session_store import get_store as get_session_store
+from backend.image_pipeline import get_pipeline as get_image_pipeline
+from backend.image_store import get_store as get_image_store
+from backend import sales_rollup
+from backend import api_metrics
 
+_IMPORT_MS = (time.perf_counter() - _T_IMPORT) * 1000.0
 
-from backend.receipt_printer import ReceiptPrinter
+
+class _Lazy:
+    """
+    Controller / printer built on first access ("module:Class", ctor kwargs),
+    then cached on the instance so later lookups are plain attribute reads.
+    """
+
+    _lock = threading.RLock()
+
+    def __init__(self, target: str, **kwargs):
+        self.module, self.cls = target.split(":", 1)
+        self.kwargs = kwargs
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        with self._lock:
+            if self.name in obj.__dict__:
+                return obj.__dict__[self.name]
+            t0 = time.perf_counter()
+            value = getattr(importlib.import_module(self.module), self.cls)(**self.kwargs)
+            obj.__dict__[self.name] = value
+        obj._boot.lazy(self.name, (time.perf_counter() - t0) * 1000.0)
+        return value
+
+
+# calls that only read the DB: consecutive ones in a batch() share one snapshot
+BATCH_READ_ONLY = frozenset({
+    "category_list",
+    "sub_category_list", "sub_category_get",
+    "product_list", "product_get",
+    "variant_group_list", "variant_groups_with_values",
+    "variant_value_list",
+    "kiosk_menu_all", "kiosk_menu_json", "kiosk_menu_etag", "kiosk_menu_since",
+    "order_get_full", "order_get_full_many",
+    "print_job_status",
+    "report_sales", "report_sales_status",
+})
 
 
 class AppApi:
@@ -21,22 +66,96 @@ class AppApi:
     window.pywebview.api.<method>(...)
     """
 
-    def __init__(self):
-        init_db()
+    # controllers (+ the modules behind them) load on first use
+    category = _Lazy("backend.controllers.category_controller:CategoryController")
+    sub_category = _Lazy("backend.controllers.sub_category_controller:SubCategoryController")
+    product = _Lazy("backend.controllers.product_controller:ProductController")
+    variant_group = _Lazy("backend.controllers.variant_group_controller:VariantGroupController")
+    variant_value = _Lazy("backend.controllers.variant_value_controller:VariantValueController")
+    kiosk_menu = _Lazy("backend.controllers.kiosk_menu_controller:KioskMenuController")
+    session = _Lazy("backend.controllers.session_controller:SessionController", minutes=7)
+    order = _Lazy("backend.controllers.order_controller:OrderController")
+    report = _Lazy("backend.controllers.report_controller:ReportController")
 
-        # controllers
-        self.category = CategoryController()
-        self.sub_category = SubCategoryController()
-        self.product = ProductController()
-        self.variant_group = VariantGroupController()
-        self.variant_value = VariantValueController()
-        self.kiosk_menu = KioskMenuController()
-        self.session = SessionController(minutes=7)
-        self.order = OrderController()
+    # printer (dev + exe supported inside ReceiptPrinter)
+    receipt = _Lazy("backend.receipt_printer:ReceiptPrinter")
 
-        # printer (dev + exe supported inside ReceiptPrinter)
-        self.receipt = ReceiptPrinter()
+    def __init__(self):
+        self._boot = BootTimer(started=_T_IMPORT)
+        self._boot.record("imports", _IMPORT_MS)
+
+        with self._boot.phase("init_db"):
+            self._migrations_applied = init_db()   # [] when the schema is current
+        with self._boot.phase("checkpointer"):
+            start_checkpointer()
+        with self._boot.phase("session_store"):
+            get_session_store().start_background()   # session flush + expiry sweeper
+
+        with self._boot.phase("print_queue"):
+            self.print_queue = PrintQueue(lambda: self.receipt)
+            self.print_queue.start()   # picks up jobs left from the last run
+        with self._boot.phase("image_pipeline"):
+            get_image_pipeline().backfill()   # renditions for images uploaded before the pipeline
+            get_image_store().start_gc()       # periodic uploads/ reconcile (first run a few minutes in)
+        with self._boot.phase("sales_rollups"):
+            sales_rollup.start_catch_up()      # rolls up existing orders once (background)
+
+        # opt-in call metrics (KIOSK_API_METRICS=1): wraps every public method below
+        with self._boot.phase("metrics"):
+            self._metrics = api_metrics.ApiMetrics() if api_metrics.ENABLED else None
+            if self._metrics:
+                api_metrics.instrument(self, self._metrics)
+                self._metrics.start_dumper()
+
+        self._boot.ready()
 
+    # =========================
+    # Batch (one bridge crossing for many calls)
+    # =========================
+    def batch(self, calls):
+        """
+        calls: [{"method": "product_get", "args": [3]}, ...]
+        Runs them in order and returns their results in the same order.
+        Consecutive read-only calls share one DB connection + snapshot;
+        a call that raises gives {"status": "error", "message": ..., "exception": True}.
+        """
+        calls = list(calls or [])
+        results = [None] * len(calls)
+
+        i = 0
+        while i < len(calls):
+            j = i
+            while j < len(calls) and self._batch_method(calls[j]) in BATCH_READ_ONLY:
+                j += 1
+
+            if j > i:
+                with read_snapshot():
+                    for k in range(i, j):
+                        results[k] = self._batch_one(calls[k])
+                i = j
+            else:
+                results[i] = self._batch_one(calls[i])
+                i += 1
+
+        return {"status": "ok", "data": results}
+
+    @staticmethod
+    def _batch_method(call) -> str:
+        return str((call or {}).get("method") or "") if isinstance(call, dict) else ""
+
+    def _batch_one(self, call):
+        method = self._batch_method(call)
+        fn = getattr(self, method, None) if method and not method.startswith("_") and method != "batch" else None
+        if not callable(fn):
+            return {"status": "error", "message": f"API method not found: {method}", "exception": True}
+
+        args = call.get("args") or []
+        if not isinstance(args, (list, tuple)):
+            args = [args]
+        try:
+            return fn(*args)
+        except Exception as e:
+            return {"status": "error", "message": str(e), "exception": True}
 
     # =========================
     # Receipt Printing
@@ -45,8 +164,20 @@ class AppApi:
         """
         Frontend:
           await window.pywebview.api.print_receipt(payload)
+        Queues the receipt and returns {ok, job_id} right away;
+        payload.order_id (optional) is marked PRINTED once the job prints.
         """
-        return self.receipt.print_receipt(payload or {})
+        return self.print_queue.submit(payload or {})
+
+    def print_job_status(self, job_id):
+        return self.print_queue.status(int(job_id))
+
+    def print_job_retry(self, job_id):
+        return self.print_queue.retry(int(job_id))
+
+    def print_queue_stats(self):
+        """Jobs printed / retried / failed, DB errors and orders still waiting to be marked PRINTED."""
+        return {"status": "ok", "data": self.print_queue.stats()}
 
     # =========================
     # Category
@@ -153,6 +284,21 @@ class AppApi:
     def kiosk_menu_all(self):
         return self.kiosk_menu.load_all()
 
+    def kiosk_menu_json(self, etag=""):
+        return self.kiosk_menu.load_json(str(etag or ""))
+
+    def kiosk_menu_etag(self):
+        return self.kiosk_menu.etag()
+
+    def kiosk_menu_since(self, version):
+        return self.kiosk_menu.load_since(int(version or 0))
+
+    def kiosk_menu_invalidate(self):
+        return self.kiosk_menu.invalidate()
+
+    def kiosk_menu_cache_stats(self):
+        return self.kiosk_menu.cache_stats()
+
 
     # =========================
     # Session (Level 2)
@@ -169,6 +315,9 @@ class AppApi:
     def session_close(self, session_key):
         return self.session.close(session_key or "")
 
+    def session_stats(self):
+        return self.session.stats()
+
     # =========================
     # Orders (Level 2)
     # =========================
@@ -189,3 +338,71 @@ class AppApi:
 
     def order_get_full(self, order_id):
         return self.order.get_full(int(order_id))
+
+    def order_get_full_many(self, order_ids):
+        return self.order.get_full_many(list(order_ids or []))
+
+    # =========================
+    # Reports
+    # =========================
+    def report_sales(self, date_range=None, granularity="day", limit=20):
+        """Sales from the rollup tables: range preset / {from, to}, granularity hour|day|week|month|product|channel."""
+        return self.report.report_sales(date_range, granularity, limit)
+
+    def report_sales_rebuild(self, from_day=None):
+        return self.report.rebuild(from_day)
+
+    def report_sales_status(self):
+        return self.report.status()
+
+    # =========================
+    # Diagnostics
+    # =========================
+    def db_pool_stats(self):
+        return {"status": "ok", "data": pool_stats()}
+
+    def db_profile_report(self):
+        try:
+            return {"status": "ok", "data": db_report()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def startup_report(self):
+        """Boot phases (ms), schema migrations run at boot, what was built lazily afterwards and when."""
+        return {"status": "ok", "data": {**self._boot.report(), "migrations_applied": self._migrations_applied}}
+
+    def image_pipeline_stats(self):
+        """Rendition worker counters (queued / rendered / failed), pending jobs, Pillow + WebP availability."""
+        return {"status": "ok", "data": get_image_pipeline().stats()}
+
+    def image_store_stats(self):
+        """Stored files, references, bytes (and bytes saved by sharing), delete failures, last GC run."""
+        try:
+            return {"status": "ok", "data": get_image_store().stats()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def image_gc(self, dry_run=False):
+        """Reconcile uploads/ with the catalog now; returns removed files and reclaimed bytes."""
+        try:
+            return {"status": "ok", "data": get_image_store().gc(dry_run=bool(dry_run))}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def metrics_snapshot(self):
+        """Per-method counts, errors, latency p50/p95/p99 and payload sizes of this process."""
+        if not self._metrics:
+            return {"status": "ok", "data": {"enabled": False, "process": api_metrics.process_label(), "methods": {}}}
+        return {"status": "ok", "data": self._metrics.snapshot()}
+
+    def metrics_dumps(self):
+        """Last periodic dump of every process (kiosk + dashboard)."""
+        try:
+            return {"status": "ok", "data": api_metrics.read_dumps()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def metrics_reset(self):
+        if self._metrics:
+            self._metrics.reset()
+        return {"status": "ok"}
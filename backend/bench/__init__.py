@@ -0,0 +1,36 @@
+# backend/bench/__init__.py
+"""
+Developer benchmarks. Run from the project root, e.g.:
+    python -m backend.bench.order_insert
+
+Benchmarks never touch identifier.sqlite: they point backend.db at a
+scratch database first (see use_scratch_db).
+"""
+import tempfile
+from pathlib import Path
+
+import backend.db as db
+import backend.image_store as image_store
+
+
+def use_scratch_db(path=None) -> Path:
+    """Point the pool at a scratch DB (temp file by default) and create the schema."""
+    if path is None:
+        path = Path(tempfile.mkdtemp(prefix="kiosk_bench_")) / "bench.sqlite"
+    db.close_pool()
+    db.DB_PATH = Path(path)
+    db.init_db()
+    image_store.AUTO_GC = False   # uploads/ belongs to the real DB: never collect it against a scratch one
+    return db.DB_PATH
+
+
+def percentiles(samples_ms, points=(50, 95, 99)) -> dict:
+    """Nearest-rank percentiles of a list of milliseconds."""
+    xs = sorted(samples_ms)
+    if not xs:
+        return {f"p{p}": 0.0 for p in points}
+    out = {}
+    for p in points:
+        k = max(0, min(len(xs) - 1, int(round(p / 100.0 * len(xs))) - 1))
+        out[f"p{p}"] = round(xs[k], 3)
+    return out
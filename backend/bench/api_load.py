@@ -0,0 +1,358 @@
+# backend/bench/api_load.py
+"""
+Load benchmark over every AppApi method at realistic scale.
+
+    python -m backend.bench.api_load [--scale full|small] [--db PATH] [--iterations 200]
+        [--out report.json] [--baseline old_report.json] [--tolerance 0.25]
+
+Seeds a scratch DB with backend.bench.seed (or reuses --db when it already
+has a catalog), builds AppApi on it and calls each method `--iterations`
+times. Prints a JSON report with throughput and latency percentiles per
+scenario. With --baseline, exits 1 when a scenario's p95 got slower than
+the baseline by more than --tolerance (and by more than MIN_REGRESSION_MS),
+so it can gate a release.
+
+Receipts go to a null printer (no hardware): print_receipt measures the
+enqueue the kiosk waits for, the worker still runs in the background.
+"""
+import argparse
+import datetime
+import inspect
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, NamedTuple, Optional
+
+from backend.bench import use_scratch_db, percentiles
+from backend.bench import seed as seeder
+from backend.db import get_conn
+from backend.repositories.print_job_repository import PrintJobRepository
+
+MIN_REGRESSION_MS = 0.2   # ignore p95 moves smaller than this (timer noise on sub-ms calls)
+
+
+class Scenario(NamedTuple):
+    name: str                                  # report key
+    method: str                                # AppApi method
+    args: Callable                             # (ctx, i) -> tuple of call args
+    setup: Optional[Callable] = None           # (ctx, i) -> None, untimed, before each call
+    max_calls: int = 0                         # cap for slow scenarios (0 = --iterations)
+
+
+class _NullPrinter:
+    def print_receipt(self, payload):
+        return {"ok": True, "printer": "bench"}
+
+
+def _is_error(result) -> bool:
+    if isinstance(result, dict):
+        return result.get("status") == "error" or result.get("ok") is False
+    return False
+
+
+# -------------------------
+# fixtures from the seeded DB
+# -------------------------
+def _load_ids(rng: random.Random) -> SimpleNamespace:
+    with get_conn(readonly=True) as conn:
+        ids = lambda sql: [int(r[0]) for r in conn.execute(sql).fetchall()]
+        ctx = SimpleNamespace(
+            categories=ids("SELECT id FROM categories WHERE is_active=1"),
+            subs=ids("SELECT id FROM sub_categories WHERE is_active=1"),
+            products=ids("SELECT id FROM products WHERE is_active=1"),
+            groups=ids("SELECT id FROM variant_groups WHERE is_active=1"),
+            orders=ids("SELECT id FROM orders ORDER BY id DESC LIMIT 5000"),
+        )
+        # carts need one active value for every required group of the product
+        sample = rng.sample(ctx.products, min(300, len(ctx.products)))
+        marks = ",".join("?" * len(sample))
+        picks = {}
+        for r in conn.execute(f"""
+          SELECT g.product_id, g.id AS group_id, g.is_required, MIN(v.id) AS value_id
+          FROM variant_groups g
+          JOIN variant_values v ON v.group_id = g.id AND v.is_active = 1
+          WHERE g.product_id IN ({marks}) AND g.is_active = 1
+          GROUP BY g.id
+        """, sample).fetchall():
+            if r["is_required"]:
+                picks.setdefault(int(r["product_id"]), []).append(int(r["value_id"]))
+        ctx.cart_products = [(pid, picks.get(pid, [])) for pid in sample]
+    return ctx
+
+
+def _cart(ctx, i: int, lines: int = 3) -> list:
+    out = []
+    for k in range(lines):
+        pid, values = ctx.cart_products[(i * lines + k) % len(ctx.cart_products)]
+        out.append({"product_id": pid, "qty": 1 + k % 2, "variant_value_ids": values})
+    return out
+
+
+def _new_order(api, ctx, i: int) -> int:
+    res = api.order_create_from_cart({"session_key": ctx.session_key, "service_type": "dine_in",
+                                      "items": _cart(ctx, i)})
+    return int(res["data"]["order_id"])
+
+
+def _pick(ctx, name: str) -> int:
+    """Random id from the seeded rows (ctx.rng is seeded, so runs pick the same ids)."""
+    xs = getattr(ctx, name)
+    return xs[ctx.rng.randrange(len(xs))] if xs else 0
+
+
+# -------------------------
+# scenarios (run in this order)
+# -------------------------
+def scenarios(api) -> list:
+    def pop(key):
+        return lambda ctx, i: (ctx.created[key].pop(),)
+
+    def fresh_order(ctx, i):
+        ctx.pending.append(_new_order(api, ctx, 10_000 + i))
+
+    def failed_job(ctx, i):
+        job_id = api.print_receipt({"order_no": "BENCH"})["job_id"]
+        PrintJobRepository().mark_failed(job_id, "bench")
+        ctx.pending.append(job_id)
+
+    def fresh_session(ctx, i):
+        ctx.pending.append(api.session_start()["data"]["session_key"])
+
+    def take(ctx, i):
+        return (ctx.pending.pop(),)
+
+    def product_screen(ctx, i):
+        pid = _pick(ctx, "products")
+        return ([{"method": "product_get", "args": [pid]},
+                 {"method": "variant_groups_with_values", "args": [pid]}],)
+
+    return [
+        # ----- dashboard catalog reads -----
+        Scenario("category_list", "category_list", lambda ctx, i: (True,)),
+        Scenario("sub_category_list", "sub_category_list", lambda ctx, i: (_pick(ctx, "categories"),)),
+        Scenario("sub_category_get", "sub_category_get", lambda ctx, i: (_pick(ctx, "subs"),)),
+        Scenario("product_list", "product_list", lambda ctx, i: (_pick(ctx, "subs"),)),
+        Scenario("product_get", "product_get", lambda ctx, i: (_pick(ctx, "products"),)),
+        Scenario("variant_group_list", "variant_group_list", lambda ctx, i: (_pick(ctx, "products"),)),
+        Scenario("variant_groups_with_values", "variant_groups_with_values",
+                 lambda ctx, i: (_pick(ctx, "products"),)),
+        Scenario("variant_value_list", "variant_value_list", lambda ctx, i: (_pick(ctx, "groups"),)),
+
+        # ----- kiosk menu -----
+        # cold = rebuild from the DB (~0.6 s on the full catalog): a few calls are enough
+        Scenario("kiosk_menu_all:cold", "kiosk_menu_all", lambda ctx, i: (),
+                 setup=lambda ctx, i: api.kiosk_menu_invalidate(), max_calls=10),
+        Scenario("kiosk_menu_all", "kiosk_menu_all", lambda ctx, i: ()),
+        Scenario("kiosk_menu_json:cold", "kiosk_menu_json", lambda ctx, i: ("",),
+                 setup=lambda ctx, i: api.kiosk_menu_invalidate(), max_calls=10),
+        Scenario("kiosk_menu_json", "kiosk_menu_json", lambda ctx, i: ("",)),
+        Scenario("kiosk_menu_json:not_modified", "kiosk_menu_json", lambda ctx, i: (ctx.etag,),
+                 setup=lambda ctx, i: setattr(ctx, "etag", ctx.etag or api.kiosk_menu_etag()["data"]["etag"])),
+        Scenario("kiosk_menu_etag", "kiosk_menu_etag", lambda ctx, i: ()),
+        Scenario("kiosk_menu_cache_stats", "kiosk_menu_cache_stats", lambda ctx, i: ()),
+        Scenario("kiosk_menu_invalidate", "kiosk_menu_invalidate", lambda ctx, i: ()),
+
+        # ----- session -----
+        Scenario("session_start", "session_start", lambda ctx, i: ()),
+        Scenario("session_touch", "session_touch", lambda ctx, i: (ctx.session_key,)),
+        Scenario("session_status", "session_status", lambda ctx, i: (ctx.session_key,)),
+        Scenario("session_close", "session_close", take, setup=fresh_session),
+        Scenario("session_stats", "session_stats", lambda ctx, i: ()),
+
+        # ----- orders (new orders + a year of history) -----
+        Scenario("order_create_from_cart", "order_create_from_cart",
+                 lambda ctx, i: ({"session_key": ctx.session_key, "service_type": "dine_in",
+                                  "items": _cart(ctx, i)},)),
+        Scenario("order_set_payment_type", "order_set_payment_type",
+                 lambda ctx, i: (ctx.pending.pop(), "qr"), setup=fresh_order),
+        Scenario("order_mark_paid", "order_mark_paid", take, setup=fresh_order),
+        Scenario("order_mark_printed", "order_mark_printed", take, setup=fresh_order),
+        Scenario("order_cancel", "order_cancel", take, setup=fresh_order),
+        Scenario("order_get_full", "order_get_full", lambda ctx, i: (_pick(ctx, "orders"),)),
+        Scenario("order_get_full_many", "order_get_full_many",
+                 lambda ctx, i: ([_pick(ctx, "orders") for _ in range(20)],)),
+
+        # ----- sales reports (rollup tables) -----
+        *[Scenario(f"report_sales_{g}", "report_sales", (lambda g: lambda ctx, i: ("365d", g))(g))
+          for g in ("hour", "day", "week", "month", "product", "channel")],
+        Scenario("report_sales_all_days", "report_sales", lambda ctx, i: ("all", "day")),
+        Scenario("report_sales_status", "report_sales_status", lambda ctx, i: ()),
+        Scenario("report_sales_rebuild", "report_sales_rebuild",
+                 lambda ctx, i: ((datetime.date.today() - datetime.timedelta(days=7)).isoformat(),), max_calls=5),
+
+        # ----- batch: product screen (2 reads, one snapshot) -----
+        Scenario("batch", "batch", product_screen),
+
+        # ----- printing -----
+        Scenario("print_receipt", "print_receipt",
+                 lambda ctx, i: ({"order_id": _pick(ctx, "orders"), "order_no": "BENCH"},)),
+        Scenario("print_job_status", "print_job_status", lambda ctx, i: (ctx.job_id,),
+                 setup=lambda ctx, i: setattr(ctx, "job_id", ctx.job_id or api.print_receipt({})["job_id"])),
+        Scenario("print_job_retry", "print_job_retry", take, setup=failed_job),
+        Scenario("print_queue_stats", "print_queue_stats", lambda ctx, i: ()),
+
+        # ----- catalog writes (on rows created here, removed at the end) -----
+        *_crud(api, "category", lambda ctx, k: {"name": f"Bench {ctx.tag} {k}", "sort_order": 999}),
+        *_crud(api, "sub_category", lambda ctx, k: {"category_id": ctx.categories[0],
+                                                    "name": f"Bench {ctx.tag} {k}", "sort_order": 999}),
+        *_crud(api, "product", lambda ctx, k: {"sub_category_id": ctx.subs[0], "name": f"Bench {ctx.tag} {k}",
+                                               "base_price": 2.5, "sort_order": 999}),
+        *_crud(api, "variant_group", lambda ctx, k: {"product_id": ctx.products[0],
+                                                     "name": f"Bench {ctx.tag} {k}", "max_select": 1}),
+        *_crud(api, "variant_value", lambda ctx, k: {"group_id": ctx.groups[0],
+                                                     "name": f"Bench {ctx.tag} {k}", "extra_price": 0.5}),
+        Scenario("kiosk_menu_since", "kiosk_menu_since", lambda ctx, i: (ctx.version_before_writes,)),
+        *[Scenario(f"{e}_delete", f"{e}_delete", pop(e))
+          for e in ("variant_value", "variant_group", "product", "sub_category", "category")],
+
+        # ----- diagnostics -----
+        Scenario("db_pool_stats", "db_pool_stats", lambda ctx, i: ()),
+        Scenario("db_profile_report", "db_profile_report", lambda ctx, i: ()),
+        Scenario("startup_report", "startup_report", lambda ctx, i: ()),
+        Scenario("image_pipeline_stats", "image_pipeline_stats", lambda ctx, i: ()),
+        Scenario("image_store_stats", "image_store_stats", lambda ctx, i: ()),
+        # dry run only: the scratch DB does not reference the real uploads/
+        Scenario("image_gc", "image_gc", lambda ctx, i: (True,), max_calls=10),
+        Scenario("metrics_snapshot", "metrics_snapshot", lambda ctx, i: ()),
+        Scenario("metrics_dumps", "metrics_dumps", lambda ctx, i: ()),
+        Scenario("metrics_reset", "metrics_reset", lambda ctx, i: ()),
+    ]
+
+
+def _crud(api, entity: str, payload: Callable) -> list:
+    """create / update / toggle for one catalog entity; <entity>_delete runs later (children first)."""
+    def create_args(ctx, i):
+        return (payload(ctx, str(i)),)
+
+    def updated(ctx, i):
+        row_id = ctx.created[entity][i % len(ctx.created[entity])]
+        return row_id, {**payload(ctx, f"u{row_id}"), "sort_order": 998}
+
+    def toggled(ctx, i):
+        ids = ctx.created[entity]
+        return ids[i % len(ids)], i % 2
+
+    return [
+        Scenario(f"{entity}_create", f"{entity}_create", create_args),
+        Scenario(f"{entity}_update", f"{entity}_update", updated),
+        Scenario(f"{entity}_toggle", f"{entity}_toggle", toggled),
+    ]
+
+
+# -------------------------
+# runner
+# -------------------------
+def run(api, ctx, iterations: int) -> dict:
+    results = {}
+    for sc in scenarios(api):
+        fn = getattr(api, sc.method)
+        samples, errors = [], 0
+        for i in range(min(iterations, sc.max_calls or iterations)):
+            if sc.setup:
+                sc.setup(ctx, i)
+            args = sc.args(ctx, i)
+            t0 = time.perf_counter()
+            res = fn(*args)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            errors += _is_error(res)
+            if sc.name.endswith("_create") and not _is_error(res):
+                ctx.created.setdefault(sc.method[:-len("_create")], []).append(int(res["id"]))
+        total_ms = sum(samples)
+        results[sc.name] = {
+            "calls": len(samples),
+            "errors": errors,
+            "ops_per_sec": round(len(samples) / (total_ms / 1000.0), 1) if total_ms else 0.0,
+            "mean_ms": round(total_ms / len(samples), 3),
+            **percentiles(samples),
+            "max_ms": round(max(samples), 3),
+        }
+    return results
+
+
+def not_covered(api) -> list:
+    methods = {n for n in dir(type(api))
+               if not n.startswith("_") and inspect.isfunction(getattr(type(api), n, None))}
+    return sorted(methods - {sc.method for sc in scenarios(api)})
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> list:
+    out = []
+    for name, cur in report["results"].items():
+        old = (baseline.get("results") or {}).get(name)
+        if not old:
+            continue
+        if cur["p95"] > old["p95"] * (1.0 + tolerance) and cur["p95"] - old["p95"] > MIN_REGRESSION_MS:
+            out.append({"scenario": name, "baseline_p95": old["p95"], "p95": cur["p95"],
+                        "ratio": round(cur["p95"] / max(old["p95"], 1e-9), 2)})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=sorted(seeder.SCALES), default="full")
+    ap.add_argument("--db", help="scratch DB to use; seeded when it has no catalog yet")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--out", help="also write the report to this file")
+    ap.add_argument("--baseline", help="report from an earlier run to compare p95 against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown (0.25 = +25%%)")
+    args = ap.parse_args()
+
+    path = use_scratch_db(Path(args.db) if args.db else None)
+    with get_conn(readonly=True) as conn:
+        has_catalog = conn.execute("SELECT 1 FROM products LIMIT 1").fetchone() is not None
+    seeded = None if has_catalog else seeder.seed(args.scale, args.seed, datetime.date.today())
+
+    from backend.app_api import AppApi
+    api = AppApi()
+    api.print_queue.get_printer = _NullPrinter
+
+    rng = random.Random(args.seed)
+    ctx = _load_ids(rng)
+    ctx.rng = rng
+    ctx.tag = str(int(time.time()))
+    ctx.created, ctx.pending = {}, []
+    ctx.etag = ctx.job_id = None
+    ctx.session_key = api.session_start()["data"]["session_key"]
+    ctx.version_before_writes = api.kiosk_menu_etag()["data"]["version"]
+
+    t0 = time.perf_counter()
+    results = run(api, ctx, max(1, args.iterations))
+    report = {
+        "meta": {
+            "taken_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "db": str(path),
+            "seeded": seeded,
+            "iterations": args.iterations,
+            "python": sys.version.split()[0],
+            "sqlite": __import__("sqlite3").sqlite_version,
+            "run_sec": round(time.perf_counter() - t0, 2),
+        },
+        "not_covered": not_covered(api),
+        "results": results,
+    }
+
+    failed = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failed = regressions(report, baseline, args.tolerance)
+        report["regressions"] = failed
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+
+    api.print_queue.stop()
+    if report["not_covered"]:
+        print(f"not covered: {', '.join(report['not_covered'])}", file=sys.stderr)
+    if failed:
+        print(f"{len(failed)} scenario(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
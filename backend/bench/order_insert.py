@@ -0,0 +1,150 @@
+# backend/bench/order_insert.py
+"""
+create_from_cart: row-by-row inserts (before) vs bulk inserts (after).
+
+    python -m backend.bench.order_insert [--lines 15 60 200] [--runs 30]
+"""
+import argparse
+import json
+import time
+
+from backend.bench import use_scratch_db, percentiles
+from backend.db import get_conn
+from backend.repositories.order_repository import OrderRepository
+from backend.repositories.session_repository import SessionRepository
+
+
+class RowwiseOrderRepository(OrderRepository):
+    """Reference: the old insert path (one INSERT + lastrowid per item, one per variant)."""
+
+    def _insert_lines(self, conn, order_id, lines):
+        for v, qty in lines:
+            p = v["product"]
+            cur = conn.execute("""
+              INSERT INTO order_items(order_id, product_id, name, qty, base_price, line_total, image_path, image_url)
+              VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+            """, (int(order_id), int(p["id"]), str(p["name"] or ""), int(qty),
+                  float(v["base_price"]), float(v["unit_price"] * qty), p["image_path"], None))
+            item_id = int(cur.lastrowid)
+            for gid, group_name, val in v["variants"]:
+                conn.execute("""
+                  INSERT INTO order_item_variants(
+                    order_item_id, group_id, group_name, value_id, value_name, extra_price
+                  ) VALUES(?, ?, ?, ?, ?, ?)
+                """, (item_id, gid, group_name, int(val["id"]), val["name"], float(val["extra_price"] or 0)))
+
+
+def _seed_catalog(n_products: int, groups_per_product: int = 3, values_per_group: int = 4):
+    """Products with `groups_per_product` single-select groups; returns [(pid, [vid per group])]."""
+    out = []
+    with get_conn() as conn:
+        conn.execute("INSERT INTO categories(name) VALUES ('Bench')")
+        conn.execute("INSERT INTO sub_categories(category_id, name) VALUES (1, 'Bench')")
+        for i in range(n_products):
+            pid = conn.execute(
+                "INSERT INTO products(sub_category_id, name, base_price) VALUES (1, ?, ?)",
+                (f"Product {i}", 1.5 + i % 7),
+            ).lastrowid
+            picks = []
+            for g in range(groups_per_product):
+                gid = conn.execute(
+                    "INSERT INTO variant_groups(product_id, name, is_required, max_select) VALUES (?, ?, 1, 1)",
+                    (pid, f"Group {g}"),
+                ).lastrowid
+                vids = [
+                    conn.execute(
+                        "INSERT INTO variant_values(group_id, name, extra_price) VALUES (?, ?, ?)",
+                        (gid, f"Value {v}", 0.25 * v),
+                    ).lastrowid
+                    for v in range(values_per_group)
+                ]
+                picks.append(vids)
+            out.append((pid, picks))
+    return out
+
+
+def _cart(catalog, n_lines: int):
+    items = []
+    for i in range(n_lines):
+        pid, picks = catalog[i % len(catalog)]
+        items.append({
+            "product_id": pid,
+            "qty": 1 + i % 3,
+            "variant_value_ids": [vids[i % len(vids)] for vids in picks],
+        })
+    return items
+
+
+def _validated_lines(items):
+    """Validate once with the real repository code, reuse for insert-only timing."""
+    repo = OrderRepository()
+    pids = sorted({it["product_id"] for it in items})
+    with get_conn(readonly=True) as conn:
+        products = repo._get_products(conn, pids)
+        groups = repo._get_groups_by_products(conn, pids)
+        gids = [int(g["id"]) for gs in groups.values() for g in gs]
+        lookup = repo._make_value_lookup(repo._get_values_by_groups(conn, gids))
+    return [
+        (repo._validate_line(it["product_id"], it["variant_value_ids"], products, groups, lookup), it["qty"])
+        for it in items
+    ]
+
+
+def _time_inserts(repo, lines, runs) -> list:
+    samples = []
+    for _ in range(runs):
+        with get_conn() as conn:
+            order_id = conn.execute(
+                "INSERT INTO orders(service_type, status) VALUES ('dine_in', 'CREATED')"
+            ).lastrowid
+            t0 = time.perf_counter()
+            repo._insert_lines(conn, order_id, lines)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def _time_repo(repo, session_key, items, runs) -> list:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        repo.create_from_cart({"session_key": session_key, "service_type": "dine_in", "items": items})
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, nargs="+", default=[15, 60, 200])
+    ap.add_argument("--runs", type=int, default=30)
+    ap.add_argument("--products", type=int, default=200)
+    args = ap.parse_args()
+
+    use_scratch_db()
+    catalog = _seed_catalog(args.products)
+    session_key = SessionRepository(minutes=60).start()["session_key"]
+
+    report = []
+    for n in args.lines:
+        items = _cart(catalog, n)
+        lines = _validated_lines(items)
+        row = {"lines": n, "variants_per_line": len(catalog[0][1])}
+
+        for scope, timer, arg in (
+            ("insert_only", _time_inserts, lines),
+            ("create_from_cart", lambda r, a, k: _time_repo(r, session_key, a, k), items),
+        ):
+            res = {}
+            for label, repo in (("before_rowwise", RowwiseOrderRepository()), ("after_bulk", OrderRepository())):
+                timer(repo, arg, 3)  # warm-up
+                samples = timer(repo, arg, args.runs)
+                res[label] = {"mean_ms": round(sum(samples) / len(samples), 3), **percentiles(samples)}
+            res["speedup"] = round(res["before_rowwise"]["mean_ms"] / max(res["after_bulk"]["mean_ms"], 1e-9), 2)
+            row[scope] = res
+
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
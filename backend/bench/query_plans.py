@@ -0,0 +1,219 @@
+# backend/bench/query_plans.py
+"""
+EXPLAIN QUERY PLAN check for the repository queries.
+
+    python -m backend.bench.query_plans [--verbose]
+
+Drives the repositories on a small scratch catalog, records every statement
+they send to SQLite (trace callback on each pooled connection) and explains
+it. A scan of a whole table or index (SCAN ...) or a temp B-tree sort
+fails the check, except for the cases listed in ALLOWED. Exit code 1 on
+failure, so it can run before a release next to the other benches.
+"""
+import argparse
+import re
+import sqlite3
+import sys
+
+import backend.db as db
+from backend.bench import use_scratch_db
+from backend.repositories.catalog_repository import CatalogRepository
+from backend.repositories.image_ref_repository import ImageRefRepository
+from backend.repositories.category_repository import CategoryRepository
+from backend.repositories.menu_repository import MenuRepository
+from backend.repositories.order_repository import OrderRepository
+from backend.repositories.print_job_repository import PrintJobRepository
+from backend.repositories.product_repository import ProductRepository
+from backend.repositories.sales_rollup_repository import SalesRollupRepository
+from backend.repositories.session_repository import SessionRepository
+from backend.repositories.sub_category_repository import SubCategoryRepository
+from backend.repositories.variant_group_repository import VariantGroupRepository
+from backend.repositories.variant_value_repository import VariantValueRepository
+from backend.session_store import get_store
+
+# (regex on the statement, plan detail that is accepted, why)
+ALLOWED = [
+    (r"FROM categories (?:WHERE is_active ?= ?\? )?ORDER BY", "SCAN categories USING INDEX idx_categories_sort",
+     "a dozen rows, all needed (dashboard list, menu): ordered index walk, no sort"),
+    (r"WHERE id IN \(.*\)\s+ORDER BY sort_order", "USE TEMP B-TREE FOR ORDER BY",
+     "menu delta: sorts only the rows changed since the client's version"),
+    (r"SELECT DISTINCT entity, entity_id", "USE TEMP B-TREE FOR DISTINCT",
+     "catalog change log range, bounded by CHANGE_LOG_KEEP"),
+    (r"SELECT source, kind, path FROM image_renditions$", "SCAN image_renditions",
+     "menu snapshot: every rendition is needed, one pass per build"),
+    (r"SELECT image_path FROM categories UNION ALL", "SCAN ",
+     "image GC: counts every image_path (background, every few hours)"),
+    (r"SELECT image_path FROM categories UNION ALL", "USE TEMP B-TREE FOR GROUP BY",
+     "image GC: same, grouped per path"),
+    (r"FROM image_refs\s*$|FROM image_refs WHERE refs ?= ?\?|^UPDATE image_refs SET refs = \? WHERE touched_epoch",
+     "SCAN image_refs", "image store totals / GC recount: one row per stored file"),
+    (r".", "SCAN CONSTANT ROW", "SELECT without FROM (scalar subqueries only): nothing is scanned"),
+    (r"^INSERT INTO sales_(daily|hourly|product|channel)\(", "USE TEMP B-TREE FOR GROUP BY",
+     "sales rollups: groups one order's lines, or one catch-up chunk's orders"),
+    (r"^INSERT INTO sales_product\(.*FROM \( SELECT", "SCAN (subquery-1)",
+     "sales rollup catch-up: reads back its own grouped chunk"),
+    (r"FROM sales_(daily|hourly|product|channel) WHERE day BETWEEN \? AND \? GROUP BY", "USE TEMP B-TREE FOR",
+     "sales reports: group / rank the rollup rows of the requested days"),
+]
+
+# nothing to plan: transaction control, pragmas, plain INSERT ... VALUES
+_SKIP = re.compile(r"^\s*(PRAGMA|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b|^\s*INSERT\b(?!.*\bSELECT\b)", re.I | re.S)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def _normalize(sql: str) -> str:
+    """Traced SQL has the parameters inlined: put the placeholders back."""
+    sql = _LITERAL.sub("?", " ".join(sql.split()))
+    # IN lists of any length explain the same
+    return re.sub(r"IN \(\?(?:\s*,\s*\?)+\)", "IN (?, ?)", sql)
+
+
+def _record_statements(into: list):
+    """Trace every statement on connections the pool opens from now on."""
+    open_conn = db._ConnectionPool._open
+
+    def traced(pool, readonly):
+        conn = open_conn(pool, readonly)
+        conn.set_trace_callback(into.append)
+        return conn
+
+    db.close_pool()
+    db._ConnectionPool._open = traced
+
+
+def _workload():
+    """One pass over every repository read/write path worth indexing."""
+    cats, subs, prods, groups, values = (CategoryRepository(), SubCategoryRepository(), ProductRepository(),
+                                         VariantGroupRepository(), VariantValueRepository())
+    catalog = CatalogRepository()
+
+    pids, vids = [], []
+    for c in range(3):
+        cid = cats.create({"name": f"Category {c}", "sort_order": c})
+        catalog.bump("category", cid, "create")
+        for s in range(3):
+            sid = subs.create({"category_id": cid, "name": f"Sub {s}", "sort_order": s})
+            for p in range(4):
+                pid = prods.create({"sub_category_id": sid, "name": f"Product {c}.{s}.{p}",
+                                    "base_price": 1.5 + p, "sort_order": p})
+                pids.append(pid)
+                catalog.bump("product", pid, "create")
+                gid = groups.create({"product_id": pid, "name": "Size", "is_required": 1, "max_select": 1})
+                vids.append([values.create({"group_id": gid, "name": n, "extra_price": x})
+                             for n, x in (("S", 0), ("M", 0.5), ("L", 1))])
+
+    # dashboard lists (all + active only)
+    for include_inactive in (True, False):
+        cats.list(include_inactive)
+        subs.list_by_category(1, include_inactive)
+        prods.list_by_sub_category(1, include_inactive)
+        groups.list_by_product(pids[0], include_inactive)
+        values.list_by_group(1, include_inactive)
+    prods.get(pids[0])
+    prods.toggle(pids[-1], 0)
+
+    # kiosk menu: full snapshot + delta
+    menu = MenuRepository()
+    MenuRepository.invalidate()
+    menu.load_all_active()
+    menu.load_since(1)
+
+    # session -> order -> pay -> print
+    sessions = SessionRepository(minutes=5)
+    key = sessions.start()["session_key"]
+    orders = OrderRepository()
+    items = [{"product_id": pid, "qty": 1, "variant_value_ids": [v[1]]} for pid, v in zip(pids[:5], vids[:5])]
+    order = orders.create_from_cart({"session_key": key, "service_type": "dine_in", "items": items})
+    order_id = order["order_id"]
+    orders.set_payment_type(order_id, "counter")
+    orders.mark_paid(order_id)
+    orders.get_full_many([order_id])
+
+    # sales rollups: incremental (paid, cancelled after paying), catch-up, reports
+    other = orders.create_from_cart({"session_key": key, "service_type": "take_away", "items": items[:2]})
+    orders.mark_paid(other["order_id"])
+    orders.cancel(other["order_id"])
+    rollups = SalesRollupRepository()
+    first, last = rollups.order_day_span()
+    rollups.rebuild(first, last)
+    rollups.totals(first, last)
+    rollups.by_day(first, last)
+    rollups.by_period(first, last, "substr(day, 1, 7)")
+    rollups.by_hour(first, last)
+    rollups.by_product(first, last, 20)
+    rollups.by_channel(first, last)
+
+    jobs = PrintJobRepository()
+    jobs.enqueue({"order_id": order_id}, order_id)
+    jobs.next_due_epoch()
+    job = jobs.claim_next(2 ** 31)
+    jobs.mark_done(int(job["id"]), "bench")
+    jobs.requeue_interrupted()
+
+    # image store references (files are not touched here)
+    refs = ImageRefRepository()
+    refs.acquire("uploads/images/bench.png", 1)
+    refs.release("uploads/images/bench.png")
+    refs.refs("uploads/images/bench.png")
+    refs.recount(refs.referenced(), 0)
+    refs.unreferenced()
+    refs.totals()
+
+    sessions.flush()
+    get_store().status("not-in-ram")  # DB lookup on a RAM miss
+    get_store().sweep()
+
+
+def _explain(sql: str):
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        params = (None,) * sql.count("?")
+        return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def _problems(sql: str, plan: list) -> list:
+    out = []
+    for detail in plan:
+        if not (detail.startswith("SCAN ") or "USE TEMP B-TREE" in detail):
+            continue
+        if any(re.search(pat, sql, re.S) and detail.startswith(ok) for pat, ok, _ in ALLOWED):
+            continue
+        out.append(detail)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--verbose", action="store_true", help="print the plan of every statement")
+    args = ap.parse_args()
+
+    use_scratch_db()
+    seen = []
+    _record_statements(seen)
+    _workload()
+    db.close_pool()
+
+    statements = []
+    for sql in seen:
+        sql = _normalize(sql)
+        if sql and not _SKIP.match(sql) and sql not in statements:
+            statements.append(sql)
+
+    failed = 0
+    for sql in statements:
+        plan = _explain(sql)
+        bad = _problems(sql, plan)
+        failed += bool(bad)
+        if bad or args.verbose:
+            print(("FAIL " if bad else "ok   ") + sql[:160])
+            for detail in plan:
+                print(("   !! " if detail in bad else "      ") + detail)
+
+    print(f"{len(statements)} statements, {failed} with a full scan or temp sort")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
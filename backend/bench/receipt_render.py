@@ -0,0 +1,91 @@
+# backend/bench/receipt_render.py
+"""
+Receipt rendering: PDF (reportlab, then SumatraPDF rasterizes) vs raw ESC/POS bytes.
+
+    python -m backend.bench.receipt_render [--items 5 20 60] [--runs 50]
+
+Only the render step is timed (no spooling). The PDF side is skipped when
+reportlab is not installed.
+"""
+import argparse
+import json
+import time
+
+from backend.bench import percentiles
+from backend.receipt_escpos import render_escpos
+from backend.receipt_printer import ReceiptPrinter
+
+
+def _payload(n_items: int) -> dict:
+    return {
+        "order_no": "20260101-0042",
+        "service_type": "dine_in",
+        "payment_method": "counter",
+        "created_at": "2026-01-01 09:30:00",
+        "items": [
+            {
+                "name": f"Iced Latte {i}" if i % 4 else f"Caramel Macchiato Extra Shot Oat Milk {i}",
+                "qty": 1 + i % 3,
+                "base_price": 2.5,
+                "line_total": 3.0 * (1 + i % 3),
+                "variants": [
+                    {"group_name": "Size", "value_name": "Large", "extra_price": 0.5},
+                    {"group_name": "Sugar", "value_name": "50%", "extra_price": 0},
+                ],
+            }
+            for i in range(n_items)
+        ],
+    }
+
+
+def _time(fn, runs: int):
+    fn()  # warm-up
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def _summary(samples) -> dict:
+    return {"mean_ms": round(sum(samples) / len(samples), 3), **percentiles(samples)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, nargs="+", default=[5, 20, 60])
+    ap.add_argument("--runs", type=int, default=50)
+    args = ap.parse_args()
+
+    try:
+        import reportlab  # noqa: F401
+        has_pdf = True
+    except ImportError:
+        has_pdf = False
+
+    printer = ReceiptPrinter()
+
+    report = []
+    for n in args.items:
+        payload = _payload(n)
+        row = {"items": n}
+
+        row["escpos"] = {**_summary(_time(lambda: render_escpos(payload), args.runs)),
+                         "bytes": len(render_escpos(payload))}
+
+        if has_pdf:
+            row["pdf"] = {**_summary(_time(lambda: printer.render_pdf(payload), args.runs)),
+                          "bytes": len(printer.render_pdf(payload)),
+                          "note": "in-memory; excludes SumatraPDF rasterization"}
+            row["speedup"] = round(row["pdf"]["mean_ms"] / max(row["escpos"]["mean_ms"], 1e-9), 1)
+        else:
+            row["pdf"] = "skipped (reportlab not installed)"
+
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
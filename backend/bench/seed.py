@@ -0,0 +1,259 @@
+# backend/bench/seed.py
+"""
+Deterministic synthetic data for benchmarks: a large catalog and an order
+history, written straight into a scratch DB.
+
+    python -m backend.bench.seed --db /tmp/kiosk_big.sqlite [--scale full]
+        [--categories 50] [--products 5000] [--values-per-product 20]
+        [--days 365] [--orders-per-day 150] [--seed 1] [--end-date 2026-06-30]
+
+Same arguments (seed + end date) => the same rows, byte for byte, so runs
+on different days or machines compare like for like. Only seeds an empty
+catalog: never point it at identifier.sqlite.
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+from pathlib import Path
+
+from backend import sales_rollup
+from backend.bench import use_scratch_db
+from backend.db import get_conn
+
+SCALES = {
+    # 50 categories, 5,000 products, 20 variant values each, a year of orders
+    "full": {"categories": 50, "subs_per_category": 4, "products": 5000,
+             "groups_per_product": 4, "values_per_product": 20, "days": 365, "orders_per_day": 150},
+    "small": {"categories": 8, "subs_per_category": 3, "products": 300,
+              "groups_per_product": 3, "values_per_product": 9, "days": 30, "orders_per_day": 60},
+}
+
+GROUP_NAMES = ["Size", "Sugar", "Ice", "Milk", "Shot", "Topping", "Syrup", "Temperature"]
+SERVICE_TYPES = ["dine_in", "take_away"]
+PAYMENT_TYPES = ["counter", "qr"]
+# order status mix of a normal day
+STATUSES = [("PRINTED", 90), ("PAID", 3), ("CANCELLED", 5), ("CREATED", 2)]
+# orders per hour of the day (relative): breakfast, lunch and evening peaks
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 2, 6, 10, 7, 5, 8, 12, 10, 6, 5, 6, 8, 10, 8, 5, 3, 1, 0]
+
+_CHUNK = 5000
+
+
+def _insert(conn, sql: str, rows: list) -> None:
+    for i in range(0, len(rows), _CHUNK):
+        conn.executemany(sql, rows[i:i + _CHUNK])
+
+
+def _ts(dt: datetime.datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def seed_catalog(rng: random.Random, categories: int, subs_per_category: int, products: int,
+                 groups_per_product: int, values_per_product: int, created_at: str) -> list:
+    """
+    created_at: timestamp for every catalog row (fixed, so output is reproducible).
+    Returns the active products as [(id, name, base_price, [(gid, gname, [(vid, vname, extra)])])]
+    for seed_orders.
+    """
+    per_group = max(1, values_per_product // max(1, groups_per_product))
+    cat_rows, sub_rows, prod_rows, group_rows, value_rows = [], [], [], [], []
+    sellable = []
+
+    sub_ids = []
+    for c in range(1, categories + 1):
+        cat_rows.append((c, f"Category {c:02d}", c, 1, created_at))
+        for s in range(subs_per_category):
+            sid = len(sub_ids) + 1
+            sub_rows.append((sid, c, f"Sub {c:02d}.{s + 1}", s, 1, created_at))
+            sub_ids.append(sid)
+
+    gid = vid = 0
+    for p in range(1, products + 1):
+        sid = sub_ids[(p - 1) % len(sub_ids)]
+        price = round(rng.uniform(1.0, 6.0) * 4) / 4
+        active = rng.random() >= 0.03
+        name = f"Product {p:05d}"
+        prod_rows.append((p, sid, f"SKU-{p:05d}", name, price, p, int(active), created_at))
+
+        groups = []
+        for g in range(groups_per_product):
+            gid += 1
+            gname = GROUP_NAMES[g % len(GROUP_NAMES)] + ("" if g < len(GROUP_NAMES) else f" {g}")
+            required = int(g == 0)
+            group_rows.append((gid, p, gname, required, 1, g, 1, created_at))
+            vals = []
+            for v in range(per_group):
+                vid += 1
+                extra = 0.0 if v == 0 else round(rng.choice([0.25, 0.5, 0.75, 1.0]), 2)
+                v_active = v == 0 or rng.random() >= 0.05
+                value_rows.append((vid, gid, f"{gname} {v + 1}", extra, v, int(v_active), created_at))
+                if v_active:
+                    vals.append((vid, f"{gname} {v + 1}", extra))
+            groups.append((gid, gname, vals))
+        if active:
+            sellable.append((p, name, price, groups))
+
+    with get_conn() as conn:
+        if conn.execute("SELECT 1 FROM categories LIMIT 1").fetchone():
+            raise ValueError("catalog is not empty: seed a fresh scratch DB")
+        _insert(conn, "INSERT INTO categories(id, name, sort_order, is_active, created_at) VALUES (?, ?, ?, ?, ?)", cat_rows)
+        _insert(conn, """
+          INSERT INTO sub_categories(id, category_id, name, sort_order, is_active, created_at)
+          VALUES (?, ?, ?, ?, ?, ?)
+        """, sub_rows)
+        _insert(conn, """
+          INSERT INTO products(id, sub_category_id, sku, name, base_price, sort_order, is_active, created_at)
+          VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, prod_rows)
+        _insert(conn, """
+          INSERT INTO variant_groups(id, product_id, name, is_required, max_select, sort_order, is_active, created_at)
+          VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, group_rows)
+        _insert(conn, """
+          INSERT INTO variant_values(id, group_id, name, extra_price, sort_order, is_active, created_at)
+          VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, value_rows)
+
+    return sellable
+
+
+def seed_orders(rng: random.Random, sellable: list, days: int, orders_per_day: int,
+                end_date: datetime.date) -> dict:
+    """Order history ending on end_date (inclusive), one transaction per day."""
+    if not sellable or days <= 0:
+        return {"orders": 0, "order_items": 0, "order_item_variants": 0}
+
+    # a few products sell a lot, most sell a little
+    cum, total = [], 0.0
+    for rank in range(len(sellable)):
+        total += 1.0 / (rank + 1) ** 0.8
+        cum.append(total)
+    popular = sellable[:]
+    rng.shuffle(popular)
+
+    statuses, status_w = zip(*STATUSES)
+    hours = list(range(24))
+
+    with get_conn() as conn:
+        order_id = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()[0])
+        item_id = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM order_items").fetchone()[0])
+        variant_id = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM order_item_variants").fetchone()[0])
+    counts = {"orders": 0, "order_items": 0, "order_item_variants": 0}
+
+    for d in range(days - 1, -1, -1):
+        day = end_date - datetime.timedelta(days=d)
+        day_key = day.strftime("%Y%m%d")
+        n_orders = max(1, int(orders_per_day * rng.uniform(0.7, 1.3) * (1.2 if day.weekday() >= 5 else 1.0)))
+        stamps = sorted(
+            datetime.datetime.combine(day, datetime.time(h, rng.randrange(60), rng.randrange(60)))
+            for h in rng.choices(hours, weights=HOUR_WEIGHTS, k=n_orders)
+        )
+
+        orders, items, variants = [], [], []
+        for seq, created in enumerate(stamps, start=1):
+            order_id += 1
+            status = rng.choices(statuses, weights=status_w)[0]
+            order_total = 0.0
+            for prod_id, name, base, groups in rng.choices(popular, cum_weights=cum, k=rng.randint(1, 4)):
+                qty = rng.choices([1, 2, 3], weights=[80, 15, 5])[0]
+                item_id += 1
+                extra = 0.0
+                for gid, gname, vals in groups:
+                    if not vals:
+                        continue
+                    vid, vname, vextra = vals[0] if rng.random() < 0.6 else rng.choice(vals)
+                    variant_id += 1
+                    extra += vextra
+                    variants.append((variant_id, item_id, gid, gname, vid, vname, vextra))
+                line_total = round((base + extra) * qty, 2)
+                order_total += line_total
+                items.append((item_id, order_id, prod_id, name, qty, base, line_total))
+
+            paid = _ts(created + datetime.timedelta(seconds=rng.randint(20, 240)))
+            printed = _ts(created + datetime.timedelta(seconds=rng.randint(250, 300)))
+            orders.append((
+                order_id, f"K-{day_key}-{seq:04d}", rng.choice(SERVICE_TYPES),
+                rng.choice(PAYMENT_TYPES) if status != "CREATED" else None,
+                status, round(order_total, 2), _ts(created),
+                paid if status in ("PAID", "PRINTED") else None,
+                printed if status == "PRINTED" else None,
+                paid if status == "CANCELLED" else None,
+            ))
+
+        with get_conn() as conn:
+            _insert(conn, """
+              INSERT INTO orders(id, order_no, service_type, payment_type, status, total_amount,
+                                 created_at, paid_at, printed_at, cancelled_at)
+              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, orders)
+            _insert(conn, """
+              INSERT INTO order_items(id, order_id, product_id, name, qty, base_price, line_total)
+              VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, items)
+            _insert(conn, """
+              INSERT INTO order_item_variants(id, order_item_id, group_id, group_name, value_id, value_name, extra_price)
+              VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, variants)
+            conn.execute("""
+              INSERT INTO order_seq(day, last_no) VALUES (?, ?)
+              ON CONFLICT(day) DO UPDATE SET last_no = MAX(last_no, excluded.last_no)
+            """, (day_key, len(stamps)))
+
+        counts["orders"] += len(orders)
+        counts["order_items"] += len(items)
+        counts["order_item_variants"] += len(variants)
+
+    return counts
+
+
+def seed(scale: str = "full", seed_value: int = 1, end_date: datetime.date = None, **overrides) -> dict:
+    """Seed the current DB (backend.db.DB_PATH). Returns row counts and timing."""
+    params = {**SCALES[scale], **{k: v for k, v in overrides.items() if v is not None}}
+    end_date = end_date or datetime.date.today()
+    rng = random.Random(seed_value)
+
+    t0 = time.perf_counter()
+    opened = datetime.datetime.combine(end_date - datetime.timedelta(days=params["days"]), datetime.time(6))
+    sellable = seed_catalog(rng, params["categories"], params["subs_per_category"], params["products"],
+                            params["groups_per_product"], params["values_per_product"], _ts(opened))
+    t1 = time.perf_counter()
+    orders = seed_orders(rng, sellable, params["days"], params["orders_per_day"], end_date)
+    t2 = time.perf_counter()
+    sales_rollup.catch_up(force=True)   # orders were written around OrderRepository
+    t3 = time.perf_counter()
+
+    with get_conn(readonly=True) as conn:
+        rows = {t: int(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0])
+                for t in ("categories", "sub_categories", "products", "variant_groups", "variant_values")}
+    return {
+        "scale": scale,
+        "seed": seed_value,
+        "end_date": end_date.isoformat(),
+        "params": params,
+        "rows": {**rows, **orders},
+        "catalog_sec": round(t1 - t0, 2),
+        "orders_sec": round(t2 - t1, 2),
+        "rollups_sec": round(t3 - t2, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", help="scratch DB file (default: new temp file)")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="full")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--end-date", type=datetime.date.fromisoformat, help="last day of orders (default: today)")
+    for key in SCALES["full"]:
+        ap.add_argument("--" + key.replace("_", "-"), type=int, dest=key)
+    args = ap.parse_args()
+
+    path = use_scratch_db(Path(args.db) if args.db else None)
+    overrides = {k: getattr(args, k) for k in SCALES["full"]}
+    report = seed(args.scale, args.seed, args.end_date, **overrides)
+    print(json.dumps({"db": str(path), **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# backend/bench/startup.py
+"""
+Cold start: AppApi construction in a fresh interpreter, lazy (current) vs
+eager (every controller + ReceiptPrinter built during boot, as before).
+
+    python -m backend.bench.startup [--runs 15]
+
+Each run is a new process so imports are really cold; all runs share one
+scratch DB so init_db hits an existing schema like a real kiosk boot.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+_CHILD = r"""
+import json, sys, time
+from pathlib import Path
+t0 = time.perf_counter()
+import backend.db as db
+db.DB_PATH = Path(sys.argv[1])
+from backend.app_api import AppApi, _Lazy
+api = AppApi()
+if sys.argv[2] == "eager":
+    for name, attr in vars(AppApi).items():
+        if isinstance(attr, _Lazy):
+            getattr(api, name)
+ready_ms = (time.perf_counter() - t0) * 1000.0
+t1 = time.perf_counter()
+api.kiosk_menu_json()
+first_menu_ms = (time.perf_counter() - t1) * 1000.0
+print(json.dumps({"ready_ms": ready_ms, "first_menu_ms": first_menu_ms, "report": api.startup_report()["data"]}))
+"""
+
+
+def _run(mode: str, db_path: Path, root: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(db_path), mode],
+        cwd=root, check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=15)
+    args = ap.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    db_path = Path(tempfile.mkdtemp(prefix="kiosk_bench_")) / "bench.sqlite"
+    _run("lazy", db_path, root)  # create the schema once
+
+    report = {}
+    for mode in ("eager", "lazy"):
+        runs = [_run(mode, db_path, root) for _ in range(args.runs)]
+        phases = {}
+        for r in runs:
+            for p in r["report"]["phases"]:
+                phases.setdefault(p["phase"], []).append(p["ms"])
+        report[mode] = {
+            "ready_ms_median": round(statistics.median(r["ready_ms"] for r in runs), 2),
+            "first_menu_ms_median": round(statistics.median(r["first_menu_ms"] for r in runs), 2),
+            "phases_ms_median": {k: round(statistics.median(v), 2) for k, v in phases.items()},
+        }
+    report["ready_speedup"] = round(report["eager"]["ready_ms_median"] / max(report["lazy"]["ready_ms_median"], 1e-9), 2)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# backend/boot_timing.py
+"""
+Startup timing: how long each boot phase took, and what got built lazily later.
+
+    timer = BootTimer()
+    with timer.phase("init_db"):
+        init_db()
+    timer.report()
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class BootTimer:
+    def __init__(self, started: float = None):
+        """started: time.perf_counter() when boot began (defaults to now)."""
+        self._lock = threading.Lock()
+        self._phases = []   # [(name, ms)] in boot order
+        self._lazy = []     # [(name, ms, ms_after_boot_start)]
+        self._t0 = time.perf_counter() if started is None else started
+        self._ready_ms = None
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000.0)
+
+    def record(self, name: str, ms: float) -> None:
+        with self._lock:
+            self._phases.append((name, round(ms, 3)))
+
+    def ready(self) -> None:
+        """Boot done: AppApi is constructed and can serve calls."""
+        self._ready_ms = round((time.perf_counter() - self._t0) * 1000.0, 3)
+
+    def lazy(self, name: str, ms: float) -> None:
+        at = (time.perf_counter() - self._t0) * 1000.0
+        with self._lock:
+            self._lazy.append((name, round(ms, 3), round(at, 1)))
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = [{"phase": n, "ms": ms} for n, ms in self._phases]
+            lazy = [{"name": n, "ms": ms, "at_ms": at} for n, ms, at in self._lazy]
+        return {
+            "boot_ms": self._ready_ms,
+            "phases": phases,
+            "lazy_loaded": lazy,
+        }
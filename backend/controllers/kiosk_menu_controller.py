@@ -11,3 +11,40 @@ class KioskMenuController:
             return {"status": "ok", "data": data}
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    def load_json(self, etag: str = ""):
+        """
+        Pre-encoded menu JSON (frontend JSON.parse's it).
+        If `etag` still matches, the body is skipped.
+        """
+        try:
+            version, current, payload = self.repo.load_all_active_json()
+            if etag and etag == current:
+                return {"status": "ok", "not_modified": True, "etag": current, "version": version}
+            return {"status": "ok", "etag": current, "version": version, "json": payload}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def etag(self):
+        try:
+            version, current, _ = self.repo.load_all_active_json()
+            return {"status": "ok", "data": {"etag": current, "version": version}}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def load_since(self, version: int):
+        try:
+            data = self.repo.load_since(int(version or 0))
+            return {"status": "ok", "data": data}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def invalidate(self):
+        try:
+            self.repo.invalidate()
+            return {"status": "ok"}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def cache_stats(self):
+        return {"status": "ok", "data": self.repo.cache_stats()}
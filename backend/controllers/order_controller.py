@@ -48,3 +48,10 @@ class OrderController:
             return {"status": "ok", "data": data}
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    def get_full_many(self, order_ids: list):
+        try:
+            data = self.repo.get_full_many([int(x) for x in (order_ids or [])])
+            return {"status": "ok", "data": data}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
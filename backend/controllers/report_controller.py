@@ -0,0 +1,127 @@
+# backend/controllers/report_controller.py
+import datetime
+from backend import sales_rollup
+from backend.repositories.sales_rollup_repository import SalesRollupRepository
+
+GRANULARITIES = ("hour", "day", "week", "month", "product", "channel")
+
+# daily rows -> period bucket
+_PERIOD_SQL = {
+    "week": "date(day, 'weekday 0', '-6 days')",   # Monday of the week
+    "month": "substr(day, 1, 7)",                  # YYYY-MM
+}
+
+
+class ReportController:
+    def __init__(self):
+        self.repo = SalesRollupRepository()
+
+    # -------------------------
+    # Sales
+    # -------------------------
+    def report_sales(self, date_range=None, granularity="day", limit=20):
+        """
+        date_range: preset ("today", "yesterday", "7d", "30d", "90d", "365d",
+                    "month", "year", "all"), {"from": "YYYY-MM-DD", "to": ...}
+                    or [from, to]; local days, inclusive. Default "30d".
+        granularity: hour (hour-of-day profile over the range), day, week,
+                     month, product (top `limit` by revenue), channel
+                     (service_type x payment_type).
+        """
+        try:
+            granularity = str(granularity or "day")
+            if granularity not in GRANULARITIES:
+                return {"status": "error", "message": f"granularity must be one of {', '.join(GRANULARITIES)}"}
+            first, last = self._resolve_range(date_range)
+
+            if granularity == "day":
+                rows = self._fill_days(self.repo.by_day(first, last), first, last)
+            elif granularity == "hour":
+                found = {r["bucket"]: r for r in self.repo.by_hour(first, last)}
+                rows = [found.get(h) or {"bucket": h, "orders": 0, "items": 0, "revenue": 0} for h in range(24)]
+            elif granularity in _PERIOD_SQL:
+                rows = self.repo.by_period(first, last, _PERIOD_SQL[granularity])
+            elif granularity == "product":
+                rows = self.repo.by_product(first, last, max(1, min(int(limit or 20), 500)))
+            else:
+                rows = self.repo.by_channel(first, last)
+
+            for r in rows:
+                r["revenue"] = round(float(r["revenue"] or 0), 2)
+
+            totals = self.repo.totals(first, last)
+            totals["revenue"] = round(float(totals["revenue"]), 2)
+            totals["cancelled_amount"] = round(float(totals["cancelled_amount"]), 2)
+            totals["avg_ticket"] = round(totals["revenue"] / totals["orders"], 2) if totals["orders"] else 0
+
+            return {"status": "ok", "data": {
+                "from": first, "to": last, "granularity": granularity,
+                "rows": rows, "totals": totals,
+                "complete": self.repo.is_built(),   # False while the catch-up job still runs
+            }}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def rebuild(self, from_day=None):
+        """Recompute the rollups from the orders (all history, or from `from_day`)."""
+        try:
+            if from_day:
+                datetime.date.fromisoformat(str(from_day))
+            return {"status": "ok", "data": sales_rollup.catch_up(force=True, from_day=from_day or None)}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def status(self):
+        try:
+            return {"status": "ok", "data": sales_rollup.status()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    # -------------------------
+    # helpers
+    # -------------------------
+    def _resolve_range(self, date_range):
+        today = datetime.date.today()
+        if date_range is None or date_range == "":
+            date_range = "30d"
+
+        if isinstance(date_range, str):
+            preset = date_range.strip().lower()
+            if preset == "today":
+                first = last = today
+            elif preset == "yesterday":
+                first = last = today - datetime.timedelta(days=1)
+            elif preset.endswith("d") and preset[:-1].isdigit() and int(preset[:-1]) > 0:
+                first, last = today - datetime.timedelta(days=int(preset[:-1]) - 1), today
+            elif preset == "month":
+                first, last = today.replace(day=1), today
+            elif preset == "year":
+                first, last = today.replace(month=1, day=1), today
+            elif preset == "all":
+                span = self.repo.order_day_span()
+                return (span[0], max(span[1], today.isoformat())) if span else (today.isoformat(),) * 2
+            else:
+                raise ValueError(f"Unknown range: {date_range}")
+        elif isinstance(date_range, dict):
+            first = datetime.date.fromisoformat(str(date_range.get("from") or today))
+            last = datetime.date.fromisoformat(str(date_range.get("to") or today))
+        elif isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+            first, last = (datetime.date.fromisoformat(str(d)) for d in date_range)
+        else:
+            raise ValueError("range must be a preset, {from, to} or [from, to]")
+
+        if first > last:
+            raise ValueError("range: from is after to")
+        return first.isoformat(), last.isoformat()
+
+    @staticmethod
+    def _fill_days(rows, first: str, last: str):
+        """One row per day of the range (zeros where nothing sold)."""
+        found = {r["bucket"]: r for r in rows}
+        out = []
+        d, end = datetime.date.fromisoformat(first), datetime.date.fromisoformat(last)
+        while d <= end:
+            key = d.isoformat()
+            out.append(found.get(key) or {"bucket": key, "orders": 0, "items": 0, "revenue": 0, "cancelled": 0})
+            d += datetime.timedelta(days=1)
+        return out
@@ -43,3 +43,9 @@ class SessionController:
             return {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    def stats(self):
+        try:
+            return {"status": "ok", "data": self.repo.stats()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
@@ -1,12 +1,17 @@
 # backend/controllers/sub_category_controller.py
-import base64, re, uuid, sqlite3
+import sqlite3
+from backend.db import get_conn
 from backend.repositories.sub_category_repository import SubCategoryRepository
-from backend.paths import UPLOAD_SUBCATEGORIES, app_root, to_file_url
+from backend.repositories.catalog_repository import CatalogRepository
+from backend.paths import to_file_url
+from backend.image_store import get_store as get_image_store
+from backend.upload_service import save_dataurl_image
 
 class SubCategoryController:
     def __init__(self):
         self.repo = SubCategoryRepository()
-        self.upload_dir = UPLOAD_SUBCATEGORIES  # ✅ consistent with category/product
+        self.catalog = CatalogRepository()
+        self.images = get_image_store()   # content-addressed, shared by the catalog controllers
 
     def list_by_category(self, category_id: int, include_inactive=True):
         rows = self.repo.list_by_category(int(category_id), bool(include_inactive))
@@ -28,10 +33,14 @@ class SubCategoryController:
             return {"status": "error", "message": "name is required"}
 
         try:
+            new_path = None
             if payload.get("image_base64"):
-                payload["image_path"] = self._save_dataurl_image(payload["image_base64"])
+                new_path = payload["image_path"] = save_dataurl_image(payload["image_base64"])
 
-            new_id = self.repo.create(payload)
+            with self.images.claim(new_path), get_conn():
+                new_id = self.repo.create(payload)
+                self.catalog.bump("sub_category", new_id, "create")
+            self.images.attach(payload.get("image_path"), "sub_category", new_id)
             return {"status": "ok", "id": new_id}
 
         except sqlite3.IntegrityError:
@@ -46,14 +55,18 @@ class SubCategoryController:
             return {"status": "error", "message": "name is required"}
 
         try:
+            old = new_path = None
             if payload.get("image_base64"):
                 old = self.repo.get_image_path(int(sub_category_id))
-                new_path = self._save_dataurl_image(payload["image_base64"])
-                payload["image_path"] = new_path
-                self._delete_image_if_exists(old)
+                new_path = payload["image_path"] = save_dataurl_image(payload["image_base64"])
 
-            self.repo.update(int(sub_category_id), payload)
-            return {"status": "ok"}
+            with self.images.claim(new_path), get_conn():
+                self.repo.update(int(sub_category_id), payload)
+                self.catalog.bump("sub_category", sub_category_id, "update")
+            if payload.get("image_base64"):
+                self.images.attach(payload["image_path"], "sub_category", int(sub_category_id))
+            warning = self.images.release(old)  # after the row points at the new file
+            return {"status": "ok", "warning": warning} if warning else {"status": "ok"}
 
         except sqlite3.IntegrityError:
             return {"status": "error", "message": "Sub-category name already exists in this category"}
@@ -62,7 +75,9 @@ class SubCategoryController:
 
     def toggle(self, sub_category_id: int, is_active: int):
         try:
-            self.repo.toggle(int(sub_category_id), int(is_active))
+            with get_conn():
+                self.repo.toggle(int(sub_category_id), int(is_active))
+                self.catalog.bump("sub_category", sub_category_id, "toggle")
             return {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -70,49 +85,10 @@ class SubCategoryController:
     def delete(self, sub_category_id: int):
         try:
             old = self.repo.get_image_path(int(sub_category_id))
-            self.repo.delete(int(sub_category_id))
-            self._delete_image_if_exists(old)
-            return {"status": "ok"}
+            with get_conn():
+                self.repo.delete(int(sub_category_id))
+                self.catalog.bump("sub_category", sub_category_id, "delete")
+            warning = self.images.release(old)
+            return {"status": "ok", "warning": warning} if warning else {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
-
-    # -------------------------
-    # image helpers
-    # -------------------------
-    def _save_dataurl_image(self, data_url: str) -> str:
-        m = re.match(r"^data:(image\/[a-zA-Z0-9.+-]+);base64,(.+)$", data_url)
-        if not m:
-            raise ValueError("Invalid image data")
-
-        mime = m.group(1)
-        b64 = m.group(2)
-
-        ext_map = {
-            "image/png": "png",
-            "image/jpeg": "jpg",
-            "image/jpg": "jpg",
-            "image/webp": "webp",
-        }
-        ext = ext_map.get(mime)
-        if not ext:
-            raise ValueError("Unsupported image type (png/jpg/webp only)")
-
-        raw = base64.b64decode(b64)
-        if len(raw) > 2 * 1024 * 1024:
-            raise ValueError("Image too large (max 2MB)")
-
-        filename = f"sub_{uuid.uuid4().hex}.{ext}"
-        (self.upload_dir / filename).write_bytes(raw)
-
-        # ✅ store portable relative path
-        return f"uploads/sub_categories/{filename}"
-
-    def _delete_image_if_exists(self, image_path: str):
-        if not image_path:
-            return
-        file_path = app_root() / image_path
-        if file_path.exists():
-            try:
-                file_path.unlink()
-            except Exception:
-                pass
@@ -1,11 +1,14 @@
 # backend/controllers/variant_group_controller.py
 import sqlite3
+from backend.db import get_conn
 from backend.repositories.variant_group_repository import VariantGroupRepository
 from backend.repositories.variant_value_repository import VariantValueRepository
+from backend.repositories.catalog_repository import CatalogRepository
 
 class VariantGroupController:
     def __init__(self):
         self.repo = VariantGroupRepository()
+        self.catalog = CatalogRepository()
         self.value_repo = VariantValueRepository()
 
     def list_by_product(self, product_id: int, include_inactive=True):
@@ -30,7 +33,9 @@ class VariantGroupController:
             return {"status": "error", "message": "max_select must be >= 1"}
 
         try:
-            new_id = self.repo.create(payload)
+            with get_conn():
+                new_id = self.repo.create(payload)
+                self.catalog.bump("variant_group", new_id, "create")
             return {"status": "ok", "id": new_id}
         except sqlite3.IntegrityError as e:
             return {"status": "error", "message": "Duplicate group name for this product or invalid FK"}
@@ -49,7 +54,9 @@ class VariantGroupController:
             return {"status": "error", "message": "max_select must be >= 1"}
 
         try:
-            self.repo.update(int(group_id), payload)
+            with get_conn():
+                self.repo.update(int(group_id), payload)
+                self.catalog.bump("variant_group", group_id, "update")
             return {"status": "ok"}
         except sqlite3.IntegrityError:
             return {"status": "error", "message": "Duplicate group name for this product or invalid FK"}
@@ -58,7 +65,9 @@ class VariantGroupController:
 
     def toggle(self, group_id: int, is_active: int):
         try:
-            self.repo.toggle(int(group_id), int(is_active))
+            with get_conn():
+                self.repo.toggle(int(group_id), int(is_active))
+                self.catalog.bump("variant_group", group_id, "toggle")
             return {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -70,7 +79,9 @@ class VariantGroupController:
         For now it's fine during development.
         """
         try:
-            self.repo.delete(int(group_id))
+            with get_conn():
+                self.repo.delete(int(group_id))
+                self.catalog.bump("variant_group", group_id, "delete")
             return {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
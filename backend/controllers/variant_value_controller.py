@@ -1,10 +1,13 @@
 # backend/controllers/variant_value_controller.py
 import sqlite3
+from backend.db import get_conn
 from backend.repositories.variant_value_repository import VariantValueRepository
+from backend.repositories.catalog_repository import CatalogRepository
 
 class VariantValueController:
     def __init__(self):
         self.repo = VariantValueRepository()
+        self.catalog = CatalogRepository()
 
     def list_by_group(self, group_id: int, include_inactive=True):
         return {"status": "ok", "data": self.repo.list_by_group(int(group_id), bool(include_inactive))}
@@ -27,7 +30,9 @@ class VariantValueController:
             return {"status": "error", "message": "extra_price must be a number"}
 
         try:
-            new_id = self.repo.create(payload)
+            with get_conn():
+                new_id = self.repo.create(payload)
+                self.catalog.bump("variant_value", new_id, "create")
             return {"status": "ok", "id": new_id}
         except sqlite3.IntegrityError:
             return {"status": "error", "message": "Duplicate value name for this group or invalid FK"}
@@ -46,7 +51,9 @@ class VariantValueController:
             return {"status": "error", "message": "extra_price must be a number"}
 
         try:
-            self.repo.update(int(value_id), payload)
+            with get_conn():
+                self.repo.update(int(value_id), payload)
+                self.catalog.bump("variant_value", value_id, "update")
             return {"status": "ok"}
         except sqlite3.IntegrityError:
             return {"status": "error", "message": "Duplicate value name for this group or invalid FK"}
@@ -55,14 +62,18 @@ class VariantValueController:
 
     def toggle(self, value_id: int, is_active: int):
         try:
-            self.repo.toggle(int(value_id), int(is_active))
+            with get_conn():
+                self.repo.toggle(int(value_id), int(is_active))
+                self.catalog.bump("variant_value", value_id, "toggle")
             return {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
     def delete(self, value_id: int):
         try:
-            self.repo.delete(int(value_id))
+            with get_conn():
+                self.repo.delete(int(value_id))
+                self.catalog.bump("variant_value", value_id, "delete")
             return {"status": "ok"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -1,216 +1,441 @@
 # backend/db.py
+import logging
+import os
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
+from backend import migrations
 from backend.paths import app_root
 
 DB_PATH = app_root() / "identifier.sqlite"
 
-def init_db():
+# -------------------------
+# Connection pool settings
+# -------------------------
+POOL_SIZE = 4            # max reader connections open (and checked out at the same time)
+POOL_IDLE_SEC = 300      # idle reader connection is closed after this many seconds
+
+# -------------------------
+# Performance profiles (PRAGMAs)
+# -------------------------
+# journal_mode is persistent in the DB file (set by init_db when it migrates),
+# everything else is applied to every new connection.
+PROFILES = {
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -2000,          # KiB (negative) => ~2 MB
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,         # ms
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 2000,
+    },
+}
+
+DB_PROFILE = os.environ.get("KIOSK_DB_PROFILE", "balanced").strip().lower()
+if DB_PROFILE not in PROFILES:
+    logging.getLogger(__name__).warning(
+        "unknown KIOSK_DB_PROFILE %r (use %s), using 'balanced'", DB_PROFILE, ", ".join(PROFILES))
+    DB_PROFILE = "balanced"
+
+# -------------------------
+# WAL checkpoint policy
+# -------------------------
+CHECKPOINT_POLL_SEC = 30               # how often the checkpointer looks at the DB
+CHECKPOINT_IDLE_SEC = 60               # no DB traffic for this long => kiosk is idle
+CHECKPOINT_MIN_WAL_BYTES = 1024 * 1024 # skip checkpoint while the WAL is small
+
+
+def active_profile() -> dict:
+    return PROFILES[DB_PROFILE]
+
+
+def set_profile(name: str) -> None:
     """
-    Create DB + tables if not exist.
-    Safe to call every start.
+    Select a performance profile by name.
+    New connections pick it up; call close_pool() to apply it to open ones.
+    """
+    global DB_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"unknown DB profile: {name} (use {', '.join(PROFILES)})")
+    DB_PROFILE = name
+
+
+def _apply_profile(conn) -> None:
+    prof = active_profile()
+    conn.execute(f"PRAGMA synchronous = {prof['synchronous']};")
+    conn.execute(f"PRAGMA mmap_size = {int(prof['mmap_size'])};")
+    conn.execute(f"PRAGMA cache_size = {int(prof['cache_size'])};")
+    conn.execute(f"PRAGMA temp_store = {prof['temp_store']};")
+    conn.execute(f"PRAGMA busy_timeout = {int(prof['busy_timeout'])};")
+
+
+def init_db() -> list:
+    """
+    Create / upgrade the DB schema (backend.migrations).
+    Safe to call every start: when the schema is current this is a single
+    PRAGMA user_version read. Returns the migrations applied now.
     """
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
     try:
-        conn.execute("PRAGMA foreign_keys = ON;")
+        if migrations.user_version(conn) >= migrations.SCHEMA_VERSION:
+            return []
 
-        conn.executescript("""
-        PRAGMA foreign_keys = ON;
-
-        -- =========================
-        -- Categories
-        -- =========================
-        CREATE TABLE IF NOT EXISTS categories (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            name        TEXT NOT NULL UNIQUE,
-            image_path  TEXT,
-            sort_order  INTEGER NOT NULL DEFAULT 0,
-            is_active   INTEGER NOT NULL DEFAULT 1,
-            created_at  TEXT NOT NULL DEFAULT (datetime('now')),
-            updated_at  TEXT
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_categories_active
-        ON categories (is_active);
-
-        -- =========================
-        -- Sub Categories
-        -- =========================
-        CREATE TABLE IF NOT EXISTS sub_categories (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            category_id INTEGER NOT NULL,
-            name        TEXT NOT NULL,
-            image_path  TEXT,
-            sort_order  INTEGER NOT NULL DEFAULT 0,
-            is_active   INTEGER NOT NULL DEFAULT 1,
-            created_at  TEXT NOT NULL DEFAULT (datetime('now')),
-            updated_at  TEXT,
-            FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_sub_categories_active
-        ON sub_categories (is_active);
-
-        CREATE UNIQUE INDEX IF NOT EXISTS uq_sub_categories_cat_name
-        ON sub_categories (category_id, name);
-
-        -- =========================
-        -- Products
-        -- =========================
-        CREATE TABLE IF NOT EXISTS products (
-            id              INTEGER PRIMARY KEY AUTOINCREMENT,
-            sub_category_id INTEGER NOT NULL,
-            sku             TEXT UNIQUE,
-            name            TEXT NOT NULL,
-            base_price      REAL NOT NULL DEFAULT 0,
-            image_path      TEXT,
-            sort_order      INTEGER NOT NULL DEFAULT 0,
-            is_active       INTEGER NOT NULL DEFAULT 1,
-            created_at      TEXT NOT NULL DEFAULT (datetime('now')),
-            updated_at      TEXT,
-            FOREIGN KEY (sub_category_id) REFERENCES sub_categories(id) ON DELETE CASCADE
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_products_active
-        ON products (is_active);
-
-        -- =========================
-        -- Variant Groups
-        -- =========================
-        CREATE TABLE IF NOT EXISTS variant_groups (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id  INTEGER NOT NULL,
-            name        TEXT NOT NULL,
-            is_required INTEGER NOT NULL DEFAULT 0,
-            max_select  INTEGER NOT NULL DEFAULT 1,
-            sort_order  INTEGER DEFAULT 0,
-            is_active   INTEGER DEFAULT 1,
-            created_at  TEXT DEFAULT (datetime('now')),
-            updated_at  TEXT,
-            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_variant_groups_active
-        ON variant_groups (is_active);
-
-        CREATE UNIQUE INDEX IF NOT EXISTS uq_variant_groups_product_name
-        ON variant_groups (product_id, name);
-
-        -- =========================
-        -- Variant Values
-        -- =========================
-        CREATE TABLE IF NOT EXISTS variant_values (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            group_id    INTEGER NOT NULL,
-            name        TEXT NOT NULL,
-            extra_price REAL NOT NULL DEFAULT 0,
-            sort_order  INTEGER DEFAULT 0,
-            is_active   INTEGER DEFAULT 1,
-            created_at  TEXT DEFAULT (datetime('now')),
-            updated_at  TEXT,
-            FOREIGN KEY (group_id) REFERENCES variant_groups(id) ON DELETE CASCADE
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_variant_values_active
-        ON variant_values (is_active);
-
-        CREATE UNIQUE INDEX IF NOT EXISTS uq_variant_values_group_name
-        ON variant_values (group_id, name);
-        
-        -- =========================
-        -- Sessions
-        -- =========================
-        CREATE TABLE IF NOT EXISTS sessions (
-            id           INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_key  TEXT NOT NULL UNIQUE,
-            status       TEXT NOT NULL DEFAULT 'ACTIVE',  -- ACTIVE, EXPIRED, CLOSED
-            started_at   TEXT NOT NULL DEFAULT (datetime('now')),
-            last_seen_at TEXT NOT NULL DEFAULT (datetime('now')),
-            expires_at   TEXT NOT NULL,
-            closed_at    TEXT
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_sessions_status_expires
-        ON sessions (status, expires_at);
-        
-        -- =========================
-        -- Orders (Level 2)
-        -- =========================
-        CREATE TABLE IF NOT EXISTS orders (
-          id           INTEGER PRIMARY KEY AUTOINCREMENT,
-          session_key  TEXT,
-          order_no     TEXT UNIQUE,
-          service_type TEXT NOT NULL,      -- dine_in / take_away
-          payment_type TEXT,               -- counter / qr
-          status       TEXT NOT NULL DEFAULT 'CREATED',  -- CREATED, PAID, PRINTED, CANCELLED
-          total_amount REAL NOT NULL DEFAULT 0,
-          created_at   TEXT DEFAULT (datetime('now')),
-          paid_at      TEXT,
-          printed_at   TEXT,
-          cancelled_at TEXT
-        );
-        
-        CREATE INDEX IF NOT EXISTS idx_orders_status
-        ON orders(status);
-        
-        CREATE INDEX IF NOT EXISTS idx_orders_created
-        ON orders(created_at);
-        
-        -- =========================
-        -- Order Items
-        -- =========================
-        CREATE TABLE IF NOT EXISTS order_items (
-          id          INTEGER PRIMARY KEY AUTOINCREMENT,
-          order_id    INTEGER NOT NULL,
-          product_id  INTEGER,
-          name        TEXT NOT NULL,
-          qty         INTEGER NOT NULL DEFAULT 1,
-          base_price  REAL NOT NULL DEFAULT 0,
-          line_total  REAL NOT NULL DEFAULT 0,
-          image_path  TEXT,
-          image_url   TEXT,
-          FOREIGN KEY(order_id) REFERENCES orders(id) ON DELETE CASCADE
-        );
-        
-        CREATE INDEX IF NOT EXISTS idx_order_items_order
-        ON order_items(order_id);
-        
-        -- =========================
-        -- Order Item Variants
-        -- =========================
-        CREATE TABLE IF NOT EXISTS order_item_variants (
-          id            INTEGER PRIMARY KEY AUTOINCREMENT,
-          order_item_id INTEGER NOT NULL,
-          group_id      INTEGER,
-          group_name    TEXT,
-          value_id      INTEGER,
-          value_name    TEXT,
-          extra_price   REAL NOT NULL DEFAULT 0,
-          FOREIGN KEY(order_item_id) REFERENCES order_items(id) ON DELETE CASCADE
-        );
-        
-        CREATE INDEX IF NOT EXISTS idx_oiv_item
-        ON order_item_variants(order_item_id);
-
-
-        """)
-
-        conn.commit()
+        conn.execute(f"PRAGMA journal_mode = {active_profile()['journal_mode']};")
+        _apply_profile(conn)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return migrations.migrate(conn)
     finally:
         conn.close()
 
+
+# =========================
+# Connection pool
+# =========================
+class _ConnectionPool:
+    """
+    Long-lived connections for get_conn():
+      - one dedicated writer connection (serialized by a lock, re-entrant per thread)
+      - reader connections on a free-list any thread can check out (at most
+        `size` open). pywebview runs each js_api call on a new thread, so
+        readers are not tied to threads: a checked-out reader is pinned to
+        its thread only until the outermost block exits, which is what
+        nested get_conn(readonly=True) and read_snapshot() rely on.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, idle_sec: float = POOL_IDLE_SEC):
+        self.size = int(size)
+        self.idle_sec = float(idle_sec)
+
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+
+        self._idle = []      # [conn, last_used] free-list, most recently used last
+        self._pinned = {}    # thread id -> [conn, depth] while checked out
+        self.last_activity = time.monotonic()
+        self._reader_slots = threading.BoundedSemaphore(self.size)
+
+        self._stats = {
+            "writer_checkouts": 0,
+            "writer_wait_total_ms": 0.0,
+            "writer_wait_max_ms": 0.0,
+            "reader_checkouts": 0,
+            "reader_wait_total_ms": 0.0,
+            "reader_wait_max_ms": 0.0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+        }
+
+    # -------------------------
+    # connection lifecycle
+    # -------------------------
+    def _open(self, readonly: bool):
+        conn = sqlite3.connect(
+            DB_PATH,
+            check_same_thread=False,
+            timeout=active_profile()["busy_timeout"] / 1000.0,
+        )
+        conn.row_factory = sqlite3.Row
+        _apply_profile(conn)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON;")
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats["connections_closed"] += 1
+
+    def _record_wait(self, kind: str, started: float):
+        wait_ms = (time.perf_counter() - started) * 1000.0
+        self.last_activity = time.monotonic()
+        with self._lock:
+            self._stats[f"{kind}_checkouts"] += 1
+            self._stats[f"{kind}_wait_total_ms"] += wait_ms
+            if wait_ms > self._stats[f"{kind}_wait_max_ms"]:
+                self._stats[f"{kind}_wait_max_ms"] = wait_ms
+
+    def _reap_idle_readers(self, now: float):
+        """Close free-list readers idle for longer than idle_sec (the oldest sit first)."""
+        stale = []
+        with self._lock:
+            while self._idle and now - self._idle[0][1] > self.idle_sec:
+                stale.append(self._idle.pop(0)[0])
+        for conn in stale:
+            self._close(conn)
+
+    # -------------------------
+    # checkout
+    # -------------------------
+    @contextmanager
+    def writer(self):
+        started = time.perf_counter()
+        with self._writer_lock:
+            self._record_wait("writer", started)
+            if self._writer is None:
+                self._writer = self._open(readonly=False)
+            conn = self._writer
+
+            # nested get_conn() on the same thread joins the outer transaction
+            self._writer_depth += 1
+            try:
+                yield conn
+                if self._writer_depth == 1:
+                    conn.commit()
+            except Exception:
+                if self._writer_depth == 1:
+                    conn.rollback()
+                raise
+            finally:
+                self._writer_depth -= 1
+
+    @contextmanager
+    def reader(self):
+        tid = threading.get_ident()
+        started = time.perf_counter()
+
+        with self._lock:
+            slot = self._pinned.get(tid)
+        if slot is not None:
+            # nested on this thread: same connection (and read_snapshot's snapshot)
+            slot[1] += 1
+            try:
+                yield slot[0]
+            finally:
+                slot[1] -= 1
+            return
+
+        self._reader_slots.acquire()
+        self._record_wait("reader", started)
+        try:
+            self._reap_idle_readers(time.monotonic())
+            with self._lock:
+                conn = self._idle.pop()[0] if self._idle else None
+            if conn is None:
+                conn = self._open(readonly=True)   # free-list empty: open + in use stay <= size
+
+            slot = [conn, 1]
+            with self._lock:
+                self._pinned[tid] = slot
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    del self._pinned[tid]
+                    self._idle.append([conn, time.monotonic()])
+        finally:
+            self._reader_slots.release()
+
+    # -------------------------
+    # maintenance
+    # -------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["readers_open"] = len(self._idle) + len(self._pinned)
+            out["readers_idle"] = len(self._idle)
+        out["writer_open"] = self._writer is not None
+        out["size"] = self.size
+        out["idle_sec"] = self.idle_sec
+        for kind in ("writer", "reader"):
+            n = out[f"{kind}_checkouts"]
+            out[f"{kind}_wait_avg_ms"] = (out[f"{kind}_wait_total_ms"] / n) if n else 0.0
+        return out
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_activity
+
+    def close_all(self) -> None:
+        with self._writer_lock:
+            if self._writer is not None:
+                self._close(self._writer)
+                self._writer = None
+        with self._lock:
+            readers = [slot[0] for slot in self._idle]
+            self._idle = []
+        for conn in readers:
+            self._close(conn)
+
+
+_pool = _ConnectionPool()
+
+
+def configure_pool(size: int = None, idle_sec: float = None) -> None:
+    """
+    Change pool size / idle lifetime.
+    Existing connections are closed and reopened lazily with the new settings.
+    """
+    global _pool
+    old = _pool
+    _pool = _ConnectionPool(
+        size=old.size if size is None else max(1, int(size)),
+        idle_sec=old.idle_sec if idle_sec is None else float(idle_sec),
+    )
+    old.close_all()
+
+
+def pool_stats() -> dict:
+    return _pool.stats()
+
+
+def close_pool() -> None:
+    _pool.close_all()
+
+
 @contextmanager
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+def get_conn(readonly: bool = False):
+    """
+    Pooled connection:
+      - readonly=False (default): the shared writer connection, commit on success / rollback on error
+      - readonly=True: a reader connection from the free-list (PRAGMA query_only),
+        the same one for nested blocks on this thread
+    """
+    if readonly:
+        with _pool.reader() as conn:
+            yield conn
+    else:
+        with _pool.writer() as conn:
+            yield conn
+
+
+@contextmanager
+def read_snapshot():
+    """
+    Pin this thread's reader connection inside one read transaction:
+    every get_conn(readonly=True) in the block reuses it and sees the same
+    WAL snapshot (taken on entry). Writes still go through the writer and
+    are not visible inside the block.
+    """
+    with _pool.reader() as conn:
+        if conn.in_transaction:
+            yield conn  # already pinned by an outer block
+            return
+
+        conn.execute("BEGIN;")
+        try:
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1;").fetchall()  # start the snapshot now
+            yield conn
+        finally:
+            conn.rollback()
+
+# =========================
+# WAL checkpoint (idle policy) + report
+# =========================
+def wal_size_bytes() -> int:
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
     try:
-        yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+        return wal.stat().st_size
+    except OSError:
+        return 0
+
+
+_checkpoint = {"thread": None, "stop": None, "last": None}
+
+
+def checkpoint(mode: str = "TRUNCATE") -> dict:
+    """Run a WAL checkpoint on the writer connection and return its result."""
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"invalid checkpoint mode: {mode}")
+
+    before = wal_size_bytes()
+    started = time.perf_counter()
+    with get_conn() as conn:
+        row = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+
+    result = {
+        "mode": mode,
+        "busy": int(row[0]),
+        "log_frames": int(row[1]),
+        "checkpointed_frames": int(row[2]),
+        "wal_bytes_before": before,
+        "wal_bytes_after": wal_size_bytes(),
+        "duration_ms": (time.perf_counter() - started) * 1000.0,
+        "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    _checkpoint["last"] = result
+    return result
+
+
+def _checkpoint_loop(stop: threading.Event) -> None:
+    while not stop.wait(CHECKPOINT_POLL_SEC):
+        try:
+            if _pool.idle_for() < CHECKPOINT_IDLE_SEC:
+                continue
+            if wal_size_bytes() < CHECKPOINT_MIN_WAL_BYTES:
+                continue
+            checkpoint("TRUNCATE")
+        except Exception:
+            pass  # never let housekeeping kill the app; next round retries
+
+
+def start_checkpointer() -> None:
+    """Start the idle WAL checkpoint thread (no-op if already running)."""
+    t = _checkpoint["thread"]
+    if t is not None and t.is_alive():
+        return
+    stop = threading.Event()
+    t = threading.Thread(target=_checkpoint_loop, args=(stop,), name="db-checkpoint", daemon=True)
+    _checkpoint["thread"], _checkpoint["stop"] = t, stop
+    t.start()
+
+
+def stop_checkpointer() -> None:
+    if _checkpoint["stop"] is not None:
+        _checkpoint["stop"].set()
+    _checkpoint["thread"] = None
+
+
+def db_report() -> dict:
+    """Active profile, effective PRAGMA values and WAL size."""
+    with get_conn(readonly=True) as conn:
+        effective = {
+            name: conn.execute(f"PRAGMA {name};").fetchone()[0]
+            for name in ("journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout")
+        }
+        schema = migrations.user_version(conn)
+
+    try:
+        db_bytes = DB_PATH.stat().st_size
+    except OSError:
+        db_bytes = 0
+
+    t = _checkpoint["thread"]
+    return {
+        "profile": DB_PROFILE,
+        "configured": dict(active_profile()),
+        "effective": effective,
+        "schema_version": schema,
+        "schema_latest": migrations.SCHEMA_VERSION,
+        "db_bytes": db_bytes,
+        "wal_bytes": wal_size_bytes(),
+        "idle_sec": round(_pool.idle_for(), 1),
+        "checkpointer_running": bool(t is not None and t.is_alive()),
+        "last_checkpoint": _checkpoint["last"],
+    }
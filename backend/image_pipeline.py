@@ -0,0 +1,195 @@
+# backend/image_pipeline.py
+"""
+Downscaled renditions of uploaded catalog images.
+
+The original upload (up to 2 MB, any size in pixels) stays as it is; a
+background worker writes smaller copies the kiosk shows instead:
+
+    tile    max 320 px  menu grid, cart lines
+    detail  max 800 px  product / variant screen
+
+Renditions are WebP (KIOSK_IMAGE_WEBP=0 keeps JPEG / PNG) and are recorded in
+image_renditions; the menu snapshot picks them up by the original image_path.
+When a rendition is ready the row's catalog version is bumped, so running
+kiosks fetch the new URL through delta sync.
+
+Pillow is optional: without it no renditions are made and every view keeps
+using the original file.
+"""
+import os
+import queue
+import threading
+from pathlib import Path
+
+from backend.paths import UPLOAD_BASE, app_root, ensure_dir, forget_file_url
+from backend.repositories.catalog_repository import CatalogRepository
+from backend.repositories.image_rendition_repository import ImageRenditionRepository
+
+RENDITIONS = {"tile": 320, "detail": 800}   # kind -> max edge (px)
+RENDITION_DIR = UPLOAD_BASE / "renditions"
+WEBP = os.environ.get("KIOSK_IMAGE_WEBP", "1").strip().lower() not in ("0", "false", "no", "off")
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+IDLE_EXIT_SEC = 30        # worker thread exits after this long without work
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL.Image  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def render(source: str) -> dict:
+    """
+    Write every rendition of `source` (DB relative path). Returns
+    {kind: (rel_path, width, height, bytes)}. Needs Pillow.
+    """
+    from PIL import Image, ImageOps, features
+
+    src = app_root() / source
+    out_dir = ensure_dir(RENDITION_DIR)
+    webp = WEBP and features.check("webp")
+    done = {}
+
+    with Image.open(src) as im:
+        edge_max = max(RENDITIONS.values())
+        im.draft("RGB", (edge_max, edge_max))   # JPEG: decode at reduced scale
+        im = ImageOps.exif_transpose(im)
+        alpha = im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if alpha else "RGB")
+
+        # largest first, each smaller one is resized from the previous (cheaper)
+        for kind, edge in sorted(RENDITIONS.items(), key=lambda kv: -kv[1]):
+            im.thumbnail((edge, edge), Image.LANCZOS)   # never upscales
+            if webp:
+                ext, fmt, opts = "webp", "WEBP", {"quality": WEBP_QUALITY, "method": 4}
+            elif alpha:
+                ext, fmt, opts = "png", "PNG", {"optimize": True}
+            else:
+                ext, fmt, opts = "jpg", "JPEG", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+
+            dest = out_dir / f"{Path(source).stem}.{kind}.{ext}"
+            tmp = dest.with_name(dest.name + ".tmp")
+            im.save(tmp, fmt, **opts)
+            os.replace(tmp, dest)
+
+            rel = dest.relative_to(app_root()).as_posix()
+            done[kind] = (rel, im.width, im.height, dest.stat().st_size)
+    return done
+
+
+class ImagePipeline:
+    def __init__(self):
+        self.repo = ImageRenditionRepository()
+        self.catalog = CatalogRepository()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._available = None   # Pillow importable (checked in the worker)
+        self._stats = {"queued": 0, "rendered": 0, "failed": 0, "last_error": None}
+
+    # -------------------------
+    # API
+    # -------------------------
+    def submit(self, source: str, entity: str = None, entity_id: int = None) -> None:
+        """Queue renditions for a freshly saved upload (returns at once)."""
+        if not source:
+            return
+        self._queue.put((str(source).lstrip("/"), [(entity, entity_id)] if entity else []))
+        with self._lock:
+            self._stats["queued"] += 1
+        self.start()
+
+    def backfill(self) -> None:
+        """Queue every catalog image that is missing a rendition (uploads from before the pipeline)."""
+        self._queue.put(None)
+        self.start()
+
+    def discard(self, source: str) -> int:
+        """
+        Remove the renditions of an image that is being deleted. Returns the
+        bytes freed; a file that cannot be removed is left for the image GC.
+        """
+        if not source:
+            return 0
+        freed = 0
+        for rel in self.repo.paths_for(source):
+            forget_file_url(rel)
+            f = app_root() / rel
+            try:
+                size = f.stat().st_size if f.exists() else 0
+                f.unlink(missing_ok=True)
+                freed += size
+            except OSError as e:
+                with self._lock:
+                    self._stats["last_error"] = f"{rel}: {e}"
+        self.repo.delete_for(source)
+        return freed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "pending": self._queue.qsize(), "pillow": self._available,
+                    "webp": WEBP, "renditions": dict(RENDITIONS)}
+
+    # -------------------------
+    # worker
+    # -------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="image-pipeline", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        if self._available is None:
+            self._available = pillow_available()
+        while True:
+            try:
+                item = self._queue.get(timeout=IDLE_EXIT_SEC)
+            except queue.Empty:
+                with self._lock:   # idle: exit, the next submit() starts a new worker
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            if not self._available:
+                continue
+            if item is None:
+                # one job per image, however many rows share it
+                rows_by_source = {}
+                for entity, entity_id, source in self.repo.missing(list(RENDITIONS)):
+                    rows_by_source.setdefault(source.lstrip("/"), []).append((entity, entity_id))
+                for job in rows_by_source.items():
+                    self._queue.put(job)
+                continue
+            self._process(*item)
+
+    def _process(self, source: str, rows: list):
+        if len(self.repo.paths_for(source)) == len(RENDITIONS):
+            return   # same content already rendered (content-addressed uploads share renditions)
+        try:
+            for kind, (rel, w, h, size) in render(source).items():
+                self.repo.save(source, kind, rel, w, h, size)
+            with self._lock:
+                self._stats["rendered"] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+                self._stats["last_error"] = f"{source}: {e}"
+            return
+
+        # new URLs reach running kiosks through the catalog delta
+        for entity, entity_id in rows:
+            try:
+                self.catalog.bump(entity, int(entity_id), "update")
+            except Exception:
+                pass
+
+
+_pipeline = ImagePipeline()
+
+
+def get_pipeline() -> ImagePipeline:
+    return _pipeline
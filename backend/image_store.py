@@ -0,0 +1,303 @@
+# backend/image_store.py
+"""
+Content-addressed store for catalog images (categories, sub-categories,
+products).
+
+Every upload (decoded by backend.upload_service) is saved once as
+uploads/images/<sha256>.<ext>: the same picture used by ten products is
+one file, and a name never changes content. image_refs counts the catalog rows pointing at each file; the
+file is deleted when the last one lets go (release). A delete that fails
+(file locked, permissions) keeps its row at refs=0 and is retried by the
+GC instead of being forgotten.
+
+The GC reconciles uploads/ with the image_path columns: it corrects the
+counts, removes files no row uses (also the old uuid-named uploads and
+their renditions) and reports the bytes reclaimed. It runs in the
+background every GC_INTERVAL_SEC and on demand (AppApi.image_gc).
+
+Acquire / release and every GC delete run under the writer connection,
+so a delete cannot remove a file that a concurrent upload of the same
+content has just acquired.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from backend.db import get_conn
+from backend.image_pipeline import RENDITION_DIR, get_pipeline
+from backend.paths import (
+    UPLOAD_CATEGORIES, UPLOAD_IMAGES, UPLOAD_PRODUCTS, UPLOAD_SUBCATEGORIES, app_root, ensure_dir,
+    forget_file_url,
+)
+from backend.repositories.image_ref_repository import ImageRefRepository
+from backend.repositories.image_rendition_repository import ImageRenditionRepository
+
+# folders the GC reconciles (the per-entity ones hold uploads from before the store)
+UPLOAD_DIRS = (UPLOAD_IMAGES, UPLOAD_CATEGORIES, UPLOAD_SUBCATEGORIES, UPLOAD_PRODUCTS)
+GC_GRACE_SEC = 3600             # files / refs younger than this are never collected
+GC_FIRST_SEC = 300              # first background run after start
+GC_INTERVAL_SEC = 6 * 3600
+AUTO_GC = os.environ.get("KIOSK_IMAGE_GC", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _rel(path) -> str:
+    return path.relative_to(app_root()).as_posix()
+
+
+class ImageStore:
+    def __init__(self):
+        self.repo = ImageRefRepository()
+        self.renditions = ImageRenditionRepository()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {"puts": 0, "deduped": 0, "released": 0, "deleted": 0,
+                       "delete_failures": 0, "last_error": None, "last_gc": None}
+
+    # -------------------------
+    # API
+    # -------------------------
+    def put_file(self, tmp, sha256: str, size: int, ext: str) -> str:
+        """
+        Move a fully written temp file (same folder, see upload_service) to
+        its content-hash name and count one reference. The temp file is
+        consumed either way. Returns the DB path (uploads/images/<sha256>.<ext>).
+        """
+        dest = ensure_dir(UPLOAD_IMAGES) / f"{sha256}.{ext}"
+        with get_conn():
+            if dest.exists():
+                os.utime(dest)   # fresh mtime: the GC grace covers the row write that follows
+                tmp.unlink(missing_ok=True)
+                deduped = True
+            else:
+                os.replace(tmp, dest)   # atomic: readers never see a partial image
+                deduped = False
+            self.repo.acquire(_rel(dest), size)
+
+        with self._lock:
+            self._stats["puts"] += 1
+            self._stats["deduped"] += deduped
+        return _rel(dest)
+
+    def attach(self, path: str, entity: str, entity_id: int) -> None:
+        """A catalog row now uses `path`: queue its tile/detail renditions."""
+        get_pipeline().submit(path, entity, int(entity_id))
+
+    def release(self, path: str) -> Optional[str]:
+        """
+        A catalog row stopped using `path`. Deletes the file (and its
+        renditions) with the last reference. Returns a warning for the
+        caller's response when that delete failed (the GC retries it),
+        else None.
+        """
+        if not path:
+            return None
+        path = str(path).lstrip("/")
+        with get_conn():
+            left = self.repo.release(path)
+            with self._lock:
+                self._stats["released"] += 1
+            if left is None or left > 0:
+                return None   # still used (untracked paths are left to the GC)
+            if self._delete(path) is None:
+                return "Old image file could not be removed yet (will be retried)"
+            return None
+
+    @contextmanager
+    def claim(self, path: str):
+        """
+        Wrap the row write that takes over the reference of a fresh upload
+        (put_file). If the write fails, the reference is released again, so
+        a rejected row leaves no counted file behind.
+        """
+        try:
+            yield
+        except BaseException:
+            if path:
+                self.release(path)
+            raise
+
+    def gc(self, dry_run: bool = False, grace_sec: float = GC_GRACE_SEC) -> dict:
+        """
+        Reconcile uploads/ with the catalog. Returns what was (or, with
+        dry_run, would be) removed and the bytes reclaimed.
+
+        The folders are listed and stat'ed without the writer; only the
+        recount and each single delete take it, in short transactions of
+        their own, so kiosk order / session writes are not held up.
+        """
+        t0 = time.perf_counter()
+        cutoff = time.time() - float(grace_sec)
+        root = app_root()
+        report = {"dry_run": bool(dry_run), "scanned": 0, "referenced": 0, "removed": 0,
+                  "renditions_removed": 0, "reclaimed_bytes": 0, "missing": [], "failed": []}
+
+        if dry_run:
+            counts = self.repo.referenced()
+        else:
+            with get_conn() as conn:
+                # count and recount in one write transaction: BEGIN IMMEDIATE takes the
+                # file's write lock first, so no other process (dashboard / kiosk) commits
+                # a catalog change in between
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE;")
+                counts = self.repo.referenced(conn)
+                self.repo.recount(counts, int(cutoff))
+        report["referenced"] = len(counts)
+        report["missing"] = sorted(p for p in counts if not (root / p).exists())
+
+        # 1) originals no row points at
+        sizes = {}
+        for folder in UPLOAD_DIRS:
+            if not folder.is_dir():
+                continue
+            for f in folder.iterdir():
+                try:
+                    if not f.is_file():
+                        continue
+                    st = f.stat()
+                except OSError:
+                    continue   # removed meanwhile (a release)
+                report["scanned"] += 1
+                rel = _rel(f)
+                if rel in counts:
+                    sizes[rel] = st.st_size
+                    continue
+                if st.st_mtime > cutoff:
+                    continue
+                if dry_run:
+                    report["removed"] += 1
+                    report["reclaimed_bytes"] += st.st_size
+                    continue
+                freed = self._collect(rel, cutoff)
+                if freed is None:
+                    report["failed"].append(rel)
+                elif freed is not False:
+                    report["removed"] += 1
+                    report["reclaimed_bytes"] += freed
+        if sizes and not dry_run:
+            with get_conn():
+                for rel, size in sizes.items():
+                    self.repo.set_bytes(rel, size)   # legacy rows start at 0
+
+        # 2) leftovers: refs=0 rows whose file is already gone, renditions of vanished sources
+        if not dry_run:
+            for rel in self.repo.unreferenced():
+                if rel not in counts and not (root / rel).exists():
+                    report["reclaimed_bytes"] += self._collect(rel, cutoff) or 0
+        sources = self.renditions.all_by_source()
+        for source, kinds in sources.items():
+            if source in counts or (root / source).exists():
+                continue
+            if dry_run:
+                report["renditions_removed"] += len(kinds)
+                report["reclaimed_bytes"] += sum(self._size(root / p) for p in kinds.values())
+                continue
+            with get_conn():
+                if (root / source).exists():
+                    continue   # uploaded again meanwhile
+                report["renditions_removed"] += len(kinds)
+                report["reclaimed_bytes"] += get_pipeline().discard(source)
+
+        # 3) rendition files no row knows (failed discard, interrupted render)
+        known = {p for kinds in sources.values() for p in kinds.values()}
+        if RENDITION_DIR.is_dir():
+            for f in RENDITION_DIR.iterdir():
+                try:
+                    if not f.is_file() or _rel(f) in known or f.stat().st_mtime > cutoff:
+                        continue
+                except OSError:
+                    continue
+                size = self._size(f)
+                if not dry_run:
+                    try:
+                        f.unlink()
+                    except OSError:
+                        report["failed"].append(_rel(f))
+                        continue
+                report["renditions_removed"] += 1
+                report["reclaimed_bytes"] += size
+
+        report["ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        with self._lock:
+            self._stats["last_gc"] = {k: (len(v) if isinstance(v, list) else v) for k, v in report.items()}
+            self._stats["last_gc"]["at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return report
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, **self.repo.totals()}
+
+    # -------------------------
+    # background GC
+    # -------------------------
+    def start_gc(self) -> None:
+        """Start the periodic GC thread (no-op if running or KIOSK_IMAGE_GC=0)."""
+        if not AUTO_GC or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._gc_loop, name="image-gc", daemon=True)
+        self._thread.start()
+
+    def stop_gc(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _gc_loop(self):
+        wait = GC_FIRST_SEC
+        while not self._stop.wait(wait):
+            wait = GC_INTERVAL_SEC
+            try:
+                self.gc()
+            except Exception as e:
+                with self._lock:
+                    self._stats["last_error"] = f"gc: {e}"   # next round retries
+
+    # -------------------------
+    # helpers
+    # -------------------------
+    @staticmethod
+    def _size(f) -> int:
+        try:
+            return f.stat().st_size
+        except OSError:
+            return 0
+
+    def _collect(self, rel: str, cutoff: float):
+        """
+        GC delete of a file the scan found unused, re-checked under the
+        writer (an upload may have taken it since). Bytes freed, False when
+        it is in use again, None when the delete failed.
+        """
+        with get_conn():
+            f = app_root() / rel
+            if self.repo.refs(rel) > 0 or (f.exists() and f.stat().st_mtime > cutoff):
+                return False
+            return self._delete(rel)
+
+    def _delete(self, rel: str):
+        """Remove a stored file, its renditions and its row. Bytes freed, None on failure."""
+        f = app_root() / rel
+        size = self._size(f)
+        try:
+            f.unlink(missing_ok=True)
+        except OSError as e:
+            with self._lock:
+                self._stats["delete_failures"] += 1
+                self._stats["last_error"] = f"{rel}: {e}"
+            return None   # row stays (refs=0): the GC retries
+        forget_file_url(rel)
+        freed = size + get_pipeline().discard(rel)
+        self.repo.forget(rel)
+        with self._lock:
+            self._stats["deleted"] += 1
+        return freed
+
+
+_store = ImageStore()
+
+
+def get_store() -> ImageStore:
+    return _store
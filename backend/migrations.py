@@ -0,0 +1,492 @@
+# backend/migrations.py
+"""
+Ordered schema migrations, tracked with PRAGMA user_version.
+
+Each migration runs once, in its own transaction, and then sets
+user_version to its number. When the DB is already at SCHEMA_VERSION,
+init_db() only reads user_version.
+
+To change the schema, append (next number, name, steps) to MIGRATIONS.
+Never edit a migration that has shipped. Steps are SQL scripts or
+callables taking the connection. Migrations 1-6 must also accept DBs
+created before versioning existed (user_version 0 with some of the tables
+already present), so they use IF NOT EXISTS and check columns before
+adding them.
+"""
+import sqlite3
+import time
+
+
+def _statements(script: str):
+    """Split a SQL script into statements (executescript would COMMIT mid-migration)."""
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = buf.strip()
+            if stmt and stmt != ";":
+                yield stmt
+            buf = ""
+    if buf.strip():
+        raise ValueError(f"incomplete SQL statement: {buf.strip()[:60]}")
+
+
+def _columns(conn, table: str) -> set:
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table});")}
+
+
+# =========================
+# 1. baseline schema (catalog, sessions, orders)
+# =========================
+BASELINE = """
+    -- =========================
+    -- Categories
+    -- =========================
+    CREATE TABLE IF NOT EXISTS categories (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        name        TEXT NOT NULL UNIQUE,
+        image_path  TEXT,
+        sort_order  INTEGER NOT NULL DEFAULT 0,
+        is_active   INTEGER NOT NULL DEFAULT 1,
+        created_at  TEXT NOT NULL DEFAULT (datetime('now')),
+        updated_at  TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_categories_active
+    ON categories (is_active);
+
+    -- =========================
+    -- Sub Categories
+    -- =========================
+    CREATE TABLE IF NOT EXISTS sub_categories (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        category_id INTEGER NOT NULL,
+        name        TEXT NOT NULL,
+        image_path  TEXT,
+        sort_order  INTEGER NOT NULL DEFAULT 0,
+        is_active   INTEGER NOT NULL DEFAULT 1,
+        created_at  TEXT NOT NULL DEFAULT (datetime('now')),
+        updated_at  TEXT,
+        FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_sub_categories_active
+    ON sub_categories (is_active);
+
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_sub_categories_cat_name
+    ON sub_categories (category_id, name);
+
+    -- =========================
+    -- Products
+    -- =========================
+    CREATE TABLE IF NOT EXISTS products (
+        id              INTEGER PRIMARY KEY AUTOINCREMENT,
+        sub_category_id INTEGER NOT NULL,
+        sku             TEXT UNIQUE,
+        name            TEXT NOT NULL,
+        base_price      REAL NOT NULL DEFAULT 0,
+        image_path      TEXT,
+        sort_order      INTEGER NOT NULL DEFAULT 0,
+        is_active       INTEGER NOT NULL DEFAULT 1,
+        created_at      TEXT NOT NULL DEFAULT (datetime('now')),
+        updated_at      TEXT,
+        FOREIGN KEY (sub_category_id) REFERENCES sub_categories(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_products_active
+    ON products (is_active);
+
+    -- =========================
+    -- Variant Groups
+    -- =========================
+    CREATE TABLE IF NOT EXISTS variant_groups (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id  INTEGER NOT NULL,
+        name        TEXT NOT NULL,
+        is_required INTEGER NOT NULL DEFAULT 0,
+        max_select  INTEGER NOT NULL DEFAULT 1,
+        sort_order  INTEGER DEFAULT 0,
+        is_active   INTEGER DEFAULT 1,
+        created_at  TEXT DEFAULT (datetime('now')),
+        updated_at  TEXT,
+        FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_variant_groups_active
+    ON variant_groups (is_active);
+
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_variant_groups_product_name
+    ON variant_groups (product_id, name);
+
+    -- =========================
+    -- Variant Values
+    -- =========================
+    CREATE TABLE IF NOT EXISTS variant_values (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        group_id    INTEGER NOT NULL,
+        name        TEXT NOT NULL,
+        extra_price REAL NOT NULL DEFAULT 0,
+        sort_order  INTEGER DEFAULT 0,
+        is_active   INTEGER DEFAULT 1,
+        created_at  TEXT DEFAULT (datetime('now')),
+        updated_at  TEXT,
+        FOREIGN KEY (group_id) REFERENCES variant_groups(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_variant_values_active
+    ON variant_values (is_active);
+
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_variant_values_group_name
+    ON variant_values (group_id, name);
+
+    -- =========================
+    -- Sessions
+    -- =========================
+    CREATE TABLE IF NOT EXISTS sessions (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_key  TEXT NOT NULL UNIQUE,
+        status       TEXT NOT NULL DEFAULT 'ACTIVE',  -- ACTIVE, EXPIRED, CLOSED
+        started_at   TEXT NOT NULL DEFAULT (datetime('now')),
+        last_seen_at TEXT NOT NULL DEFAULT (datetime('now')),
+        expires_at   TEXT NOT NULL,
+        closed_at    TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_sessions_status_expires
+    ON sessions (status, expires_at);
+
+    -- =========================
+    -- Orders (Level 2)
+    -- =========================
+    CREATE TABLE IF NOT EXISTS orders (
+      id           INTEGER PRIMARY KEY AUTOINCREMENT,
+      session_key  TEXT,
+      order_no     TEXT UNIQUE,
+      service_type TEXT NOT NULL,      -- dine_in / take_away
+      payment_type TEXT,               -- counter / qr
+      status       TEXT NOT NULL DEFAULT 'CREATED',  -- CREATED, PAID, PRINTED, CANCELLED
+      total_amount REAL NOT NULL DEFAULT 0,
+      created_at   TEXT DEFAULT (datetime('now')),
+      paid_at      TEXT,
+      printed_at   TEXT,
+      cancelled_at TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_orders_status
+    ON orders(status);
+
+    CREATE INDEX IF NOT EXISTS idx_orders_created
+    ON orders(created_at);
+
+    -- =========================
+    -- Order Items
+    -- =========================
+    CREATE TABLE IF NOT EXISTS order_items (
+      id          INTEGER PRIMARY KEY AUTOINCREMENT,
+      order_id    INTEGER NOT NULL,
+      product_id  INTEGER,
+      name        TEXT NOT NULL,
+      qty         INTEGER NOT NULL DEFAULT 1,
+      base_price  REAL NOT NULL DEFAULT 0,
+      line_total  REAL NOT NULL DEFAULT 0,
+      image_path  TEXT,
+      image_url   TEXT,
+      FOREIGN KEY(order_id) REFERENCES orders(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_order_items_order
+    ON order_items(order_id);
+
+    -- =========================
+    -- Order Item Variants
+    -- =========================
+    CREATE TABLE IF NOT EXISTS order_item_variants (
+      id            INTEGER PRIMARY KEY AUTOINCREMENT,
+      order_item_id INTEGER NOT NULL,
+      group_id      INTEGER,
+      group_name    TEXT,
+      value_id      INTEGER,
+      value_name    TEXT,
+      extra_price   REAL NOT NULL DEFAULT 0,
+      FOREIGN KEY(order_item_id) REFERENCES order_items(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_oiv_item
+    ON order_item_variants(order_item_id);
+"""
+
+
+# =========================
+# 2. catalog version + change log (menu cache / delta sync)
+# =========================
+CATALOG_VERSION = """
+    CREATE TABLE IF NOT EXISTS catalog_meta (
+      id         INTEGER PRIMARY KEY CHECK (id = 1),
+      version    INTEGER NOT NULL DEFAULT 1,
+      updated_at TEXT
+    );
+
+    INSERT OR IGNORE INTO catalog_meta(id, version) VALUES (1, 1);
+
+    -- one row per catalog version (what changed), used for delta sync
+    CREATE TABLE IF NOT EXISTS catalog_changes (
+      version    INTEGER PRIMARY KEY,
+      entity     TEXT NOT NULL,      -- category, sub_category, product, variant_group, variant_value
+      entity_id  INTEGER NOT NULL,
+      op         TEXT NOT NULL,      -- create, update, toggle, delete
+      changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+"""
+
+
+# =========================
+# 3. order number sequence (one row per day)
+# =========================
+ORDER_SEQ = """
+    CREATE TABLE IF NOT EXISTS order_seq (
+      day     TEXT PRIMARY KEY,        -- YYYYMMDD
+      last_no INTEGER NOT NULL
+    );
+"""
+
+
+# =========================
+# 4. sessions.expires_epoch (integer expiry checks)
+# =========================
+def _sessions_expires_epoch(conn) -> None:
+    if "expires_epoch" not in _columns(conn, "sessions"):
+        # unix seconds, used for all expiry checks
+        conn.execute("ALTER TABLE sessions ADD COLUMN expires_epoch INTEGER NOT NULL DEFAULT 0;")
+        conn.execute("UPDATE sessions SET expires_epoch = CAST(strftime('%s', expires_at) AS INTEGER);")
+
+    idx_cols = [r[2] for r in conn.execute("PRAGMA index_info(idx_sessions_status_expires);")]
+    if idx_cols != ["status", "expires_epoch"]:
+        conn.execute("DROP INDEX IF EXISTS idx_sessions_status_expires;")
+        conn.execute("CREATE INDEX idx_sessions_status_expires ON sessions (status, expires_epoch);")
+
+
+# =========================
+# 5. print jobs (receipt queue, survives restarts)
+# =========================
+PRINT_JOBS = """
+    CREATE TABLE IF NOT EXISTS print_jobs (
+      id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+      order_id           INTEGER,
+      payload            TEXT NOT NULL,                   -- receipt payload (JSON)
+      status             TEXT NOT NULL DEFAULT 'QUEUED',  -- QUEUED, PRINTING, DONE, FAILED
+      attempts           INTEGER NOT NULL DEFAULT 0,
+      last_error         TEXT,
+      printer            TEXT,
+      next_attempt_epoch INTEGER NOT NULL DEFAULT 0,
+      created_at         TEXT NOT NULL DEFAULT (datetime('now')),
+      updated_at         TEXT,
+      done_at            TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_print_jobs_status_next
+    ON print_jobs(status, next_attempt_epoch);
+"""
+
+
+# =========================
+# 6. print_jobs render/spool timings (last attempt)
+# =========================
+def _print_jobs_timing(conn) -> None:
+    cols = _columns(conn, "print_jobs")
+    for col in ("render_ms", "spool_ms"):
+        if col not in cols:
+            conn.execute(f"ALTER TABLE print_jobs ADD COLUMN {col} REAL;")
+
+
+# =========================
+# 7. composite indexes for the repository queries
+#    (filter + ORDER BY sort_order, id served by one index walk, no temp sort;
+#    checked with python -m backend.bench.query_plans)
+# =========================
+QUERY_INDEXES = """
+    -- dashboard lists: WHERE <parent>=? [AND +is_active=1] ORDER BY sort_order, id
+    CREATE INDEX IF NOT EXISTS idx_sub_categories_cat_sort
+    ON sub_categories (category_id, sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_products_sub_sort
+    ON products (sub_category_id, sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_variant_groups_product_sort
+    ON variant_groups (product_id, sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_variant_values_group_sort
+    ON variant_values (group_id, sort_order, id);
+
+    -- menu snapshot: WHERE is_active=1 ORDER BY sort_order, id
+    -- (categories are few: one ordered index serves both the menu and the full list)
+    CREATE INDEX IF NOT EXISTS idx_categories_sort
+    ON categories (sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_sub_categories_active_sort
+    ON sub_categories (is_active, sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_products_active_sort
+    ON products (is_active, sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_variant_groups_active_sort
+    ON variant_groups (is_active, sort_order, id);
+
+    CREATE INDEX IF NOT EXISTS idx_variant_values_active_sort
+    ON variant_values (is_active, sort_order, id);
+
+    -- 0/1 single-column indexes: superseded by the ones above, only cost writes
+    DROP INDEX IF EXISTS idx_categories_active;
+    DROP INDEX IF EXISTS idx_sub_categories_active;
+    DROP INDEX IF EXISTS idx_products_active;
+    DROP INDEX IF EXISTS idx_variant_groups_active;
+    DROP INDEX IF EXISTS idx_variant_values_active;
+"""
+
+
+# =========================
+# 8. image renditions (downscaled tile / detail copies of uploads)
+# =========================
+IMAGE_RENDITIONS = """
+    CREATE TABLE IF NOT EXISTS image_renditions (
+      source     TEXT NOT NULL,      -- original image_path (uploads/...)
+      kind       TEXT NOT NULL,      -- tile, detail
+      path       TEXT NOT NULL,      -- rendition file (uploads/renditions/...)
+      width      INTEGER NOT NULL,
+      height     INTEGER NOT NULL,
+      bytes      INTEGER NOT NULL,
+      created_at TEXT NOT NULL DEFAULT (datetime('now')),
+      PRIMARY KEY (source, kind)
+    ) WITHOUT ROWID;
+"""
+
+
+# =========================
+# 9. content-addressed image store: one row per stored file
+#    (refs = catalog rows whose image_path points at it; seeded from the
+#    existing uuid-named uploads so they are released like the new ones)
+# =========================
+IMAGE_REFS = """
+    CREATE TABLE IF NOT EXISTS image_refs (
+      path          TEXT PRIMARY KEY,          -- uploads/images/<sha256>.<ext> (or a legacy upload)
+      refs          INTEGER NOT NULL DEFAULT 0,
+      bytes         INTEGER NOT NULL DEFAULT 0,
+      touched_epoch INTEGER NOT NULL DEFAULT 0 -- last acquire (GC leaves recent rows alone)
+    ) WITHOUT ROWID;
+
+    INSERT OR IGNORE INTO image_refs(path, refs)
+    SELECT image_path, COUNT(*)
+    FROM (
+      SELECT image_path FROM categories
+      UNION ALL SELECT image_path FROM sub_categories
+      UNION ALL SELECT image_path FROM products
+    )
+    WHERE image_path IS NOT NULL AND image_path <> ''
+    GROUP BY image_path;
+"""
+
+
+# =========================
+# 10. sales rollups (kept current by OrderRepository status changes;
+#     filled for existing orders by backend.sales_rollup.catch_up)
+#     day = local date of orders.created_at; sold = PAID or PRINTED
+# =========================
+SALES_ROLLUPS = """
+    CREATE TABLE IF NOT EXISTS sales_daily (
+      day              TEXT PRIMARY KEY,   -- YYYY-MM-DD (local)
+      orders           INTEGER NOT NULL DEFAULT 0,
+      items            INTEGER NOT NULL DEFAULT 0,
+      revenue          REAL NOT NULL DEFAULT 0,
+      cancelled        INTEGER NOT NULL DEFAULT 0,   -- orders cancelled (paid or not)
+      cancelled_amount REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sales_hourly (
+      day      TEXT NOT NULL,
+      hour     INTEGER NOT NULL,               -- 0..23 (local)
+      orders   INTEGER NOT NULL DEFAULT 0,
+      items    INTEGER NOT NULL DEFAULT 0,
+      revenue  REAL NOT NULL DEFAULT 0,
+      PRIMARY KEY (day, hour)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sales_product (
+      day        TEXT NOT NULL,
+      product_id INTEGER NOT NULL,             -- 0: line without a product
+      name       TEXT NOT NULL,                -- name on the latest order line
+      qty        INTEGER NOT NULL DEFAULT 0,
+      revenue    REAL NOT NULL DEFAULT 0,
+      PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sales_channel (
+      day          TEXT NOT NULL,
+      service_type TEXT NOT NULL,
+      payment_type TEXT NOT NULL DEFAULT '',   -- '' when none was set
+      orders       INTEGER NOT NULL DEFAULT 0,
+      revenue      REAL NOT NULL DEFAULT 0,
+      PRIMARY KEY (day, service_type, payment_type)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sales_rollup_state (
+      id       INTEGER PRIMARY KEY CHECK (id = 1),
+      built    INTEGER NOT NULL DEFAULT 0,     -- 1 once every existing order is rolled up
+      built_at TEXT
+    );
+
+    INSERT OR IGNORE INTO sales_rollup_state(id, built) VALUES (1, 0);
+"""
+
+
+MIGRATIONS = [
+    (1, "baseline", [BASELINE]),
+    (2, "catalog_version", [CATALOG_VERSION]),
+    (3, "order_seq", [ORDER_SEQ]),
+    (4, "sessions_expires_epoch", [_sessions_expires_epoch]),
+    (5, "print_jobs", [PRINT_JOBS]),
+    (6, "print_jobs_timing", [_print_jobs_timing]),
+    (7, "query_indexes", [QUERY_INDEXES]),
+    (8, "image_renditions", [IMAGE_RENDITIONS]),
+    (9, "image_refs", [IMAGE_REFS]),
+    (10, "sales_rollups", [SALES_ROLLUPS]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def user_version(conn) -> int:
+    return int(conn.execute("PRAGMA user_version;").fetchone()[0])
+
+
+def migrate(conn) -> list:
+    """
+    Apply pending migrations. `conn` must be in autocommit mode
+    (isolation_level=None). Each migration takes the write lock first
+    (BEGIN IMMEDIATE) and re-reads the version, so a kiosk and a dashboard
+    starting together apply each migration only once.
+    Returns [{version, name, ms}] for what was applied.
+    """
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        if user_version(conn) >= version:
+            continue
+
+        t0 = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            if user_version(conn) >= version:  # another process got there first
+                conn.execute("COMMIT;")
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    for stmt in _statements(step):
+                        conn.execute(stmt)
+            conn.execute(f"PRAGMA user_version = {int(version)};")
+            conn.execute("COMMIT;")
+        except Exception:
+            conn.execute("ROLLBACK;")
+            raise
+
+        applied.append({"version": version, "name": name, "ms": round((time.perf_counter() - t0) * 1000.0, 3)})
+    return applied
@@ -1,33 +1,83 @@
 # backend/paths.py
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 APP_NAME = "KioskApp"  # not used in portable mode, but keep for clarity
 
-def app_root() -> Path:
+def _detect_root() -> Path:
     """
     PORTABLE MODE:
     - In EXE: use folder that contains kiosk.exe/dashboard.exe  (dist/)
     - In dev: use project root
     """
     if getattr(sys, "frozen", False):
-        return Path(sys.executable).parent
+        return Path(sys.executable).resolve().parent
     return Path(__file__).resolve().parents[1]
 
+APP_ROOT = _detect_root()   # resolved once: it cannot change while the app runs
+
+def app_root() -> Path:
+    return APP_ROOT
+
+# -------------------------
+# file:// URLs (bounded LRU: path -> URL, no filesystem access per call)
+# -------------------------
+URL_CACHE_SIZE = 8192
+_url_lock = threading.Lock()
+_url_cache = OrderedDict()
+_url_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
 def to_file_url(rel_path: str) -> str:
     """
     Convert DB relative path (uploads/...png) -> file:///C:/.../uploads/...png
+    Joined onto the resolved APP_ROOT, so no resolve() per path.
     """
     if not rel_path:
         return ""
-    return (app_root() / rel_path).resolve().as_uri()
+    key = str(rel_path)
+    with _url_lock:
+        url = _url_cache.get(key)
+        if url is not None:
+            _url_cache.move_to_end(key)
+            _url_stats["hits"] += 1
+            return url
+
+    url = (APP_ROOT / key).as_uri()
+    with _url_lock:
+        _url_stats["misses"] += 1
+        _url_cache[key] = url
+        if len(_url_cache) > URL_CACHE_SIZE:
+            _url_cache.popitem(last=False)
+            _url_stats["evictions"] += 1
+    return url
+
+def forget_file_url(rel_path: str = None) -> None:
+    """Drop one path (its file was deleted) or, with None, every cached URL."""
+    with _url_lock:
+        if rel_path is None:
+            _url_cache.clear()
+        else:
+            _url_cache.pop(str(rel_path), None)
+        _url_stats["invalidations"] += 1
+
+def file_url_stats() -> dict:
+    with _url_lock:
+        return {**_url_stats, "size": len(_url_cache), "max": URL_CACHE_SIZE}
 
 # uploads
 UPLOAD_BASE = app_root() / "uploads"
 UPLOAD_CATEGORIES = UPLOAD_BASE / "categories"
 UPLOAD_PRODUCTS   = UPLOAD_BASE / "products"
 UPLOAD_SUBCATEGORIES = UPLOAD_BASE / "sub_categories"
+UPLOAD_IMAGES = UPLOAD_BASE / "images"   # content-addressed store (sha256 names)
+
+_ensured = set()
 
-UPLOAD_CATEGORIES.mkdir(parents=True, exist_ok=True)
-UPLOAD_PRODUCTS.mkdir(parents=True, exist_ok=True)
-UPLOAD_SUBCATEGORIES.mkdir(parents=True, exist_ok=True)
+def ensure_dir(path: Path) -> Path:
+    """Create an upload folder on first write (not at import time)."""
+    if path not in _ensured:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured.add(path)
+    return path
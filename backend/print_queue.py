@@ -0,0 +1,178 @@
+# backend/print_queue.py
+"""
+Persistent receipt print queue.
+
+print_receipt() only stores the job (print_jobs table) and wakes the worker;
+the worker thread renders + spools it via ReceiptPrinter, retrying with
+backoff while the printer is offline. Jobs survive restarts.
+
+A job's status write (DONE / retry / FAILED) that hits a DB error is
+retried in-process until it lands: a job left PRINTING would not be
+retried before the next start, and a printed job requeued then would
+print twice. Marking the order PRINTED is separate from the job: if it
+fails, the order is kept and retried before each next job. Errors are
+counted in stats().
+"""
+import threading
+import time
+
+from backend.repositories.order_repository import OrderRepository
+from backend.repositories.print_job_repository import PrintJobRepository
+
+MAX_ATTEMPTS = 30          # then FAILED (can be re-queued with print_job_retry)
+RETRY_BASE_SEC = 5         # 5s, 10s, 20s ... capped at RETRY_MAX_SEC
+RETRY_MAX_SEC = 300
+IDLE_POLL_SEC = 30         # safety net if a wake-up is missed
+DB_RETRY_BASE_SEC = 0.5    # status write failed: 0.5s, 1s, 2s ... capped at DB_RETRY_MAX_SEC
+DB_RETRY_MAX_SEC = 30
+
+
+class PrintQueue:
+    def __init__(self, get_printer):
+        self.get_printer = get_printer   # ReceiptPrinter is built on the first job
+        self.repo = PrintJobRepository()
+        self.orders = OrderRepository()
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._lock = threading.Lock()
+        self._unprinted = set()   # order ids whose mark_printed failed (job is DONE)
+        self._stats = {"printed": 0, "retries": 0, "failed": 0, "db_errors": 0, "last_error": None}
+
+    # -------------------------
+    # lifecycle
+    # -------------------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.repo.requeue_interrupted()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="print-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # -------------------------
+    # API
+    # -------------------------
+    def submit(self, payload: dict) -> dict:
+        order_id = payload.get("order_id")
+        try:
+            order_id = int(order_id) if order_id else None
+        except Exception:
+            order_id = None
+
+        job_id = self.repo.enqueue(payload, order_id)
+        self.start()
+        self._wake.set()
+        return {"ok": True, "job_id": job_id, "status": "QUEUED"}
+
+    def status(self, job_id: int) -> dict:
+        job = self.repo.get(int(job_id))
+        if not job:
+            return {"ok": False, "error": "print job not found"}
+        return {"ok": True, "data": job}
+
+    def retry(self, job_id: int) -> dict:
+        if not self.repo.requeue(int(job_id)):
+            return {"ok": False, "error": "only FAILED jobs can be retried"}
+        self.start()
+        self._wake.set()
+        return {"ok": True, "job_id": int(job_id), "status": "QUEUED"}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "orders_unprinted": sorted(self._unprinted),
+                    "running": self._thread is not None and self._thread.is_alive()}
+
+    # -------------------------
+    # worker
+    # -------------------------
+    @staticmethod
+    def _backoff(attempts: int) -> int:
+        return int(min(RETRY_MAX_SEC, RETRY_BASE_SEC * (2 ** max(0, attempts - 1))))
+
+    def _note_error(self, what: str, e: Exception) -> None:
+        with self._lock:
+            self._stats["db_errors"] += 1
+            self._stats["last_error"] = f"{time.strftime('%Y-%m-%d %H:%M:%S')} {what}: {e}"
+
+    def _write_job(self, what: str, fn, *args, **kwargs) -> bool:
+        """Job status write, retried with backoff until it lands. False only when stopping."""
+        delay = DB_RETRY_BASE_SEC
+        while True:
+            try:
+                fn(*args, **kwargs)
+                return True
+            except Exception as e:
+                self._note_error(what, e)
+                if self._stop.wait(delay):
+                    return False   # row stays PRINTING; requeued on next start
+                delay = min(DB_RETRY_MAX_SEC, delay * 2)
+
+    def _mark_printed(self, order_id: int) -> None:
+        try:
+            self.orders.mark_printed(order_id)
+        except Exception as e:
+            self._note_error(f"order {order_id} mark_printed", e)
+            with self._lock:
+                self._unprinted.add(order_id)
+            return
+        with self._lock:
+            self._unprinted.discard(order_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                unprinted = list(self._unprinted)
+            for order_id in unprinted:
+                self._mark_printed(order_id)
+
+            try:
+                job = self.repo.claim_next(int(time.time()))
+            except Exception:
+                job = None
+
+            if job is None:
+                self._wake.clear()
+                try:
+                    due = self.repo.next_due_epoch()
+                except Exception:
+                    due = None
+                wait = IDLE_POLL_SEC if due is None else max(0.0, min(IDLE_POLL_SEC, due - time.time()))
+                self._wake.wait(wait)
+                continue
+
+            self._process(job)
+
+    def _process(self, job: dict):
+        try:
+            res = self.get_printer().print_receipt(job["payload"])
+        except Exception as e:
+            res = {"ok": False, "error": str(e)}
+
+        timing = {"render_ms": res.get("render_ms"), "spool_ms": res.get("spool_ms")}
+        job_id = job["id"]
+        if res.get("ok"):
+            if self._write_job(f"job {job_id} mark_done", self.repo.mark_done,
+                               job_id, res.get("printer") or "", **timing):
+                with self._lock:
+                    self._stats["printed"] += 1
+            if job.get("order_id"):
+                self._mark_printed(int(job["order_id"]))
+            return
+
+        error = str(res.get("error") or "print failed")
+        if job["attempts"] >= MAX_ATTEMPTS:
+            self._write_job(f"job {job_id} mark_failed", self.repo.mark_failed, job_id, error, **timing)
+            with self._lock:
+                self._stats["failed"] += 1
+        else:
+            self._write_job(f"job {job_id} mark_retry", self.repo.mark_retry,
+                            job_id, error, int(time.time()) + self._backoff(job["attempts"]), **timing)
+            with self._lock:
+                self._stats["retries"] += 1
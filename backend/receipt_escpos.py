@@ -0,0 +1,161 @@
+# backend/receipt_escpos.py
+"""
+Raw ESC/POS receipts for 80/58 mm thermal printers.
+
+Renders the shared receipt layout (backend.receipt_layout) straight to printer
+bytes: no PDF, no SumatraPDF. Output goes to a pluggable target:
+
+    "spool[:<printer>]"    Windows spooler, RAW datatype (default printer if empty)
+    "tcp:<host>[:<port>]"  network printer / raw socket (port 9100 by default)
+    "file:<path>"          write the bytes to a file (debug, or a device path)
+"""
+from __future__ import annotations
+
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.receipt_layout import TITLE_SIZE, SUBTITLE_SIZE, build_ops
+
+ESC = b"\x1b"
+GS = b"\x1d"
+
+INIT = ESC + b"@"
+CODEPAGE_PC437 = ESC + b"t\x00"
+ALIGN_LEFT = ESC + b"a\x00"
+ALIGN_CENTER = ESC + b"a\x01"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+DSTRIKE_ON = ESC + b"G\x01"
+DSTRIKE_OFF = ESC + b"G\x00"
+FEED_CUT = GS + b"VB\x03"   # feed 3 lines, partial cut
+
+LINE_DOTS = 30              # ESC J motion units per line height
+ENCODING = "cp437"
+
+
+def default_cols(width_mm: float) -> int:
+    """Font A columns: 48 on 80 mm paper (576 dots), 32 on 58 mm."""
+    return 48 if float(width_mm) >= 72 else 32
+
+
+def _char_size(size: int) -> int:
+    """GS ! n: high nibble = width multiplier - 1, low nibble = height multiplier - 1."""
+    if size >= TITLE_SIZE:
+        return 0x11
+    if size >= SUBTITLE_SIZE:
+        return 0x01
+    return 0x00
+
+
+def _encode(text: str) -> bytes:
+    # single-char ellipsis from fit() keeps the column grid intact
+    return text.replace("…", ".").encode(ENCODING, errors="replace")
+
+
+def render_escpos(payload: Dict[str, Any]) -> bytes:
+    width_mm = float(payload.get("paper_width_mm") or 80.0)
+    cols = int(payload.get("escpos_cols") or default_cols(width_mm))
+    dark_mode = bool(payload.get("dark_mode", False))
+    copies = max(1, int(payload.get("copies") or 1))
+
+    out = bytearray(INIT + CODEPAGE_PC437)
+    if dark_mode:
+        out += DSTRIKE_ON
+
+    bold = None
+    for op in build_ops(payload, cols):
+        if op.kind == "gap":
+            out += ESC + b"J" + bytes([min(255, int(op.advance * LINE_DOTS))])
+            continue
+
+        if op.bold != bold:
+            out += BOLD_ON if op.bold else BOLD_OFF
+            bold = op.bold
+
+        n = _char_size(op.size)
+        if n & 0xF0 and len(op.text) > cols // 2:
+            n &= 0x0F   # too long for double width -> keep it on one line
+
+        out += ALIGN_CENTER if op.kind == "center" else ALIGN_LEFT
+        if n:
+            out += GS + b"!" + bytes([n])
+        out += _encode(op.text) + b"\n"
+        if n:
+            out += GS + b"!\x00"
+
+    out += ALIGN_LEFT + BOLD_OFF
+    if dark_mode:
+        out += DSTRIKE_OFF
+    if payload.get("cut", True):
+        out += FEED_CUT
+
+    return bytes(out) * copies
+
+
+# -------------------------
+# targets
+# -------------------------
+class FileTarget:
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def send(self, data: bytes) -> str:
+        self.path.write_bytes(data)
+        return f"file:{self.path}"
+
+
+class TcpTarget:
+    def __init__(self, host: str, port: int = 9100, timeout: float = 5.0):
+        self.host = host
+        self.port = int(port)
+        self.timeout = float(timeout)
+
+    def send(self, data: bytes) -> str:
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as s:
+            s.sendall(data)
+        return f"tcp:{self.host}:{self.port}"
+
+
+class SpoolerTarget:
+    def __init__(self, printer_name: Optional[str] = None):
+        self.printer_name = printer_name
+
+    def send(self, data: bytes) -> str:
+        import win32print
+
+        name = self.printer_name or win32print.GetDefaultPrinter()
+        if not name:
+            raise RuntimeError("No default printer found. Please set a default printer in Windows.")
+
+        h = win32print.OpenPrinter(name)
+        try:
+            win32print.StartDocPrinter(h, 1, ("Kiosk receipt", None, "RAW"))
+            try:
+                win32print.StartPagePrinter(h)
+                win32print.WritePrinter(h, data)
+                win32print.EndPagePrinter(h)
+            finally:
+                win32print.EndDocPrinter(h)
+        finally:
+            win32print.ClosePrinter(h)
+        return str(name)
+
+
+def make_target(spec: str = "", printer_name: Optional[str] = None):
+    spec = str(spec or "").strip()
+    kind, _, rest = spec.partition(":")
+    kind = kind.lower()
+
+    if kind == "file":
+        if not rest:
+            raise ValueError("file target needs a path: file:<path>")
+        return FileTarget(rest)
+    if kind == "tcp":
+        host, _, port = rest.partition(":")
+        if not host:
+            raise ValueError("tcp target needs a host: tcp:<host>[:<port>]")
+        return TcpTarget(host, int(port or 9100))
+    if kind in ("", "spool"):
+        return SpoolerTarget(rest or printer_name)
+    raise ValueError(f"unknown ESC/POS target: {spec}")
@@ -0,0 +1,304 @@
+# backend/receipt_layout.py
+"""
+Receipt layout shared by the PDF and ESC/POS renderers.
+
+build_ops() turns a receipt payload into a list of ops on a fixed character
+grid (COLS wide, right price column PRICE_W wide). Renderers only decide how
+each op lands on paper, so both outputs always carry the same text.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+try:
+    from zoneinfo import ZoneInfo  # py 3.9+
+except Exception:
+    ZoneInfo = None
+
+
+# font sizes (pt) -> PDF renders them as is, ESC/POS maps them to character sizes
+TITLE_SIZE = 14
+SUBTITLE_SIZE = 12
+META_SIZE = 10
+ITEM_SIZE = 10
+HEAD_SIZE = 10
+TOTAL_SIZE = 11
+SEP_SIZE = 9
+SMALL_SIZE = 9
+
+PRICE_W = 10            # characters
+MIN_COLS = 24
+COURIER_ADVANCE = 0.6   # Courier glyph width = 600/1000 em (all glyphs)
+
+
+class Op(NamedTuple):
+    kind: str        # "left" | "center" | "gap"
+    text: str = ""
+    size: int = 0
+    bold: bool = True
+    advance: float = 1.0   # line feed after the op, in line heights
+
+
+# -------------------------
+# value helpers
+# -------------------------
+def _money(x: Any) -> str:
+    try:
+        return f"{float(x):,.2f}"
+    except Exception:
+        return "0.00"
+
+
+def safe(s: Any) -> str:
+    return str(s or "").replace("\n", " ").strip()
+
+
+def _now_phnom_penh_str() -> str:
+    try:
+        if ZoneInfo:
+            return datetime.now(ZoneInfo("Asia/Phnom_Penh")).strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        pass
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _normalize_datetime_str(s: Any) -> str:
+    s = safe(s)
+    if not s:
+        return ""
+    s = s.replace("T", " ").replace("Z", "")
+    if "." in s:
+        s = s.split(".", 1)[0]
+    if "+" in s:
+        s = s.split("+", 1)[0]
+    return s.strip()
+
+
+def _to_int(x: Any, default: int = 999999) -> int:
+    try:
+        return int(x)
+    except Exception:
+        return default
+
+
+def normalize_payment(raw: Any) -> str:
+    m = safe(raw)
+    if not m:
+        return ""
+    low = m.lower().replace("_", "-").strip()
+
+    if low in ("qrcode", "qr", "qr-pay", "qr-payment", "qr-payment-method"):
+        return "QR-PAY"
+    if low in ("counter", "cash", "counter-pay", "counter-payment"):
+        return "COUNTER-PAY"
+    return m.upper()
+
+
+def ensure_lines(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    lines = payload.get("lines")
+    if isinstance(lines, list) and lines:
+        return lines
+
+    items = payload.get("items")
+    if isinstance(items, list) and items:
+        out: List[Dict[str, Any]] = []
+        for i, it in enumerate(items):
+            base = float(it.get("base_price") or 0)
+            opts = []
+            for v in (it.get("variants") or []):
+                opts.append({
+                    "name": f"{safe(v.get('group_name'))}: {safe(v.get('value_name'))}",
+                    "price": float(v.get("extra_price") or 0),
+                })
+            out.append({
+                "line_no": i + 1,
+                "name": safe(it.get("name", "Item")),
+                "qty": float(it.get("qty") or 1),
+                "unit_price": base,
+                "line_total": float(it.get("line_total") or 0),
+                "options": opts
+            })
+        return out
+
+    return []
+
+
+# -------------------------
+# grid
+# -------------------------
+@lru_cache(maxsize=32)
+def cols_for_width(usable_pt: float, size: int = SEP_SIZE) -> int:
+    """Columns of Courier `size` that fit in `usable_pt` (separators span the full width)."""
+    char_w = COURIER_ADVANCE * size
+    return max(MIN_COLS, int(usable_pt / max(char_w, 0.1)))
+
+
+def fit(s: str, w: int) -> str:
+    s = safe(s)
+    if len(s) <= w:
+        return s.ljust(w)
+    return s[: max(0, w - 1)] + "…"
+
+
+@lru_cache(maxsize=32)
+def _rules(cols: int) -> Tuple[str, str]:
+    return "*" * cols, "-" * cols
+
+
+@lru_cache(maxsize=32)
+def header_ops(shop_name: str, address: str, tel: str, cols: int) -> Tuple[Op, ...]:
+    """Static block (shop name, address, tel, first separator): same for every receipt of a shop/paper."""
+    ops = [Op("center", shop_name, TITLE_SIZE, True, 1.1)]
+    if address:
+        ops.append(Op("center", address, SMALL_SIZE, False, 1.0))
+    if tel:
+        ops.append(Op("center", f"Tel: {tel}", SMALL_SIZE, False, 1.0))
+    ops.append(Op("left", _rules(cols)[0], SEP_SIZE, True, 1.0))
+    return tuple(ops)
+
+
+def build_ops(payload: Dict[str, Any], cols: int) -> List[Op]:
+    # ---------------- data ----------------
+    shop_name = safe(payload.get("shop_name", "Jom-Kopi"))
+    address = safe(payload.get("address", ""))
+    tel = safe(payload.get("tel", ""))
+
+    order_no = safe(payload.get("order_no", ""))
+    service_type = safe(payload.get("service_type", ""))  # dine_in / take_away
+    currency = safe(payload.get("currency_symbol") or "$")
+
+    raw_payment = payload.get("payment_type") or payload.get("payment_method") or ""
+    payment_label = normalize_payment(raw_payment)
+
+    created_at = _normalize_datetime_str(payload.get("created_at", ""))
+    if not created_at:
+        created_at = _now_phnom_penh_str()
+
+    remark = safe(payload.get("remark", ""))
+
+    lines = ensure_lines(payload)
+    lines.sort(key=lambda it: _to_int(it.get("line_no"), 999999))
+
+    total = float(payload.get("total") or payload.get("total_amount") or 0)
+    if total == 0 and lines:
+        total = sum(float(it.get("line_total") or 0) for it in lines)
+
+    subtotal = float(payload.get("subtotal") or 0) or total
+    discount = float(payload.get("discount") or 0)
+    tax = float(payload.get("tax") or 0)
+
+    COLS = max(MIN_COLS, int(cols))
+    DESC_W = max(8, COLS - PRICE_W)
+
+    def money(v: Any) -> str:
+        return f"{currency}{_money(v)}"
+
+    # ---------------- ops ----------------
+    ops: List[Op] = list(header_ops(shop_name, address, tel, COLS))
+
+    def left(text: str, size: int, advance: float = 1.1, bold: bool = True):
+        ops.append(Op("left", text, size, bold, advance))
+
+    def center(text: str, size: int, advance: float = 1.1, bold: bool = True):
+        ops.append(Op("center", text, size, bold, advance))
+
+    def lr(l: str, r: str, size: int, advance: float = 1.1):
+        left(fit(l, DESC_W) + fit(r, PRICE_W).rjust(PRICE_W), size, advance)
+
+    def gap(advance: float):
+        ops.append(Op("gap", advance=advance))
+
+    stars, dash = _rules(COLS)
+
+    # ---------------- HEADER (shop block comes from header_ops) ----------------
+    receipt_title = "CASH RECEIPT" if "COUNTER" in payment_label else "QR RECEIPT"
+    center(receipt_title, SUBTITLE_SIZE, 1.1)
+
+    left(stars, SEP_SIZE, 1.2)
+
+    if order_no:
+        left(f"Order : {order_no}", META_SIZE)
+
+    if service_type:
+        st = service_type.replace("_", " ").title()
+        left(f"Type  : {st}", META_SIZE)
+
+    left(f"Date  : {created_at}", META_SIZE)
+
+    if payment_label:
+        left(f"Pay   : {payment_label}", META_SIZE)
+
+    gap(0.6)
+
+    # ---------------- TABLE ----------------
+    lr("Description", "Price", HEAD_SIZE)
+    left(dash, SEP_SIZE, 1.0)
+
+    # ---------------- ITEMS ----------------
+    for it in lines:
+        name = safe(it.get("name", "Item"))
+        qty = float(it.get("qty") or 1)
+        unit = float(it.get("unit_price") or it.get("price") or 0)
+        line_total = float(it.get("line_total") or (qty * unit))
+
+        if len(name) <= 28:
+            lr(name, "", ITEM_SIZE)
+        else:
+            lr(name[:28], "", ITEM_SIZE)
+            lr(name[28:56], "", ITEM_SIZE)
+
+        lr(f"{qty:g} x {money(unit)}", money(line_total), ITEM_SIZE)
+
+        opts = it.get("options") or []
+        if isinstance(opts, list):
+            for op in opts:
+                if isinstance(op, dict):
+                    op_name = safe(op.get("name", ""))
+                    op_price = float(op.get("price") or 0)
+                    lr(f"  - {op_name}", money(op_price) if op_price > 0 else "", SMALL_SIZE, 1.0)
+                else:
+                    lr(f"  - {safe(op)}", "", SMALL_SIZE, 1.0)
+
+        gap(0.7)
+
+    # ---------------- TOTALS ----------------
+    left(stars, SEP_SIZE, 1.0)
+
+    lr("Subtotal", money(subtotal), ITEM_SIZE)
+    if discount:
+        lr("Discount", f"-{money(discount)}", ITEM_SIZE)
+    if tax:
+        lr("Tax", money(tax), ITEM_SIZE)
+
+    left(dash, SEP_SIZE, 1.0)
+
+    lr("Total", money(total), TOTAL_SIZE)
+
+    left(stars, SEP_SIZE, 1.0)
+
+    center("THANK YOU!", SUBTITLE_SIZE, 1.2)
+    if remark:
+        center(f"Remark: {remark}", SMALL_SIZE, 1.0)
+
+    barcode_text = safe(payload.get("barcode_text", ""))
+    if barcode_text:
+        center(barcode_text, 10, 1.0)
+
+    return ops
+
+
+def estimate_height_mm(lines: List[Dict[str, Any]]) -> float:
+    """Page height for the PDF (roll paper, so generous)."""
+    base_lines = 32
+    dyn = 0
+    for it in lines:
+        name = safe(it.get("name", "Item"))
+        dyn += 2 if len(name) > 28 else 1
+        dyn += 1
+        opts = it.get("options") or []
+        if isinstance(opts, list):
+            dyn += len(opts)
+        dyn += 1
+    return max(190, (base_lines + dyn) * 4.6 + 45)
@@ -0,0 +1,58 @@
+# backend/repositories/catalog_repository.py
+from typing import Dict, List
+from backend.db import get_conn
+
+# how many change-log rows to keep for delta sync (older clients get a full reload)
+CHANGE_LOG_KEEP = 5000
+
+
+class CatalogRepository:
+    """
+    Catalog version counter + change log:
+    every category / sub-category / product / variant mutation bumps the
+    version and records (entity, id, op), so readers can tell "menu unchanged"
+    with one tiny query and fetch only what changed since a version.
+    """
+
+    def current_version(self) -> int:
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("SELECT version FROM catalog_meta WHERE id=1").fetchone()
+        return int(row["version"]) if row else 0
+
+    def oldest_logged_version(self) -> int:
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("SELECT MIN(version) AS v FROM catalog_changes").fetchone()
+        return int(row["v"] or 0) if row else 0
+
+    def bump(self, entity: str, entity_id: int, op: str) -> int:
+        """Record one change. Call it inside the mutation's `with get_conn():` so both commit together."""
+        with get_conn() as conn:
+            conn.execute("""
+              UPDATE catalog_meta
+              SET version=version + 1,
+                  updated_at=datetime('now')
+              WHERE id=1
+            """)
+            version = int(conn.execute("SELECT version FROM catalog_meta WHERE id=1").fetchone()["version"])
+
+            conn.execute("""
+              INSERT INTO catalog_changes(version, entity, entity_id, op)
+              VALUES (?, ?, ?, ?)
+            """, (version, str(entity), int(entity_id), str(op)))
+
+            conn.execute("DELETE FROM catalog_changes WHERE version <= ?", (version - CHANGE_LOG_KEEP,))
+        return version
+
+    def changed_since(self, since_version: int, until_version: int) -> Dict[str, List[int]]:
+        """entity -> distinct ids changed in (since_version, until_version]"""
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("""
+              SELECT DISTINCT entity, entity_id
+              FROM catalog_changes
+              WHERE version > ? AND version <= ?
+            """, (int(since_version), int(until_version))).fetchall()
+
+        out: Dict[str, List[int]] = {}
+        for r in rows:
+            out.setdefault(r["entity"], []).append(int(r["entity_id"]))
+        return out
@@ -11,12 +11,12 @@ class CategoryRepository:
             sql += " WHERE is_active=1"
         sql += " ORDER BY sort_order ASC, id ASC"
 
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             rows = conn.execute(sql).fetchall()
         return [dict(r) for r in rows]
 
     def get_image_path(self, category_id: int):
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             row = conn.execute(
                 "SELECT image_path FROM categories WHERE id=?",
                 (category_id,)
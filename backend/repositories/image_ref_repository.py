@@ -0,0 +1,87 @@
+# backend/repositories/image_ref_repository.py
+import time
+from typing import Dict, List, Optional
+from backend.db import get_conn
+from backend.repositories.image_rendition_repository import IMAGE_TABLES
+
+
+class ImageRefRepository:
+    def acquire(self, path: str, size: int) -> int:
+        """One more catalog row will point at `path`. Returns the new count."""
+        with get_conn() as conn:
+            conn.execute("""
+              INSERT INTO image_refs(path, refs, bytes, touched_epoch) VALUES (?, 1, ?, ?)
+              ON CONFLICT(path) DO UPDATE SET
+                refs = refs + 1, bytes = excluded.bytes, touched_epoch = excluded.touched_epoch
+            """, (path, int(size), int(time.time())))
+            return int(conn.execute("SELECT refs FROM image_refs WHERE path=?", (path,)).fetchone()[0])
+
+    def release(self, path: str) -> Optional[int]:
+        """One row less points at `path`. Returns the remaining count (None: not tracked)."""
+        with get_conn() as conn:
+            conn.execute("UPDATE image_refs SET refs = MAX(refs - 1, 0) WHERE path=?", (path,))
+            row = conn.execute("SELECT refs FROM image_refs WHERE path=?", (path,)).fetchone()
+        return int(row[0]) if row else None
+
+    def refs(self, path: str) -> int:
+        """Current count of `path` (0 when not tracked). Read on the writer, inside the caller's transaction."""
+        with get_conn() as conn:
+            row = conn.execute("SELECT refs FROM image_refs WHERE path=?", (path,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def forget(self, path: str) -> None:
+        with get_conn() as conn:
+            conn.execute("DELETE FROM image_refs WHERE path=?", (path,))
+
+    def referenced(self, conn=None) -> Dict[str, int]:
+        """
+        image_path -> number of catalog rows using it (the source of truth for GC).
+        `conn`: read on the caller's connection / transaction instead of a reader.
+        """
+        union = " UNION ALL ".join(f"SELECT image_path FROM {t}" for t in IMAGE_TABLES.values())
+        sql = f"""
+          SELECT image_path, COUNT(*) AS n
+          FROM ({union})
+          WHERE image_path IS NOT NULL AND image_path <> ''
+          GROUP BY image_path
+        """
+        if conn is not None:
+            rows = conn.execute(sql).fetchall()
+        else:
+            with get_conn(readonly=True) as reader:
+                rows = reader.execute(sql).fetchall()
+        return {r["image_path"]: int(r["n"]) for r in rows}
+
+    def recount(self, counts: Dict[str, int], touched_before: int) -> None:
+        """
+        Set refs from `counts` (see referenced()). Rows acquired at or after
+        `touched_before` may belong to an upload whose catalog row is not
+        written yet: they are only ever raised, never lowered.
+        """
+        with get_conn() as conn:
+            conn.execute("UPDATE image_refs SET refs = 0 WHERE touched_epoch < ?", (int(touched_before),))
+            conn.executemany("""
+              INSERT INTO image_refs(path, refs) VALUES (?, ?)
+              ON CONFLICT(path) DO UPDATE SET refs =
+                CASE WHEN touched_epoch < ? THEN excluded.refs ELSE MAX(refs, excluded.refs) END
+            """, [(p, n, int(touched_before)) for p, n in counts.items()])
+
+    def set_bytes(self, path: str, size: int) -> None:
+        with get_conn() as conn:
+            conn.execute("UPDATE image_refs SET bytes=? WHERE path=?", (int(size), path))
+
+    def unreferenced(self) -> List[str]:
+        """Rows at refs=0: a release whose file delete failed, or a recount leftover."""
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("SELECT path FROM image_refs WHERE refs = 0").fetchall()
+        return [r["path"] for r in rows]
+
+    def totals(self) -> dict:
+        with get_conn(readonly=True) as conn:
+            r = conn.execute("""
+              SELECT COUNT(*) AS files, COALESCE(SUM(refs), 0) AS refs, COALESCE(SUM(bytes), 0) AS bytes,
+                     COALESCE(SUM(refs = 0), 0) AS unreferenced,
+                     COALESCE(SUM(CASE WHEN refs > 1 THEN (refs - 1) * bytes ELSE 0 END), 0) AS shared_bytes
+              FROM image_refs
+            """).fetchone()
+        return {k: int(r[k]) for k in r.keys()}
@@ -0,0 +1,56 @@
+# backend/repositories/image_rendition_repository.py
+from typing import Dict, List
+from backend.db import get_conn
+
+# tables whose image_path gets renditions, entity name -> table
+IMAGE_TABLES = {
+    "category": "categories",
+    "sub_category": "sub_categories",
+    "product": "products",
+}
+
+
+class ImageRenditionRepository:
+    def save(self, source: str, kind: str, path: str, width: int, height: int, size: int) -> None:
+        with get_conn() as conn:
+            conn.execute("""
+              INSERT INTO image_renditions(source, kind, path, width, height, bytes)
+              VALUES (?, ?, ?, ?, ?, ?)
+              ON CONFLICT(source, kind) DO UPDATE SET
+                path=excluded.path, width=excluded.width, height=excluded.height,
+                bytes=excluded.bytes, created_at=datetime('now')
+            """, (source, kind, path, int(width), int(height), int(size)))
+
+    def all_by_source(self) -> Dict[str, Dict[str, str]]:
+        """{source: {kind: path}} for the whole table (the menu snapshot needs all of it)."""
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("SELECT source, kind, path FROM image_renditions").fetchall()
+        out: Dict[str, Dict[str, str]] = {}
+        for r in rows:
+            out.setdefault(r["source"], {})[r["kind"]] = r["path"]
+        return out
+
+    def paths_for(self, source: str) -> List[str]:
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("SELECT path FROM image_renditions WHERE source=?", (source,)).fetchall()
+        return [r["path"] for r in rows]
+
+    def delete_for(self, source: str) -> None:
+        with get_conn() as conn:
+            conn.execute("DELETE FROM image_renditions WHERE source=?", (source,))
+
+    def missing(self, kinds: List[str]) -> List[tuple]:
+        """(entity, id, image_path) of catalog rows whose image lacks one of `kinds`."""
+        marks = ",".join("?" * len(kinds))
+        out = []
+        with get_conn(readonly=True) as conn:
+            for entity, table in IMAGE_TABLES.items():
+                rows = conn.execute(f"""
+                  SELECT t.id, t.image_path
+                  FROM {table} t
+                  WHERE t.image_path IS NOT NULL AND t.image_path <> ''
+                    AND (SELECT COUNT(*) FROM image_renditions r
+                         WHERE r.source = t.image_path AND r.kind IN ({marks})) < ?
+                """, (*kinds, len(kinds))).fetchall()
+                out.extend((entity, int(r["id"]), r["image_path"]) for r in rows)
+        return out
@@ -1,13 +1,47 @@
 # backend/repositories/menu_repository.py
+import hashlib
+import json
+import threading
 from backend.db import get_conn
-from backend.paths import to_file_url
+from backend.paths import file_url_stats, to_file_url
+from backend.repositories.catalog_repository import CatalogRepository
+from backend.repositories.image_rendition_repository import IMAGE_TABLES, ImageRenditionRepository
+from backend.image_pipeline import RENDITIONS
+
+# process-wide menu snapshot, keyed by catalog version
+_cache_lock = threading.Lock()
+_cache = {
+    "version": None, "data": None,
+    "json": None, "etag": None,          # pre-encoded payload of `data`
+    "hits": 0, "misses": 0, "invalidations": 0, "encodes": 0,
+}
+
+
+# entity -> (table, kiosk columns)
+# max ids per `IN (...)` query (stays under SQLite's host-parameter limit)
+_IN_CHUNK = 500
+
+ENTITIES = {
+    "category":      ("categories",     "id, name, image_path, sort_order"),
+    "sub_category":  ("sub_categories", "id, category_id, name, image_path, sort_order"),
+    "product":       ("products",       "id, sub_category_id, sku, name, base_price, image_path, sort_order"),
+    "variant_group": ("variant_groups", "id, product_id, name, is_required, max_select, sort_order"),
+    "variant_value": ("variant_values", "id, group_id, name, extra_price, sort_order"),
+}
+
 
 class MenuRepository:
     """
     Kiosk read-optimized repository:
     Load ALL active menu data in one call.
+
+    The built menu is cached per catalog version; while the version is
+    unchanged load_all_active() returns the cached snapshot (treat it as read-only).
     """
 
+    def __init__(self):
+        self.catalog = CatalogRepository()
+
     @staticmethod
     def _clean_path(p):
         if not p:
@@ -16,103 +50,184 @@ class MenuRepository:
         return str(p).lstrip("/")
 
     @staticmethod
-    def _add_image_fields(d: dict):
+    def _add_image_fields(d: dict, renditions: dict = None):
         """
         Add:
           - image_path (cleaned) stays in DB format
           - image_url (file:///...) for frontend
+          - image_tile_url / image_detail_url: downscaled copies
+            (same as image_url until the image pipeline has made them)
         """
         p = d.get("image_path")
         d["image_path"] = MenuRepository._clean_path(p)
         d["image_url"] = to_file_url(d["image_path"]) if d.get("image_path") else ""
+        made = (renditions or {}).get(d["image_path"]) or {}
+        for kind in RENDITIONS:
+            d[f"image_{kind}_url"] = to_file_url(made[kind]) if kind in made else d["image_url"]
         return d
 
+    # -------------------------
+    # Snapshot cache
+    # -------------------------
     def load_all_active(self) -> dict:
-        with get_conn() as conn:
-            cats = conn.execute("""
-                SELECT id, name, image_path, sort_order
-                FROM categories
-                WHERE is_active = 1
-                ORDER BY sort_order ASC, id ASC
-            """).fetchall()
-
-            subs = conn.execute("""
-                SELECT id, category_id, name, image_path, sort_order
-                FROM sub_categories
-                WHERE is_active = 1
-                ORDER BY sort_order ASC, id ASC
-            """).fetchall()
-
-            prods = conn.execute("""
-                SELECT id, sub_category_id, sku, name, base_price, image_path, sort_order
-                FROM products
-                WHERE is_active = 1
-                ORDER BY sort_order ASC, id ASC
-            """).fetchall()
-
-            groups = conn.execute("""
-                SELECT id, product_id, name, is_required, max_select, sort_order
-                FROM variant_groups
-                WHERE is_active = 1
-                ORDER BY sort_order ASC, id ASC
-            """).fetchall()
-
-            values = conn.execute("""
-                SELECT id, group_id, name, extra_price, sort_order
-                FROM variant_values
-                WHERE is_active = 1
-                ORDER BY sort_order ASC, id ASC
-            """).fetchall()
+        version = self.catalog.current_version()
+
+        with _cache_lock:
+            if _cache["data"] is not None and _cache["version"] == version:
+                _cache["hits"] += 1
+                return _cache["data"]
+            _cache["misses"] += 1
+
+        # version is read BEFORE building: a concurrent bump only makes the
+        # stored snapshot look older than it is, never newer.
+        data = self._build_snapshot()
+        data["version"] = version
+
+        with _cache_lock:
+            _cache["version"] = version
+            _cache["data"] = data
+            _cache["json"] = None
+            _cache["etag"] = None
+        return data
+
+    def load_all_active_json(self):
+        """
+        (version, etag, json_str) for the current snapshot.
+        Encoded once per catalog version; etag is a hash of the menu content
+        (version excluded, so identical menus share an etag).
+        """
+        data = self.load_all_active()
+
+        with _cache_lock:
+            if _cache["data"] is data and _cache["json"] is not None:
+                return data["version"], _cache["etag"], _cache["json"]
+
+        body = {k: v for k, v in data.items() if k != "version"}
+        body_json = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+        etag = hashlib.sha1(body_json.encode("utf-8")).hexdigest()
+        payload = '{"version":%d,' % int(data["version"]) + body_json[1:]
+
+        with _cache_lock:
+            # only store if nobody replaced the snapshot meanwhile
+            if _cache["data"] is data:
+                _cache["json"] = payload
+                _cache["etag"] = etag
+                _cache["encodes"] += 1
+        return data["version"], etag, payload
+
+    def etag(self) -> str:
+        return self.load_all_active_json()[1]
+
+    @staticmethod
+    def invalidate() -> None:
+        with _cache_lock:
+            _cache["version"] = None
+            _cache["data"] = None
+            _cache["json"] = None
+            _cache["etag"] = None
+            _cache["invalidations"] += 1
+
+    @staticmethod
+    def cache_stats() -> dict:
+        with _cache_lock:
+            return {
+                "version": _cache["version"],
+                "cached": _cache["data"] is not None,
+                "encoded": _cache["json"] is not None,
+                "etag": _cache["etag"],
+                "hits": _cache["hits"],
+                "misses": _cache["misses"],
+                "invalidations": _cache["invalidations"],
+                "encodes": _cache["encodes"],
+                "file_urls": file_url_stats(),
+            }
+
+    # -------------------------
+    # Row shapes (shared by full snapshot + delta sync)
+    # -------------------------
+    @classmethod
+    def _norm_category(cls, r, renditions: dict = None) -> dict:
+        d = dict(r)
+        d["id"] = int(d["id"])
+        d["sort_order"] = int(d.get("sort_order") or 0)
+        cls._add_image_fields(d, renditions)   # ✅ add image_url + renditions
+        return d
+
+    @classmethod
+    def _norm_sub_category(cls, r, renditions: dict = None) -> dict:
+        d = dict(r)
+        d["id"] = int(d["id"])
+        d["category_id"] = int(d["category_id"])
+        d["sort_order"] = int(d.get("sort_order") or 0)
+        cls._add_image_fields(d, renditions)   # ✅ add image_url + renditions
+        return d
+
+    @classmethod
+    def _norm_product(cls, r, renditions: dict = None) -> dict:
+        d = dict(r)
+        d["id"] = int(d["id"])
+        d["sub_category_id"] = int(d["sub_category_id"])
+        d["sort_order"] = int(d.get("sort_order") or 0)
+        d["base_price"] = float(d.get("base_price") or 0)
+        cls._add_image_fields(d, renditions)   # ✅ add image_url + renditions
+        return d
+
+    @staticmethod
+    def _norm_variant_group(r) -> dict:
+        d = dict(r)
+        d["id"] = int(d["id"])
+        d["product_id"] = int(d["product_id"])
+        d["sort_order"] = int(d.get("sort_order") or 0)
+        d["is_required"] = int(d.get("is_required") or 0)
+        d["max_select"] = int(d.get("max_select") or 1)
+        return d
+
+    @staticmethod
+    def _norm_variant_value(r) -> dict:
+        d = dict(r)
+        d["id"] = int(d["id"])
+        d["group_id"] = int(d["group_id"])
+        d["sort_order"] = int(d.get("sort_order") or 0)
+        d["extra_price"] = float(d.get("extra_price") or 0)
+        return d
+
+    def _build_snapshot(self) -> dict:
+        with get_conn(readonly=True) as conn:
+            rows = {}
+            for entity, (table, cols) in ENTITIES.items():
+                rows[entity] = conn.execute(f"""
+                    SELECT {cols}
+                    FROM {table}
+                    WHERE is_active = 1
+                    ORDER BY sort_order ASC, id ASC
+                """).fetchall()
+        renditions = ImageRenditionRepository().all_by_source()
 
         # ----- categories -----
-        categories = []
-        for r in cats:
-            d = dict(r)
-            d["id"] = int(d["id"])
-            d["sort_order"] = int(d.get("sort_order") or 0)
-            self._add_image_fields(d)   # ✅ add image_url
-            categories.append(d)
+        categories = [self._norm_category(r, renditions) for r in rows["category"]]
 
         # ----- sub categories (group by category_id) -----
         sub_by_cat = {}
-        for r in subs:
-            d = dict(r)
-            d["id"] = int(d["id"])
-            d["category_id"] = int(d["category_id"])
-            d["sort_order"] = int(d.get("sort_order") or 0)
-            self._add_image_fields(d)   # ✅ add image_url
+        for r in rows["sub_category"]:
+            d = self._norm_sub_category(r, renditions)
             sub_by_cat.setdefault(d["category_id"], []).append(d)
 
         # ----- products (group by sub_category_id) -----
         prod_by_sub = {}
-        for r in prods:
-            d = dict(r)
-            d["id"] = int(d["id"])
-            d["sub_category_id"] = int(d["sub_category_id"])
-            d["sort_order"] = int(d.get("sort_order") or 0)
-            d["base_price"] = float(d.get("base_price") or 0)
-            self._add_image_fields(d)   # ✅ add image_url
+        for r in rows["product"]:
+            d = self._norm_product(r, renditions)
             prod_by_sub.setdefault(d["sub_category_id"], []).append(d)
 
         # ----- variant groups (group by product_id) -----
         group_by_product = {}
-        for r in groups:
-            d = dict(r)
-            d["id"] = int(d["id"])
-            d["product_id"] = int(d["product_id"])
-            d["sort_order"] = int(d.get("sort_order") or 0)
-            d["is_required"] = int(d.get("is_required") or 0)
-            d["max_select"] = int(d.get("max_select") or 1)
+        for r in rows["variant_group"]:
+            d = self._norm_variant_group(r)
             group_by_product.setdefault(d["product_id"], []).append(d)
 
         # ----- variant values (group by group_id) -----
         value_by_group = {}
-        for r in values:
-            d = dict(r)
-            d["id"] = int(d["id"])
-            d["group_id"] = int(d["group_id"])
-            d["sort_order"] = int(d.get("sort_order") or 0)
-            d["extra_price"] = float(d.get("extra_price") or 0)
+        for r in rows["variant_value"]:
+            d = self._norm_variant_value(r)
             value_by_group.setdefault(d["group_id"], []).append(d)
 
         return {
@@ -122,3 +237,59 @@ class MenuRepository:
             "group_by_product": group_by_product,
             "value_by_group": value_by_group
         }
+
+    # -------------------------
+    # Delta sync
+    # -------------------------
+    def load_since(self, since_version: int) -> dict:
+        """
+        Rows added / changed / deactivated after `since_version`.
+
+        Returns {"full": True, "data": <full menu>} when the change log
+        cannot cover the gap (unknown or pruned version).
+        A removed parent (e.g. category) implies its whole subtree is gone.
+        """
+        since_version = int(since_version or 0)
+        current = self.catalog.current_version()
+        oldest = self.catalog.oldest_logged_version()
+
+        if since_version <= 0 or since_version > current or (oldest and since_version < oldest - 1):
+            return {"version": current, "full": True, "data": self.load_all_active()}
+
+        changed = self.catalog.changed_since(since_version, current)
+
+        upserts = {entity: [] for entity in ENTITIES}
+        removes = {entity: [] for entity in ENTITIES}
+        renditions = ImageRenditionRepository().all_by_source() if IMAGE_TABLES.keys() & changed.keys() else {}
+
+        with get_conn(readonly=True) as conn:
+            for entity, ids in changed.items():
+                table, cols = ENTITIES[entity]
+                found = []
+                for i in range(0, len(ids), _IN_CHUNK):
+                    chunk = ids[i:i + _IN_CHUNK]
+                    marks = ",".join(["?"] * len(chunk))
+                    found.extend(conn.execute(f"""
+                        SELECT {cols}, is_active
+                        FROM {table}
+                        WHERE id IN ({marks})
+                        ORDER BY sort_order ASC, id ASC
+                    """, tuple(chunk)).fetchall())
+                if len(ids) > _IN_CHUNK:   # each chunk is sorted, the whole list is not
+                    found.sort(key=lambda r: (r["sort_order"], r["id"]))
+
+                norm = getattr(self, f"_norm_{entity}")
+                seen = set()
+                for r in found:
+                    seen.add(int(r["id"]))
+                    if int(r["is_active"] or 0) == 1:
+                        d = norm(r, renditions) if entity in IMAGE_TABLES else norm(r)
+                        d.pop("is_active", None)
+                        upserts[entity].append(d)
+                    else:
+                        removes[entity].append(int(r["id"]))
+
+                # hard-deleted rows
+                removes[entity].extend(i for i in ids if i not in seen)
+
+        return {"version": current, "full": False, "upserts": upserts, "removes": removes}
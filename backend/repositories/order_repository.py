@@ -1,91 +1,119 @@
 # backend/repositories/order_repository.py
 import datetime
+import sqlite3
 from typing import Dict, List, Tuple
 from backend.db import get_conn
+from backend.repositories.sales_rollup_repository import SalesRollupRepository
+from backend.session_store import get_store
+
+# max ids per `IN (...)` query (stays under SQLite's host-parameter limit)
+_IN_CHUNK = 500
+
+# multi-row INSERT ... RETURNING needs SQLite 3.35+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_ITEM_ROWS_PER_INSERT = 100   # 8 params per row => 800 params per statement
 
 
 class OrderRepository:
     # -----------------------------
     # Order No
     # -----------------------------
+    @staticmethod
+    def _format_order_no(day: str, n: int) -> str:
+        """
+        K-YYYYMMDD-NNNN. Past 9999 a width letter keeps string order == numeric
+        order: 9999 < A10000 < A99999 < B100000 ...
+        """
+        digits = str(int(n)).zfill(4)
+        if len(digits) > 4:
+            digits = chr(ord("A") + len(digits) - 5) + digits
+        return f"K-{day}-{digits}"
+
+    @staticmethod
+    def _parse_order_seq(order_no: str) -> int:
+        last = (order_no or "").split("-")[-1].lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        try:
+            return int(last)
+        except Exception:
+            return 0
+
     def _gen_order_no(self, conn) -> str:
+        """
+        Next number of the day from the order_seq counter row (O(1), PK lookup).
+        Must run inside the order's write transaction so allocation is atomic.
+        """
         day = datetime.datetime.now().strftime("%Y%m%d")
-        prefix = f"K-{day}-"
 
+        cur = conn.execute("UPDATE order_seq SET last_no = last_no + 1 WHERE day=?", (day,))
+        if cur.rowcount:
+            n = int(conn.execute("SELECT last_no FROM order_seq WHERE day=?", (day,)).fetchone()["last_no"])
+            return self._format_order_no(day, n)
+
+        # first order of the day: continue from orders created before the
+        # counter existed (one-time, range scan on the order_no index)
         row = conn.execute("""
           SELECT order_no
           FROM orders
-          WHERE order_no LIKE ?
-          ORDER BY id DESC
-          LIMIT 1
-        """, (prefix + "%",)).fetchone()
+          WHERE id = (
+            SELECT MAX(id) FROM orders
+            WHERE order_no >= ? AND order_no < ?
+          )
+        """, (f"K-{day}-", f"K-{day}.")).fetchone()
+        n = (self._parse_order_seq(row["order_no"]) if row else 0) + 1
 
-        if not row:
-            return prefix + "0001"
-
-        last = (row["order_no"] or "").split("-")[-1]
-        try:
-            n = int(last) + 1
-        except Exception:
-            n = 1
-        return prefix + str(n).zfill(4)
+        conn.execute("INSERT INTO order_seq(day, last_no) VALUES(?, ?)", (day, n))
+        return self._format_order_no(day, n)
 
     # -----------------------------
     # Session check (ACTIVE + not expired)
     # -----------------------------
-    def _require_active_session(self, conn, session_key: str):
-        row = conn.execute("""
-          SELECT status,
-                 CAST((julianday(expires_at) - julianday('now')) * 86400 AS INTEGER) AS left_sec
-          FROM sessions
-          WHERE session_key=?
-        """, (session_key,)).fetchone()
-
-        if not row:
-            raise ValueError("session not found")
-
-        status = row["status"]
-        left_sec = int(row["left_sec"] or 0)
-
-        if status == "ACTIVE" and left_sec <= 0:
-            conn.execute("""
-              UPDATE sessions
-              SET status='EXPIRED', closed_at=datetime('now')
-              WHERE session_key=? AND status='ACTIVE'
-            """, (session_key,))
-            raise ValueError("session expired")
-
-        if status != "ACTIVE":
-            raise ValueError(f"session not ACTIVE: {status}")
+    def _require_active_session(self, session_key: str):
+        # in-memory store knows about touches not flushed to the DB yet
+        get_store().require_active(session_key)
 
     # -----------------------------
-    # DB lookups
+    # DB lookups (set-based: one query per table for the whole cart)
     # -----------------------------
-    def _get_product(self, conn, product_id: int):
-        return conn.execute("""
+    def _select_in(self, conn, sql: str, ids: List[int]) -> list:
+        """Run `sql` (with one `{marks}` placeholder) over ids in chunks."""
+        ids = list(ids)
+        rows = []
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            marks = ",".join(["?"] * len(chunk))
+            rows.extend(conn.execute(sql.format(marks=marks), tuple(chunk)).fetchall())
+        return rows
+
+    def _get_products(self, conn, product_ids: List[int]) -> Dict[int, dict]:
+        rows = self._select_in(conn, """
           SELECT id, name, base_price, image_path, is_active
           FROM products
-          WHERE id=?
-        """, (product_id,)).fetchone()
+          WHERE id IN ({marks})
+        """, product_ids)
+        return {int(r["id"]): r for r in rows}
 
-    def _get_active_groups(self, conn, product_id: int):
-        return conn.execute("""
-          SELECT id, name, is_required, max_select, is_active
+    def _get_groups_by_products(self, conn, product_ids: List[int]) -> Dict[int, List[dict]]:
+        rows = self._select_in(conn, """
+          SELECT id, product_id, name, is_required, max_select, is_active
           FROM variant_groups
-          WHERE product_id=?
-          ORDER BY sort_order ASC, id ASC
-        """, (product_id,)).fetchall()
+          WHERE product_id IN ({marks})
+          ORDER BY product_id ASC, sort_order ASC, id ASC
+        """, product_ids)
+
+        out: Dict[int, List[dict]] = {}
+        for r in rows:
+            out.setdefault(int(r["product_id"]), []).append(r)
+        return out
 
     def _get_values_by_groups(self, conn, group_ids: List[int]) -> Dict[int, List[dict]]:
         if not group_ids:
             return {}
-        marks = ",".join(["?"] * len(group_ids))
-        rows = conn.execute(f"""
+        rows = self._select_in(conn, """
           SELECT id, group_id, name, extra_price, is_active
           FROM variant_values
           WHERE group_id IN ({marks})
-          ORDER BY sort_order ASC, id ASC
-        """, tuple(group_ids)).fetchall()
+          ORDER BY group_id ASC, sort_order ASC, id ASC
+        """, group_ids)
 
         out: Dict[int, List[dict]] = {}
         for r in rows:
@@ -106,6 +134,134 @@ class OrderRepository:
                 lookup[int(v["id"])] = (int(gid), v)
         return lookup
 
+    # -----------------------------
+    # Validation (in memory)
+    # -----------------------------
+    def _validate_line(self, pid: int, vv_ids: List[int], products, groups_by_product, lookup) -> dict:
+        """
+        Check one (product, variant set) against the preloaded catalog.
+        Returns the priced line: product row, unit price and the picked
+        variants in group order.
+        """
+        p = products.get(pid)
+        if not p:
+            raise ValueError(f"product not found: {pid}")
+        if int(p["is_active"] or 0) != 1:
+            raise ValueError(f"product inactive: {pid}")
+
+        base_price = float(p["base_price"] or 0)
+
+        groups = groups_by_product.get(pid, [])
+        active_groups = [g for g in groups if int(g["is_active"] or 0) == 1]
+        active_ids = {int(g["id"]) for g in active_groups}
+
+        selected_by_group: Dict[int, List[int]] = {}
+        for vid in vv_ids:
+            # a value of another product's (or an inactive) group is not valid here
+            if vid not in lookup or lookup[vid][0] not in active_ids:
+                raise ValueError(f"invalid variant_value_id {vid} for product {pid}")
+            gid, v = lookup[vid]
+            if int(v["is_active"] or 0) != 1:
+                raise ValueError(f"variant_value inactive: {vid}")
+            selected_by_group.setdefault(gid, []).append(vid)
+
+        for g in active_groups:
+            gid = int(g["id"])
+            req = int(g["is_required"] or 0)
+            mx = int(g["max_select"] or 1)
+            picked = selected_by_group.get(gid, [])
+
+            if req == 1 and len(picked) == 0:
+                raise ValueError(f"missing required group '{g['name']}' for product {pid}")
+            if mx > 0 and len(picked) > mx:
+                raise ValueError(f"too many selections for group '{g['name']}' (max {mx})")
+
+        extras_total = 0.0
+        variants = []
+        for g in active_groups:
+            gid = int(g["id"])
+            for vid in selected_by_group.get(gid, []):
+                _, v = lookup[vid]
+                extras_total += float(v["extra_price"] or 0)
+                variants.append((gid, g["name"], v))
+
+        return {
+            "product": p,
+            "base_price": base_price,
+            "unit_price": base_price + extras_total,
+            "variants": variants,
+        }
+
+    # -----------------------------
+    # Bulk inserts (constant statements per order)
+    # -----------------------------
+    def _insert_items(self, conn, rows: List[tuple]) -> List[int]:
+        """
+        Insert order_items rows, return their ids in the same order.
+        AUTOINCREMENT ids grow with insertion order inside our write
+        transaction, so sorting the returned ids maps them back to rows.
+        """
+        if _HAS_RETURNING:
+            ids: List[int] = []
+            for i in range(0, len(rows), _ITEM_ROWS_PER_INSERT):
+                chunk = rows[i:i + _ITEM_ROWS_PER_INSERT]
+                values = ",".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(chunk))
+                got = conn.execute(f"""
+                  INSERT INTO order_items(order_id, product_id, name, qty, base_price, line_total, image_path, image_url)
+                  VALUES {values}
+                  RETURNING id
+                """, tuple(x for row in chunk for x in row)).fetchall()
+                ids.extend(sorted(int(r[0]) for r in got))
+            return ids
+
+        conn.executemany("""
+          INSERT INTO order_items(order_id, product_id, name, qty, base_price, line_total, image_path, image_url)
+          VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        got = conn.execute("""
+          SELECT id FROM order_items
+          WHERE order_id=?
+          ORDER BY id ASC
+        """, (rows[0][0],)).fetchall()
+        return [int(r["id"]) for r in got]
+
+    def _insert_lines(self, conn, order_id: int, lines: List[tuple]) -> None:
+        """Write all order_items, then all order_item_variants, for validated lines."""
+        item_rows = []
+        for v, qty in lines:
+            p = v["product"]
+            item_rows.append((
+                int(order_id),
+                int(p["id"]),
+                str(p["name"] or ""),
+                int(qty),
+                float(v["base_price"]),
+                float(v["unit_price"] * qty),
+                p["image_path"],
+                None,
+            ))
+
+        item_ids = self._insert_items(conn, item_rows)
+
+        variant_rows = [
+            (
+                int(order_item_id),
+                gid,
+                group_name,
+                int(val["id"]),
+                val["name"],
+                float(val["extra_price"] or 0),
+            )
+            for order_item_id, (v, _) in zip(item_ids, lines)
+            for gid, group_name, val in v["variants"]
+        ]
+        if variant_rows:
+            conn.executemany("""
+              INSERT INTO order_item_variants(
+                order_item_id, group_id, group_name, value_id, value_name, extra_price
+              ) VALUES(?, ?, ?, ?, ?, ?)
+            """, variant_rows)
+
     # -----------------------------
     # Create from items (SECURE)
     # -----------------------------
@@ -148,106 +304,46 @@ class OrderRepository:
         if not norm_items:
             raise ValueError("items is empty")
 
+        # outside the order transaction, so an EXPIRED transition is kept
+        self._require_active_session(session_key)
+
         with get_conn() as conn:
-            self._require_active_session(conn, session_key)
+            # ---- load the catalog slice for the whole cart (fixed number of queries) ----
+            pids = sorted({it["product_id"] for it in norm_items})
+            products = self._get_products(conn, pids)
+            groups_by_product = self._get_groups_by_products(conn, pids)
+
+            group_ids = [
+                int(g["id"])
+                for groups in groups_by_product.values()
+                for g in groups
+                if int(g["is_active"] or 0) == 1
+            ]
+            lookup = self._make_value_lookup(self._get_values_by_groups(conn, group_ids))
+
+            # ---- validate + price in memory; identical lines are validated once ----
+            validated: Dict[Tuple[int, Tuple[int, ...]], dict] = {}
+            lines = []
+            for it in norm_items:
+                key = (it["product_id"], tuple(it["variant_value_ids"]))
+                if key not in validated:
+                    validated[key] = self._validate_line(
+                        it["product_id"], it["variant_value_ids"], products, groups_by_product, lookup
+                    )
+                lines.append((validated[key], it["qty"]))
+
+            order_total = sum(v["unit_price"] * qty for v, qty in lines)
 
+            # ---- writes start here (write lock is taken by the first INSERT) ----
             order_no = self._gen_order_no(conn)
 
             cur = conn.execute("""
               INSERT INTO orders(session_key, order_no, service_type, status, total_amount)
-              VALUES(?, ?, ?, 'CREATED', 0)
-            """, (session_key, order_no, service_type))
+              VALUES(?, ?, ?, 'CREATED', ?)
+            """, (session_key, order_no, service_type, float(order_total)))
             order_id = int(cur.lastrowid)
 
-            order_total = 0.0
-
-            for it in norm_items:
-                pid = int(it["product_id"])
-                qty = int(it["qty"])
-                vv_ids = it["variant_value_ids"]
-
-                p = self._get_product(conn, pid)
-                if not p:
-                    raise ValueError(f"product not found: {pid}")
-                if int(p["is_active"] or 0) != 1:
-                    raise ValueError(f"product inactive: {pid}")
-
-                base_price = float(p["base_price"] or 0)
-
-                groups = self._get_active_groups(conn, pid)
-                active_groups = [g for g in groups if int(g["is_active"] or 0) == 1]
-                group_ids = [int(g["id"]) for g in active_groups]
-
-                values_by_group = self._get_values_by_groups(conn, group_ids)
-                lookup = self._make_value_lookup(values_by_group)
-
-                selected_by_group: Dict[int, List[int]] = {}
-                for vid in vv_ids:
-                    if vid not in lookup:
-                        raise ValueError(f"invalid variant_value_id {vid} for product {pid}")
-                    gid, v = lookup[vid]
-                    if int(v["is_active"] or 0) != 1:
-                        raise ValueError(f"variant_value inactive: {vid}")
-                    selected_by_group.setdefault(gid, []).append(vid)
-
-                for g in active_groups:
-                    gid = int(g["id"])
-                    req = int(g["is_required"] or 0)
-                    mx = int(g["max_select"] or 1)
-                    picked = selected_by_group.get(gid, [])
-
-                    if req == 1 and len(picked) == 0:
-                        raise ValueError(f"missing required group '{g['name']}' for product {pid}")
-                    if mx > 0 and len(picked) > mx:
-                        raise ValueError(f"too many selections for group '{g['name']}' (max {mx})")
-
-                extras_total = 0.0
-                for vids in selected_by_group.values():
-                    for vid in vids:
-                        _, v = lookup[vid]
-                        extras_total += float(v["extra_price"] or 0)
-
-                line_total = (base_price + extras_total) * qty
-                order_total += line_total
-
-                cur_it = conn.execute("""
-                  INSERT INTO order_items(order_id, product_id, name, qty, base_price, line_total, image_path, image_url)
-                  VALUES(?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    int(order_id),
-                    int(p["id"]),
-                    str(p["name"] or ""),
-                    int(qty),
-                    float(base_price),
-                    float(line_total),
-                    p["image_path"],
-                    None,
-                ))
-                order_item_id = int(cur_it.lastrowid)
-
-                for g in active_groups:
-                    gid = int(g["id"])
-                    vids = selected_by_group.get(gid, [])
-                    for vid in vids:
-                        _, v = lookup[vid]
-                        conn.execute("""
-                          INSERT INTO order_item_variants(
-                            order_item_id, group_id, group_name, value_id, value_name, extra_price
-                          ) VALUES(?, ?, ?, ?, ?, ?)
-                        """, (
-                            int(order_item_id),
-                            gid,
-                            g["name"],
-                            int(v["id"]),
-                            v["name"],
-                            float(v["extra_price"] or 0),
-                        ))
-
-            conn.execute("""
-              UPDATE orders
-              SET total_amount=?
-              WHERE id=?
-            """, (float(order_total), int(order_id)))
+            self._insert_lines(conn, order_id, lines)
 
         return {
             "order_id": int(order_id),
@@ -270,36 +366,67 @@ class OrderRepository:
               WHERE id=? AND status='CREATED'
             """, (payment_type, int(order_id)))
 
+    # sales rollups change in the same transaction as the status:
+    # an order counts as sold from PAID (or PRINTED straight from CREATED)
+    # until it is cancelled
+    @staticmethod
+    def _status(conn, order_id: int):
+        row = conn.execute("SELECT status FROM orders WHERE id=?", (int(order_id),)).fetchone()
+        return row["status"] if row else None
+
     def mark_paid(self, order_id: int):
         with get_conn() as conn:
-            conn.execute("""
+            cur = conn.execute("""
               UPDATE orders
               SET status='PAID', paid_at=datetime('now')
               WHERE id=? AND status='CREATED'
             """, (int(order_id),))
+            if cur.rowcount:
+                SalesRollupRepository().record(order_id, 1)
 
     def mark_printed(self, order_id: int):
         with get_conn() as conn:
-            conn.execute("""
+            before = self._status(conn, order_id)
+            cur = conn.execute("""
               UPDATE orders
               SET status='PRINTED', printed_at=datetime('now')
               WHERE id=? AND status IN ('PAID','CREATED')
             """, (int(order_id),))
+            if cur.rowcount and before == "CREATED":
+                SalesRollupRepository().record(order_id, 1)
 
     def cancel(self, order_id: int):
         with get_conn() as conn:
-            conn.execute("""
+            before = self._status(conn, order_id)
+            cur = conn.execute("""
               UPDATE orders
               SET status='CANCELLED', cancelled_at=datetime('now')
               WHERE id=? AND status IN ('CREATED','PAID')
             """, (int(order_id),))
+            if cur.rowcount:
+                rollups = SalesRollupRepository()
+                if before == "PAID":
+                    rollups.record(order_id, -1)
+                rollups.record_cancel(order_id)
 
     # -----------------------------
     # Get full snapshot (UTC + LOCAL aliases)
     # -----------------------------
     def get_full(self, order_id: int):
-        with get_conn() as conn:
-            o = conn.execute("""
+        orders = self.get_full_many([int(order_id)])
+        return orders[0] if orders else None
+
+    def get_full_many(self, order_ids: List[int]) -> List[dict]:
+        """
+        Full snapshots for many orders in 3 queries (orders, items, variants),
+        returned in the order of `order_ids`; unknown ids are skipped.
+        """
+        ids = list(dict.fromkeys(int(x) for x in order_ids or []))   # dedup, first-seen order
+        if not ids:
+            return []
+
+        with get_conn(readonly=True) as conn:
+            orders = self._select_in(conn, """
               SELECT
                 o.*,
                 datetime(o.created_at, 'localtime')   AS created_at_local,
@@ -307,27 +434,36 @@ class OrderRepository:
                 datetime(o.printed_at, 'localtime')   AS printed_at_local,
                 datetime(o.cancelled_at, 'localtime') AS cancelled_at_local
               FROM orders o
-              WHERE o.id=?
-            """, (int(order_id),)).fetchone()
+              WHERE o.id IN ({marks})
+            """, ids)
+            if not orders:
+                return []
 
-            if not o:
-                return None
+            found = [int(o["id"]) for o in orders]
 
-            items = conn.execute("""
+            items = self._select_in(conn, """
               SELECT * FROM order_items
-              WHERE order_id=?
-              ORDER BY id ASC
-            """, (int(order_id),)).fetchall()
-
-            out_items = []
-            for it in items:
-                vars_ = conn.execute("""
-                  SELECT group_id, group_name, value_id, value_name, extra_price
-                  FROM order_item_variants
-                  WHERE order_item_id=?
-                  ORDER BY id ASC
-                """, (int(it["id"]),)).fetchall()
-
-                out_items.append({**dict(it), "variants": [dict(v) for v in vars_]})
-
-            return {**dict(o), "items": out_items}
+              WHERE order_id IN ({marks})
+              ORDER BY order_id ASC, id ASC
+            """, found)
+
+            variants = self._select_in(conn, """
+              SELECT order_item_id, group_id, group_name, value_id, value_name, extra_price
+              FROM order_item_variants
+              WHERE order_item_id IN ({marks})
+              ORDER BY order_item_id ASC, id ASC
+            """, [int(it["id"]) for it in items])
+
+        vars_by_item: Dict[int, List[dict]] = {}
+        for v in variants:
+            d = dict(v)
+            vars_by_item.setdefault(int(d.pop("order_item_id")), []).append(d)
+
+        items_by_order: Dict[int, List[dict]] = {}
+        for it in items:
+            items_by_order.setdefault(int(it["order_id"]), []).append(
+                {**dict(it), "variants": vars_by_item.get(int(it["id"]), [])}
+            )
+
+        by_id = {int(o["id"]): {**dict(o), "items": items_by_order.get(int(o["id"]), [])} for o in orders}
+        return [by_id[i] for i in ids if i in by_id]
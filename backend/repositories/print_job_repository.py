@@ -0,0 +1,100 @@
+# backend/repositories/print_job_repository.py
+import json
+from backend.db import get_conn
+
+
+class PrintJobRepository:
+    def enqueue(self, payload: dict, order_id: int = None) -> int:
+        with get_conn() as conn:
+            cur = conn.execute("""
+              INSERT INTO print_jobs(order_id, payload, status)
+              VALUES (?, ?, 'QUEUED')
+            """, (order_id, json.dumps(payload, ensure_ascii=False)))
+            return int(cur.lastrowid)
+
+    def get(self, job_id: int):
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("""
+              SELECT id, order_id, status, attempts, last_error, printer,
+                     next_attempt_epoch, render_ms, spool_ms, created_at, updated_at, done_at
+              FROM print_jobs
+              WHERE id=?
+            """, (int(job_id),)).fetchone()
+        return dict(row) if row else None
+
+    def claim_next(self, now_epoch: int):
+        """QUEUED job that is due -> PRINTING (attempts + 1). Returns the job with its payload."""
+        with get_conn() as conn:
+            row = conn.execute("""
+              SELECT id, order_id, payload, attempts
+              FROM print_jobs
+              WHERE status='QUEUED' AND next_attempt_epoch <= ?
+              ORDER BY next_attempt_epoch ASC, id ASC
+              LIMIT 1
+            """, (int(now_epoch),)).fetchone()
+            if not row:
+                return None
+
+            conn.execute("""
+              UPDATE print_jobs
+              SET status='PRINTING', attempts=attempts + 1, updated_at=datetime('now')
+              WHERE id=?
+            """, (int(row["id"]),))
+
+        job = dict(row)
+        job["attempts"] = int(job["attempts"]) + 1
+        job["payload"] = json.loads(job["payload"] or "{}")
+        return job
+
+    def next_due_epoch(self):
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("""
+              SELECT MIN(next_attempt_epoch) AS due
+              FROM print_jobs
+              WHERE status='QUEUED'
+            """).fetchone()
+        return int(row["due"]) if row and row["due"] is not None else None
+
+    def mark_done(self, job_id: int, printer: str, render_ms=None, spool_ms=None) -> None:
+        with get_conn() as conn:
+            conn.execute("""
+              UPDATE print_jobs
+              SET status='DONE', printer=?, last_error=NULL, render_ms=?, spool_ms=?,
+                  updated_at=datetime('now'), done_at=datetime('now')
+              WHERE id=?
+            """, (printer, render_ms, spool_ms, int(job_id)))
+
+    def mark_retry(self, job_id: int, error: str, next_attempt_epoch: int, render_ms=None, spool_ms=None) -> None:
+        with get_conn() as conn:
+            conn.execute("""
+              UPDATE print_jobs
+              SET status='QUEUED', last_error=?, next_attempt_epoch=?, render_ms=?, spool_ms=?,
+                  updated_at=datetime('now')
+              WHERE id=?
+            """, (error, int(next_attempt_epoch), render_ms, spool_ms, int(job_id)))
+
+    def mark_failed(self, job_id: int, error: str, render_ms=None, spool_ms=None) -> None:
+        with get_conn() as conn:
+            conn.execute("""
+              UPDATE print_jobs
+              SET status='FAILED', last_error=?, render_ms=?, spool_ms=?, updated_at=datetime('now')
+              WHERE id=?
+            """, (error, render_ms, spool_ms, int(job_id)))
+
+    def requeue(self, job_id: int) -> int:
+        """FAILED -> QUEUED again (manual retry). Returns rows changed."""
+        with get_conn() as conn:
+            return conn.execute("""
+              UPDATE print_jobs
+              SET status='QUEUED', attempts=0, next_attempt_epoch=0, updated_at=datetime('now')
+              WHERE id=? AND status='FAILED'
+            """, (int(job_id),)).rowcount
+
+    def requeue_interrupted(self) -> int:
+        """Jobs left PRINTING by a crash/exit go back to the queue."""
+        with get_conn() as conn:
+            return conn.execute("""
+              UPDATE print_jobs
+              SET status='QUEUED', next_attempt_epoch=0, updated_at=datetime('now')
+              WHERE status='PRINTING'
+            """).rowcount
@@ -11,15 +11,16 @@ class ProductRepository:
         """
         params = [int(sub_category_id)]
         if not include_inactive:
-            sql += " AND is_active=1"
+            # unary + keeps the planner on the (parent, sort_order, id) index
+            sql += " AND +is_active=1"
         sql += " ORDER BY sort_order ASC, id ASC"
 
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             rows = conn.execute(sql, params).fetchall()
         return [dict(r) for r in rows]
 
     def get(self, product_id: int):
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             row = conn.execute("""
               SELECT id, sub_category_id, sku, name, base_price, image_path,
                      sort_order, is_active, created_at, updated_at
@@ -29,7 +30,7 @@ class ProductRepository:
         return dict(row) if row else None
 
     def get_image_path(self, product_id: int):
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             row = conn.execute(
                 "SELECT image_path FROM products WHERE id=?",
                 (int(product_id),)
@@ -0,0 +1,213 @@
+# backend/repositories/sales_rollup_repository.py
+from typing import List, Optional
+from backend.db import get_conn
+
+# bucket of an order: local date / hour it was placed
+_DAY = "date(o.created_at, 'localtime')"
+_HOUR = "CAST(strftime('%H', o.created_at, 'localtime') AS INTEGER)"
+_ITEMS = "(SELECT COALESCE(SUM(qty), 0) FROM order_items WHERE order_id = o.id)"
+# unary + keeps the planner off idx_orders_status (all orders of a status,
+# every chunk): the created_at range below is the narrow one
+_SOLD = "+o.status IN ('PAID', 'PRINTED')"
+
+# orders placed on local days :from..:to (the UTC range is widened a day each
+# side so idx_orders_created narrows the scan, the local date decides)
+_IN_DAYS = f"""
+  o.created_at >= date(:from, '-1 day') AND o.created_at < date(:to, '+2 day')
+  AND {_DAY} BETWEEN :from AND :to
+"""
+
+
+class SalesRollupRepository:
+    # -------------------------
+    # incremental (inside the order's status-change transaction)
+    # -------------------------
+    def record(self, order_id: int, sign: int) -> None:
+        """Add (sign=1) or take back (sign=-1) one sold order in every rollup."""
+        args = {"id": int(order_id), "s": int(sign)}
+        with get_conn() as conn:
+            conn.execute(f"""
+              INSERT INTO sales_daily(day, orders, items, revenue)
+              SELECT {_DAY}, :s, :s * {_ITEMS}, :s * o.total_amount
+              FROM orders o WHERE o.id = :id
+              ON CONFLICT(day) DO UPDATE SET
+                orders = orders + excluded.orders, items = items + excluded.items,
+                revenue = revenue + excluded.revenue
+            """, args)
+            conn.execute(f"""
+              INSERT INTO sales_hourly(day, hour, orders, items, revenue)
+              SELECT {_DAY}, {_HOUR}, :s, :s * {_ITEMS}, :s * o.total_amount
+              FROM orders o WHERE o.id = :id
+              ON CONFLICT(day, hour) DO UPDATE SET
+                orders = orders + excluded.orders, items = items + excluded.items,
+                revenue = revenue + excluded.revenue
+            """, args)
+            conn.execute(f"""
+              INSERT INTO sales_product(day, product_id, name, qty, revenue)
+              SELECT {_DAY}, COALESCE(i.product_id, 0), MAX(i.name), :s * SUM(i.qty), :s * SUM(i.line_total)
+              FROM orders o JOIN order_items i ON i.order_id = o.id
+              WHERE o.id = :id
+              GROUP BY COALESCE(i.product_id, 0)
+              ON CONFLICT(day, product_id) DO UPDATE SET
+                name = excluded.name, qty = qty + excluded.qty, revenue = revenue + excluded.revenue
+            """, args)
+            conn.execute(f"""
+              INSERT INTO sales_channel(day, service_type, payment_type, orders, revenue)
+              SELECT {_DAY}, o.service_type, COALESCE(o.payment_type, ''), :s, :s * o.total_amount
+              FROM orders o WHERE o.id = :id
+              ON CONFLICT(day, service_type, payment_type) DO UPDATE SET
+                orders = orders + excluded.orders, revenue = revenue + excluded.revenue
+            """, args)
+
+    def record_cancel(self, order_id: int) -> None:
+        with get_conn() as conn:
+            conn.execute(f"""
+              INSERT INTO sales_daily(day, cancelled, cancelled_amount)
+              SELECT {_DAY}, 1, o.total_amount
+              FROM orders o WHERE o.id = ?
+              ON CONFLICT(day) DO UPDATE SET
+                cancelled = cancelled + 1, cancelled_amount = cancelled_amount + excluded.cancelled_amount
+            """, (int(order_id),))
+
+    # -------------------------
+    # catch-up (recompute days from the orders)
+    # -------------------------
+    def rebuild(self, from_day: str, to_day: str) -> None:
+        """Recompute every rollup for local days from_day..to_day (one transaction)."""
+        args = {"from": from_day, "to": to_day}
+        with get_conn() as conn:
+            for table in ("sales_daily", "sales_hourly", "sales_product", "sales_channel"):
+                conn.execute(f"DELETE FROM {table} WHERE day BETWEEN :from AND :to", args)
+
+            conn.execute(f"""
+              INSERT INTO sales_daily(day, orders, items, revenue, cancelled, cancelled_amount)
+              SELECT day, SUM(sold), SUM(sold * items), SUM(sold * total_amount),
+                     SUM(1 - sold), SUM((1 - sold) * total_amount)
+              FROM (
+                SELECT {_DAY} AS day, {_SOLD} AS sold, {_ITEMS} AS items, o.total_amount
+                FROM orders o
+                WHERE {_IN_DAYS} AND +o.status IN ('PAID', 'PRINTED', 'CANCELLED')
+              )
+              GROUP BY day
+            """, args)
+            conn.execute(f"""
+              INSERT INTO sales_hourly(day, hour, orders, items, revenue)
+              SELECT {_DAY}, {_HOUR}, COUNT(*), SUM({_ITEMS}), SUM(o.total_amount)
+              FROM orders o
+              WHERE {_IN_DAYS} AND {_SOLD}
+              GROUP BY 1, 2
+            """, args)
+            # name: bare column next to MAX(o.id) -> the name on the latest order line
+            conn.execute(f"""
+              INSERT INTO sales_product(day, product_id, name, qty, revenue)
+              SELECT day, product_id, name, qty, revenue FROM (
+                SELECT {_DAY} AS day, COALESCE(i.product_id, 0) AS product_id, i.name AS name,
+                       SUM(i.qty) AS qty, SUM(i.line_total) AS revenue, MAX(o.id)
+                FROM orders o JOIN order_items i ON i.order_id = o.id
+                WHERE {_IN_DAYS} AND {_SOLD}
+                GROUP BY 1, 2
+              )
+            """, args)
+            conn.execute(f"""
+              INSERT INTO sales_channel(day, service_type, payment_type, orders, revenue)
+              SELECT {_DAY}, o.service_type, COALESCE(o.payment_type, ''), COUNT(*), SUM(o.total_amount)
+              FROM orders o
+              WHERE {_IN_DAYS} AND {_SOLD}
+              GROUP BY 1, 2, 3
+            """, args)
+
+    def order_day_span(self) -> Optional[tuple]:
+        """(first, last) local day with an order, None without orders."""
+        with get_conn(readonly=True) as conn:
+            # two subqueries: each MIN / MAX is one idx_orders_created lookup
+            row = conn.execute("""
+              SELECT date((SELECT MIN(created_at) FROM orders), 'localtime') AS first,
+                     date((SELECT MAX(created_at) FROM orders), 'localtime') AS last
+            """).fetchone()
+        return (row["first"], row["last"]) if row and row["first"] else None
+
+    def is_built(self) -> bool:
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("SELECT built FROM sales_rollup_state WHERE id = 1").fetchone()
+        return bool(row and row["built"])
+
+    def set_built(self, built: bool) -> None:
+        with get_conn() as conn:
+            conn.execute("""
+              UPDATE sales_rollup_state
+              SET built = ?, built_at = CASE WHEN ? THEN datetime('now') ELSE built_at END
+              WHERE id = 1
+            """, (int(built), int(built)))
+
+    # -------------------------
+    # reports (local days from_day..to_day, inclusive)
+    # -------------------------
+    def totals(self, from_day: str, to_day: str) -> dict:
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("""
+              SELECT COALESCE(SUM(orders), 0) AS orders, COALESCE(SUM(items), 0) AS items,
+                     COALESCE(SUM(revenue), 0) AS revenue, COALESCE(SUM(cancelled), 0) AS cancelled,
+                     COALESCE(SUM(cancelled_amount), 0) AS cancelled_amount
+              FROM sales_daily
+              WHERE day BETWEEN ? AND ?
+            """, (from_day, to_day)).fetchone()
+        return dict(row)
+
+    def by_day(self, from_day: str, to_day: str) -> List[dict]:
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("""
+              SELECT day AS bucket, orders, items, revenue, cancelled
+              FROM sales_daily
+              WHERE day BETWEEN ? AND ?
+              ORDER BY day
+            """, (from_day, to_day)).fetchall()
+        return [dict(r) for r in rows]
+
+    def by_period(self, from_day: str, to_day: str, bucket_sql: str) -> List[dict]:
+        """Daily rows summed per `bucket_sql` (an expression of `day`: week start, month)."""
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute(f"""
+              SELECT {bucket_sql} AS bucket, SUM(orders) AS orders, SUM(items) AS items,
+                     SUM(revenue) AS revenue, SUM(cancelled) AS cancelled
+              FROM sales_daily
+              WHERE day BETWEEN ? AND ?
+              GROUP BY 1
+              ORDER BY 1
+            """, (from_day, to_day)).fetchall()
+        return [dict(r) for r in rows]
+
+    def by_hour(self, from_day: str, to_day: str) -> List[dict]:
+        """Hour-of-day profile summed over the range."""
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("""
+              SELECT hour AS bucket, SUM(orders) AS orders, SUM(items) AS items, SUM(revenue) AS revenue
+              FROM sales_hourly
+              WHERE day BETWEEN ? AND ?
+              GROUP BY hour
+            """, (from_day, to_day)).fetchall()
+        return [dict(r) for r in rows]
+
+    def by_product(self, from_day: str, to_day: str, limit: int) -> List[dict]:
+        # name: bare column next to MAX(day) -> the most recent name
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("""
+              SELECT product_id, name, SUM(qty) AS qty, SUM(revenue) AS revenue, MAX(day)
+              FROM sales_product
+              WHERE day BETWEEN ? AND ?
+              GROUP BY product_id
+              ORDER BY revenue DESC, product_id
+              LIMIT ?
+            """, (from_day, to_day, int(limit))).fetchall()
+        return [{"product_id": r["product_id"], "name": r["name"], "qty": r["qty"], "revenue": r["revenue"]}
+                for r in rows]
+
+    def by_channel(self, from_day: str, to_day: str) -> List[dict]:
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute("""
+              SELECT service_type, payment_type, SUM(orders) AS orders, SUM(revenue) AS revenue
+              FROM sales_channel
+              WHERE day BETWEEN ? AND ?
+              GROUP BY service_type, payment_type
+              ORDER BY revenue DESC
+            """, (from_day, to_day)).fetchall()
+        return [dict(r) for r in rows]
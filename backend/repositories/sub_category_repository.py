@@ -10,15 +10,16 @@ class SubCategoryRepository:
         """
         params = [int(category_id)]
         if not include_inactive:
-            sql += " AND is_active=1"
+            # unary + keeps the planner on the (parent, sort_order, id) index
+            sql += " AND +is_active=1"
         sql += " ORDER BY sort_order ASC, id ASC"
 
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             rows = conn.execute(sql, params).fetchall()
         return [dict(r) for r in rows]
 
     def get_image_path(self, sub_category_id: int):
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             row = conn.execute(
                 "SELECT image_path FROM sub_categories WHERE id=?",
                 (int(sub_category_id),)
@@ -26,7 +27,7 @@ class SubCategoryRepository:
         return row["image_path"] if row else None
 
     def get(self, sub_category_id: int):
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             row = conn.execute("""
               SELECT id, category_id, name, image_path, sort_order, is_active, created_at, updated_at
               FROM sub_categories
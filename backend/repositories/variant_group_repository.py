@@ -11,15 +11,16 @@ class VariantGroupRepository:
         """
         params = [int(product_id)]
         if not include_inactive:
-            sql += " AND is_active=1"
+            # unary + keeps the planner on the (parent, sort_order, id) index
+            sql += " AND +is_active=1"
         sql += " ORDER BY sort_order ASC, id ASC"
 
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             rows = conn.execute(sql, params).fetchall()
         return [dict(r) for r in rows]
 
     def get(self, group_id: int):
-        with get_conn() as conn:
+        with get_conn(readonly=True) as conn:
             row = conn.execute("""
               SELECT id, product_id, name, is_required, max_select, sort_order,
                      is_active, created_at, updated_at
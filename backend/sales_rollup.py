@@ -0,0 +1,90 @@
+# backend/sales_rollup.py
+"""
+Catch-up for the sales rollup tables (sales_daily / _hourly / _product /
+_channel).
+
+Order status changes keep the rollups current in their own transaction
+(OrderRepository -> SalesRollupRepository.record). Orders that were there
+before the rollups existed, or that were written around the repository
+(bench seeding, a restored backup), are rolled up here: the whole order
+history is recomputed CHUNK_DAYS at a time, each chunk in one short
+transaction so the kiosk's writes are not held up, then the build is
+marked done. It runs once in the background at boot while not built.
+
+Live status changes during a catch-up stay correct: a chunk recomputes
+its days from the orders as they are at that moment, under the writer
+lock, and later changes are applied on top of it.
+"""
+import datetime
+import threading
+import time
+
+from backend.repositories.sales_rollup_repository import SalesRollupRepository
+
+CHUNK_DAYS = 31
+
+_state = {"thread": None, "running": False, "last": None}
+_lock = threading.Lock()
+
+
+def _days(first: str, last: str, step: int):
+    d = datetime.date.fromisoformat(first)
+    end = datetime.date.fromisoformat(last)
+    while d <= end:
+        to = min(end, d + datetime.timedelta(days=step - 1))
+        yield d.isoformat(), to.isoformat()
+        d = to + datetime.timedelta(days=1)
+
+
+def catch_up(force: bool = False, from_day: str = None) -> dict:
+    """
+    Roll up the order history (or from `from_day` on). No-op when already
+    built, unless `force`. Returns days / chunks / ms.
+    """
+    repo = SalesRollupRepository()
+    if not force and not from_day and repo.is_built():
+        return {"skipped": True}
+
+    t0 = time.perf_counter()
+    span = repo.order_day_span()
+    chunks = 0
+    if span:
+        first, last = span
+        if from_day and from_day > first:
+            first = from_day
+        # the newest chunk reaches past today: orders created while it runs land inside it
+        last = max(last, (datetime.date.today() + datetime.timedelta(days=1)).isoformat())
+        for a, b in _days(first, last, CHUNK_DAYS):
+            repo.rebuild(a, b)
+            chunks += 1
+    if not from_day:
+        repo.set_built(True)
+
+    report = {"skipped": False, "span": list(span) if span else None, "chunks": chunks,
+              "ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+    _state["last"] = report
+    return report
+
+
+def start_catch_up() -> None:
+    """Run catch_up() on a background thread if the rollups are not built yet (no-op if running)."""
+    with _lock:
+        if _state["running"]:
+            return
+        _state["running"] = True
+
+    def run():
+        try:
+            catch_up()
+        except Exception as e:
+            _state["last"] = {"error": str(e)}   # next boot retries
+        finally:
+            _state["running"] = False
+
+    t = threading.Thread(target=run, name="sales-rollup", daemon=True)
+    _state["thread"] = t
+    t.start()
+
+
+def status() -> dict:
+    return {"built": SalesRollupRepository().is_built(), "running": _state["running"], "last": _state["last"]}
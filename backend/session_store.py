@@ -0,0 +1,324 @@
+# backend/session_store.py
+"""
+In-memory kiosk sessions with write-behind persistence.
+
+  - start / close / expire are written to `sessions` immediately (crash-safe
+    status transitions)
+  - touch only extends the expiry in RAM; dirty sessions are flushed to
+    `sessions.last_seen_at / expires_at / expires_epoch` in one batch every
+    FLUSH_INTERVAL_SEC
+  - a sweeper bulk-expires abandoned ACTIVE rows every SWEEP_INTERVAL_SEC and
+    prunes CLOSED/EXPIRED rows older than RETENTION_DAYS
+
+Expiry is compared as integer epoch seconds (sessions.expires_epoch).
+"""
+import atexit
+import secrets
+import threading
+import time
+
+from backend.db import get_conn
+
+FLUSH_INTERVAL_SEC = 5.0
+SWEEP_INTERVAL_SEC = 60.0
+RETENTION_DAYS = 30
+
+# max keys per `IN (...)` statement
+_IN_CHUNK = 500
+
+
+def _utc_text(epoch: float) -> str:
+    """Epoch seconds -> SQLite datetime('now') format (UTC)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+class SessionStore:
+    def __init__(
+        self,
+        flush_interval: float = FLUSH_INTERVAL_SEC,
+        sweep_interval: float = SWEEP_INTERVAL_SEC,
+        retention_days: float = RETENTION_DAYS,
+    ):
+        self.flush_interval = float(flush_interval)
+        self.sweep_interval = float(sweep_interval)
+        self.retention_days = float(retention_days)
+        self._next_sweep = 0.0
+
+        # session_key -> {"status", "expires_at", "last_seen_at", "dirty"}  (int epoch seconds)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+        self._thread = None
+        self._stop = threading.Event()
+
+        self._stats = {
+            "starts": 0, "touches": 0, "status_reads": 0, "closes": 0, "expired": 0,
+            "db_loads": 0, "db_writes": 0, "flushes": 0, "flushed_rows": 0,
+            "sweeps": 0, "swept_expired": 0, "pruned": 0,
+        }
+
+    # -------------------------
+    # background flush
+    # -------------------------
+    def start_background(self):
+        """Start the flush + sweep thread (no-op if running)."""
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="session-store", daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                if time.monotonic() >= self._next_sweep:
+                    self._next_sweep = time.monotonic() + self.sweep_interval
+                    self.sweep()
+                else:
+                    self.flush()
+            except Exception:
+                pass  # rows stay dirty / stale, next round retries
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def flush(self) -> int:
+        """Write all dirty ACTIVE sessions in one executemany. Returns rows written."""
+        with self._lock:
+            batch = []
+            for key, s in self._sessions.items():
+                if s["dirty"]:
+                    batch.append((
+                        _utc_text(s["last_seen_at"]), _utc_text(s["expires_at"]), int(s["expires_at"]), key,
+                    ))
+                    s["dirty"] = False
+            # forget finished sessions (they are already persisted)
+            for key in [k for k, s in self._sessions.items() if s["status"] != "ACTIVE"]:
+                del self._sessions[key]
+
+        if not batch:
+            return 0
+
+        try:
+            with get_conn() as conn:
+                conn.executemany("""
+                  UPDATE sessions
+                  SET last_seen_at=?, expires_at=?, expires_epoch=?
+                  WHERE session_key=? AND status='ACTIVE'
+                """, batch)
+        except Exception:
+            with self._lock:
+                for *_, key in batch:
+                    if key in self._sessions:
+                        self._sessions[key]["dirty"] = True
+            raise
+
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["flushed_rows"] += len(batch)
+            self._stats["db_writes"] += 1
+        return len(batch)
+
+    # -------------------------
+    # helpers (never hold self._lock during DB I/O)
+    # -------------------------
+    def _load(self, session_key: str):
+        """Get a session from RAM, loading it from the DB on a miss."""
+        with self._lock:
+            s = self._sessions.get(session_key)
+        if s is not None:
+            return s
+
+        with get_conn(readonly=True) as conn:
+            row = conn.execute("""
+              SELECT status,
+                     expires_epoch,
+                     CAST(strftime('%s', last_seen_at) AS INTEGER) AS last_seen_at
+              FROM sessions
+              WHERE session_key=?
+            """, (session_key,)).fetchone()
+        if not row:
+            return None
+
+        s = {
+            "status": row["status"],
+            "expires_at": int(row["expires_epoch"] or 0),
+            "last_seen_at": int(row["last_seen_at"] or 0),
+            "dirty": False,
+        }
+        with self._lock:
+            self._stats["db_loads"] += 1
+            # another thread may have loaded it meanwhile; keep theirs
+            return self._sessions.setdefault(session_key, s)
+
+    def _finish(self, session_key: str, s: dict, status: str) -> None:
+        """ACTIVE -> EXPIRED/CLOSED, written through to the DB."""
+        with self._lock:
+            if s["status"] != "ACTIVE":
+                return
+            s["status"] = status
+            s["dirty"] = False
+            self._stats["expired" if status == "EXPIRED" else "closes"] += 1
+            self._stats["db_writes"] += 1
+
+        with get_conn() as conn:
+            conn.execute("""
+              UPDATE sessions
+              SET status=?, closed_at=datetime('now')
+              WHERE session_key=? AND status='ACTIVE'
+            """, (status, session_key))
+
+    def _expire_if_due(self, session_key: str, s: dict, now: int) -> bool:
+        if s["status"] == "ACTIVE" and s["expires_at"] - now <= 0:
+            self._finish(session_key, s, "EXPIRED")
+            return True
+        return False
+
+    # -------------------------
+    # API
+    # -------------------------
+    def start(self, minutes: int) -> str:
+        session_key = secrets.token_hex(16)  # 32 chars
+        now = int(time.time())
+        expires = now + int(minutes) * 60
+
+        with get_conn() as conn:
+            conn.execute("""
+              INSERT INTO sessions(session_key, started_at, last_seen_at, expires_at, expires_epoch)
+              VALUES(?, ?, ?, ?, ?)
+            """, (session_key, _utc_text(now), _utc_text(now), _utc_text(expires), expires))
+
+        with self._lock:
+            self._sessions[session_key] = {
+                "status": "ACTIVE", "expires_at": expires, "last_seen_at": now, "dirty": False,
+            }
+            self._stats["starts"] += 1
+            self._stats["db_writes"] += 1
+        self._ensure_flusher()
+        return session_key
+
+    def touch(self, session_key: str, minutes: int):
+        """(status, expires_in_sec) or None if unknown."""
+        s = self._load(session_key)
+        if s is None:
+            return None
+
+        now = int(time.time())
+        if self._expire_if_due(session_key, s, now):
+            return "EXPIRED", 0
+        if s["status"] != "ACTIVE":
+            return s["status"], 0
+
+        with self._lock:
+            s["last_seen_at"] = now
+            s["expires_at"] = now + int(minutes) * 60
+            s["dirty"] = True
+            self._stats["touches"] += 1
+        self._ensure_flusher()
+        return "ACTIVE", int(minutes) * 60
+
+    def status(self, session_key: str):
+        """(status, left_sec) or None if unknown."""
+        s = self._load(session_key)
+        if s is None:
+            return None
+
+        with self._lock:
+            self._stats["status_reads"] += 1
+
+        now = int(time.time())
+        if self._expire_if_due(session_key, s, now):
+            return "EXPIRED", 0
+        return s["status"], max(0, s["expires_at"] - now)
+
+    def close(self, session_key: str) -> None:
+        s = self._load(session_key)
+        if s is not None:
+            self._finish(session_key, s, "CLOSED")
+
+    def require_active(self, session_key: str) -> None:
+        """Raise ValueError unless the session is ACTIVE and not expired."""
+        s = self._load(session_key)
+        if s is None:
+            raise ValueError("session not found")
+        if self._expire_if_due(session_key, s, int(time.time())):
+            raise ValueError("session expired")
+        if s["status"] != "ACTIVE":
+            raise ValueError(f"session not ACTIVE: {s['status']}")
+
+    # -------------------------
+    # sweeper
+    # -------------------------
+    def sweep(self) -> dict:
+        """
+        Flush, then expire every ACTIVE session past expires_epoch in bulk
+        (index: status, expires_epoch) and prune finished sessions older
+        than the retention window.
+        """
+        self.flush()
+        now = int(time.time())
+
+        with get_conn(readonly=True) as conn:
+            due = [r["session_key"] for r in conn.execute("""
+              SELECT session_key
+              FROM sessions
+              WHERE status='ACTIVE' AND expires_epoch <= ?
+            """, (now,)).fetchall()]
+
+        # RAM wins: a session touched after the flush is still alive
+        with self._lock:
+            keys = []
+            for key in due:
+                s = self._sessions.get(key)
+                if s is not None and s["status"] == "ACTIVE" and s["expires_at"] > now:
+                    continue
+                if s is not None:
+                    s["status"] = "EXPIRED"
+                    s["dirty"] = False
+                keys.append(key)
+
+        prune_before = now - int(self.retention_days * 86400)
+        with get_conn() as conn:
+            for i in range(0, len(keys), _IN_CHUNK):
+                chunk = keys[i:i + _IN_CHUNK]
+                marks = ",".join(["?"] * len(chunk))
+                conn.execute(f"""
+                  UPDATE sessions
+                  SET status='EXPIRED', closed_at=datetime('now')
+                  WHERE status='ACTIVE' AND session_key IN ({marks})
+                """, tuple(chunk))
+
+            pruned = conn.execute("""
+              DELETE FROM sessions
+              WHERE status IN ('CLOSED', 'EXPIRED') AND expires_epoch < ?
+            """, (prune_before,)).rowcount
+
+        with self._lock:
+            self._stats["sweeps"] += 1
+            self._stats["swept_expired"] += len(keys)
+            self._stats["pruned"] += max(0, pruned)
+            self._stats["db_writes"] += 1
+        return {"expired": len(keys), "pruned": max(0, pruned)}
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["in_memory"] = len(self._sessions)
+            out["dirty"] = sum(1 for s in self._sessions.values() if s["dirty"])
+        out["flush_interval_sec"] = self.flush_interval
+        out["sweep_interval_sec"] = self.sweep_interval
+        out["retention_days"] = self.retention_days
+        out["background_running"] = bool(self._thread is not None and self._thread.is_alive())
+        return out
+
+
+_store = SessionStore()
+atexit.register(_store.stop)
+
+
+def get_store() -> SessionStore:
+    return _store
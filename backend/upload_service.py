@@ -0,0 +1,83 @@
+# backend/upload_service.py
+"""
+Image uploads from the dashboard (data URLs) into the image store.
+
+The data URL is decoded a slice at a time straight into a temp file, so
+the decoded image is never held in memory as a whole:
+
+  - an upload over MAX_IMAGE_BYTES is rejected from its length alone,
+    before anything is decoded (strict base64: the length is exact)
+  - the type comes from the magic bytes of the first slice; the
+    "data:image/...;" prefix is not trusted
+  - the temp file is hashed while it is written and renamed into
+    uploads/images/<sha256>.<ext> by the image store (atomic), or deleted
+    on any error
+"""
+import base64
+import binascii
+import hashlib
+import uuid
+
+from backend.image_store import get_store
+from backend.paths import UPLOAD_IMAGES, ensure_dir
+
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+CHUNK_CHARS = 256 * 1024        # base64 characters per slice (multiple of 4)
+_HEADER_MAX = 64                # "data:image/jpeg;base64," and friends
+
+
+def sniff_image_type(head: bytes):
+    """File extension from the magic bytes (png / jpg / webp), None if not one of them."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _payload_start(data_url: str) -> int:
+    """Index of the first base64 character; ValueError unless "data:image/<x>;base64,"."""
+    comma = data_url.find(",", 0, _HEADER_MAX)
+    header = data_url[:comma].lower() if comma > 0 else ""
+    if not (header.startswith("data:image/") and header.endswith(";base64")):
+        raise ValueError("Invalid image data")
+    return comma + 1
+
+
+def save_dataurl_image(data_url: str, max_bytes: int = MAX_IMAGE_BYTES) -> str:
+    """Decode `data_url` into the image store. Returns the DB path (one reference acquired)."""
+    if not isinstance(data_url, str):
+        raise ValueError("Invalid image data")
+    start = _payload_start(data_url)
+
+    b64_len = len(data_url) - start
+    padding = 2 if data_url.endswith("==") else 1 if data_url.endswith("=") else 0   # no rstrip copy
+    if b64_len == 0 or b64_len % 4:
+        raise ValueError("Invalid image data")
+    if b64_len // 4 * 3 - padding > max_bytes:
+        raise ValueError(f"Image too large (max {max_bytes // (1024 * 1024)}MB)")
+
+    tmp = ensure_dir(UPLOAD_IMAGES) / f".upload-{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size, ext = 0, None
+    try:
+        with open(tmp, "wb") as f:
+            for i in range(start, len(data_url), CHUNK_CHARS):
+                try:
+                    chunk = base64.b64decode(data_url[i:i + CHUNK_CHARS], validate=True)
+                except (binascii.Error, ValueError):
+                    raise ValueError("Invalid image data") from None
+                if ext is None:
+                    ext = sniff_image_type(chunk[:12])
+                    if ext is None:
+                        raise ValueError("Unsupported image type (png/jpg/webp only)")
+                size += len(chunk)
+                if size > max_bytes:   # incremental guard; the length check above already bounds it
+                    raise ValueError(f"Image too large (max {max_bytes // (1024 * 1024)}MB)")
+                digest.update(chunk)
+                f.write(chunk)
+        return get_store().put_file(tmp, digest.hexdigest(), size, ext)
+    finally:
+        tmp.unlink(missing_ok=True)   # gone after put_file; left only on error
@@ -21,6 +21,8 @@ function tpl(id) {
   const subCategoryTpl = tpl("tpl-sub_category");
   const productTpl     = tpl("tpl-product");
   const variantTpl     = tpl("tpl-variant");
+  const salesTpl       = tpl("tpl-sales");
+  const metricsTpl     = tpl("tpl-metrics");
 
   const rootTemplate = `
     <div class="wrapper">
@@ -44,6 +46,8 @@ function tpl(id) {
           sub_category: (Dashboard.modules?.sub_category || { template: subCategoryTpl }),
           product: (Dashboard.modules?.product || { template: productTpl }),
           variant: (Dashboard.modules?.variant || { template: variantTpl }),
+          sales: (Dashboard.modules?.sales || { template: salesTpl }),
+          metrics: (Dashboard.modules?.metrics || { template: metricsTpl }),
 
         }
       };
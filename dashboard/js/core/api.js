@@ -1,8 +1,48 @@
 window.Api = window.Api || {};
 
-Api.call = async (method, ...args) => {
+Api.direct = async (method, ...args) => {
   if (!window.pywebview?.api) throw new Error("Python backend not ready");
   const fn = window.pywebview.api[method];
   if (typeof fn !== "function") throw new Error(`API method not found: ${method}`);
   return await fn(...args);
 };
+
+// -------------------------
+// Same-tick coalescing: every Api.call made before the current task yields
+// is sent as ONE pywebview.api.batch([...]) crossing; results come back in order.
+// -------------------------
+Api._queue = [];
+
+Api._flush = async () => {
+  const queue = Api._queue;
+  Api._queue = [];
+
+  if (queue.length === 1) {
+    const q = queue[0];
+    try { q.resolve(await Api.direct(q.method, ...q.args)); } catch (e) { q.reject(e); }
+    return;
+  }
+
+  try {
+    const res = await window.pywebview.api.batch(queue.map(q => ({ method: q.method, args: q.args })));
+    if (res?.status !== "ok") throw new Error(res?.message || "Batch failed");
+
+    queue.forEach((q, i) => {
+      const r = res.data[i];
+      // Python exception inside the batch -> reject like a direct call would
+      if (r && r.exception) q.reject(new Error(r.message));
+      else q.resolve(r);
+    });
+  } catch (e) {
+    queue.forEach(q => q.reject(e));
+  }
+};
+
+Api.call = (method, ...args) => {
+  if (typeof window.pywebview?.api?.batch !== "function") return Api.direct(method, ...args);
+
+  return new Promise((resolve, reject) => {
+    Api._queue.push({ method, args, resolve, reject });
+    if (Api._queue.length === 1) queueMicrotask(Api._flush);
+  });
+};
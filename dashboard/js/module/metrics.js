@@ -0,0 +1,96 @@
+// dashboard/js/module/metrics.js
+window.Dashboard = window.Dashboard || {};
+Dashboard.modules = Dashboard.modules || {};
+
+Dashboard.modules.metrics = {
+  template: tpl("tpl-metrics"),
+
+  data() {
+    return {
+      live: null,    // metrics_snapshot() of this process
+      dumps: {},     // metrics_dumps(): { process: snapshot }
+      source: "",    // "" = live, else dump process name
+      current: null,
+      rows: [],
+    };
+  },
+
+  mounted() {
+    this.chart = null;
+
+    if (window.pywebview?.api) {
+      this.load();
+    } else {
+      window.addEventListener("pywebviewready", () => this.load(), { once: true });
+    }
+  },
+
+  beforeUnmount() {
+    if (this.chart) this.chart.destroy();
+    this.chart = null;
+  },
+
+  methods: {
+    async load() {
+      try {
+        Dashboard.router.setFooter("Loading metrics...");
+        const [live, dumps] = await Promise.all([
+          Api.call("metrics_snapshot"),
+          Api.call("metrics_dumps"),
+        ]);
+        if (live?.status !== "ok") throw new Error(live?.message || "Load failed");
+
+        this.live = live.data;
+        this.dumps = dumps?.status === "ok" ? (dumps.data || {}) : {};
+        if (this.source && !this.dumps[this.source]) this.source = "";
+
+        this.render();
+        Dashboard.router.setFooter(`Metrics: ${this.rows.length} methods`);
+      } catch (e) {
+        console.error(e);
+        Dashboard.router.setFooter("Load failed ❌");
+      }
+    },
+
+    render() {
+      this.current = this.source ? this.dumps[this.source] : this.live;
+
+      const methods = this.current?.methods || {};
+      this.rows = Object.keys(methods)
+        .map(name => ({ name, ...methods[name] }))
+        .sort((a, b) => b.p95_ms - a.p95_ms);
+
+      this.$nextTick(() => this.drawChart());
+    },
+
+    drawChart() {
+      if (!window.Chart || !this.$refs.chart) return;
+
+      const top = this.rows.slice(0, 15);
+      const data = {
+        labels: top.map(r => r.name),
+        datasets: [
+          { label: "p50 ms", backgroundColor: "rgba(23,162,184,.8)", data: top.map(r => r.p50_ms) },
+          { label: "p95 ms", backgroundColor: "rgba(255,193,7,.8)", data: top.map(r => r.p95_ms) },
+          { label: "p99 ms", backgroundColor: "rgba(220,53,69,.8)", data: top.map(r => r.p99_ms) },
+        ],
+      };
+
+      if (this.chart) {
+        this.chart.data = data;
+        this.chart.update();
+        return;
+      }
+
+      this.chart = new Chart(this.$refs.chart.getContext("2d"), {
+        type: "bar",
+        data,
+        options: {
+          maintainAspectRatio: false,
+          legend: { position: "bottom" },
+          scales: { yAxes: [{ ticks: { beginAtZero: true } }] },
+        },
+      });
+    },
+  },
+};
@@ -0,0 +1,134 @@
+// dashboard/js/module/sales.js
+window.Dashboard = window.Dashboard || {};
+Dashboard.modules = Dashboard.modules || {};
+
+Dashboard.modules.sales = {
+  template: tpl("tpl-sales"),
+
+  data() {
+    return {
+      range: "30d",
+      granularity: "day",
+      ranges: [
+        { value: "today", label: "Today" },
+        { value: "yesterday", label: "Yesterday" },
+        { value: "7d", label: "Last 7 days" },
+        { value: "30d", label: "Last 30 days" },
+        { value: "90d", label: "Last 90 days" },
+        { value: "month", label: "This month" },
+        { value: "year", label: "This year" },
+        { value: "all", label: "All time" },
+      ],
+      granularities: [
+        { value: "day", label: "Per day" },
+        { value: "week", label: "Per week" },
+        { value: "month", label: "Per month" },
+        { value: "hour", label: "Hour of day" },
+        { value: "product", label: "Top products" },
+        { value: "channel", label: "Channel" },
+      ],
+      report: null,   // report_sales() data
+      rows: [],
+    };
+  },
+
+  computed: {
+    columns() {
+      const num = (key, label) => ({ key, label, num: true });
+      switch (this.report?.granularity) {
+        case "product":
+          return [{ key: "name", label: "Product" }, num("qty", "Qty"), num("revenue", "Revenue")];
+        case "channel":
+          return [{ key: "service_type", label: "Service" }, { key: "payment_type", label: "Payment" },
+                  num("orders", "Orders"), num("revenue", "Revenue")];
+        case "hour":
+          return [{ key: "bucket", label: "Hour" }, num("orders", "Orders"), num("items", "Items"), num("revenue", "Revenue")];
+        default:
+          return [{ key: "bucket", label: "Period" }, num("orders", "Orders"), num("items", "Items"),
+                  num("revenue", "Revenue"), num("cancelled", "Cancelled")];
+      }
+    },
+  },
+
+  mounted() {
+    this.chart = null;
+
+    if (window.pywebview?.api) {
+      this.load();
+    } else {
+      window.addEventListener("pywebviewready", () => this.load(), { once: true });
+    }
+  },
+
+  beforeUnmount() {
+    if (this.chart) this.chart.destroy();
+    this.chart = null;
+  },
+
+  methods: {
+    money(v) {
+      return Number(v || 0).toFixed(2);
+    },
+
+    async load() {
+      try {
+        Dashboard.router.setFooter("Loading sales...");
+        const res = await Api.call("report_sales", this.range, this.granularity);
+        if (res?.status !== "ok") throw new Error(res?.message || "Load failed");
+
+        this.report = res.data;
+        this.rows = res.data.rows || [];
+
+        this.$nextTick(() => this.drawChart());
+        Dashboard.router.setFooter(`Sales: ${this.report.from} → ${this.report.to}`);
+      } catch (e) {
+        console.error(e);
+        Dashboard.router.setFooter("Load failed ❌");
+      }
+    },
+
+    label(r) {
+      switch (this.report.granularity) {
+        case "product": return r.name;
+        case "channel": return `${r.service_type} / ${r.payment_type || "-"}`;
+        case "hour": return `${String(r.bucket).padStart(2, "0")}:00`;
+        default: return r.bucket;
+      }
+    },
+
+    drawChart() {
+      if (!window.Chart || !this.$refs.chart || !this.report) return;
+
+      // time series as a line, rankings / profiles as bars
+      const type = ["day", "week", "month"].includes(this.report.granularity) ? "line" : "bar";
+      const data = {
+        labels: this.rows.map(r => this.label(r)),
+        datasets: [
+          { label: "Revenue", backgroundColor: "rgba(40,167,69,.6)", borderColor: "rgba(40,167,69,1)",
+            fill: type === "line", data: this.rows.map(r => r.revenue) },
+        ],
+      };
+
+      if (this.chart && this.chart.config.type !== type) {
+        this.chart.destroy();
+        this.chart = null;
+      }
+
+      if (this.chart) {
+        this.chart.data = data;
+        this.chart.update();
+        return;
+      }
+
+      this.chart = new Chart(this.$refs.chart.getContext("2d"), {
+        type,
+        data,
+        options: {
+          maintainAspectRatio: false,
+          legend: { position: "bottom" },
+          scales: { yAxes: [{ ticks: { beginAtZero: true } }] },
+        },
+      });
+    },
+  },
+};
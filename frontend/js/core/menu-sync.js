@@ -0,0 +1,85 @@
+// frontend/js/core/menu-sync.js
+window.Kiosk = window.Kiosk || {};
+
+/**
+ * Keeps the kiosk menu in sync with the backend catalog version:
+ *   - first load: kiosk_menu_json (pre-encoded full tree + version + etag)
+ *   - later loads: kiosk_menu_etag, and only if it changed
+ *     kiosk_menu_since(version) => only changed rows
+ */
+Kiosk.menuSync = (function () {
+  // entity -> where its rows live in menuAll
+  const BUCKETS = {
+    category:      { list: "categories" },
+    sub_category:  { map: "sub_by_cat",       parent: "category_id" },
+    product:       { map: "prod_by_sub",      parent: "sub_category_id" },
+    variant_group: { map: "group_by_product", parent: "product_id" },
+    variant_value: { map: "value_by_group",   parent: "group_id" }
+  };
+
+  const bySort = (a, b) =>
+    (Number(a.sort_order || 0) - Number(b.sort_order || 0)) || (Number(a.id) - Number(b.id));
+
+  function dropIds(rows, ids) {
+    return (rows || []).filter((r) => !ids.has(Number(r.id)));
+  }
+
+  function applyDelta(menu, delta) {
+    for (const [entity, spec] of Object.entries(BUCKETS)) {
+      const upserts = delta.upserts?.[entity] || [];
+      const removes = delta.removes?.[entity] || [];
+      if (!upserts.length && !removes.length) continue;
+
+      // a changed row may have moved to another parent => drop it everywhere first
+      const ids = new Set([...removes, ...upserts.map((r) => r.id)].map(Number));
+
+      if (spec.list) {
+        menu[spec.list] = dropIds(menu[spec.list], ids).concat(upserts).sort(bySort);
+        continue;
+      }
+
+      const map = menu[spec.map] || {};
+      for (const key of Object.keys(map)) map[key] = dropIds(map[key], ids);
+
+      for (const row of upserts) {
+        const key = row[spec.parent];
+        (map[key] = map[key] || []).push(row);
+      }
+      for (const row of upserts) map[row[spec.parent]].sort(bySort);
+
+      menu[spec.map] = map;
+    }
+
+    menu.version = delta.version;
+    return menu;
+  }
+
+  async function load(current) {
+    if (current && current.version) {
+      // ✅ cheap check first: same content hash => nothing to fetch
+      const tag = await Api.call("kiosk_menu_etag");
+      if (tag?.status === "ok" && current.etag && tag.data?.etag === current.etag) return current;
+
+      const res = await Api.call("kiosk_menu_since", current.version);
+      if (res?.status !== "ok") throw new Error(res?.message || "Menu load failed");
+
+      const delta = res.data || {};
+      const next = delta.full
+        ? delta.data
+        : (delta.version === current.version ? current : applyDelta({ ...current }, delta));
+
+      if (next) next.etag = tag?.data?.version === next.version ? tag.data.etag : null;
+      return next;
+    }
+
+    // first load: backend sends a pre-encoded JSON string
+    const res = await Api.call("kiosk_menu_json");
+    if (res?.status !== "ok") throw new Error(res?.message || "Menu load failed");
+
+    const menu = JSON.parse(res.json);
+    menu.etag = res.etag;
+    return menu;
+  }
+
+  return { load, applyDelta };
+})();
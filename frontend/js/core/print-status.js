@@ -0,0 +1,31 @@
+// frontend/js/core/print-status.js
+window.Kiosk = window.Kiosk || {};
+Kiosk.printStatus = Kiosk.printStatus || {};
+
+/**
+ * print_receipt() only queues the job: follow it with print_job_status
+ * and keep the footer honest ("queued" until the worker reports DONE).
+ * Stops at DONE / FAILED or after `maxPolls`; an offline printer shows
+ * as "retrying" (the worker keeps trying in the background).
+ */
+Kiosk.printStatus.watch = function (router, jobId, { intervalMs = 1000, maxPolls = 20 } = {}) {
+  router.setFooter("Receipt queued 🧾");
+  if (!jobId || !window.pywebview?.api?.print_job_status) return;
+
+  let polls = 0;
+  const tick = async () => {
+    polls += 1;
+    try {
+      const res = await window.pywebview.api.print_job_status(jobId);
+      const job = res?.ok ? res.data : null;
+
+      if (job?.status === "DONE") return router.setFooter("Printed ✅");
+      if (job?.status === "FAILED") return router.setFooter("Print failed ❌ " + (job.last_error || ""));
+      if (job?.last_error) router.setFooter("Printer not ready, retrying… 🧾");
+    } catch (e) {
+      console.error(e);
+    }
+    if (polls < maxPolls) setTimeout(tick, intervalMs);
+  };
+  setTimeout(tick, intervalMs);
+};
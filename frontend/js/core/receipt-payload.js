@@ -59,6 +59,7 @@ Kiosk.receiptPayload.fromOrder = function (order) {
 
   return {
     // printer header fields
+    order_id: order.id,
     order_no: order.order_no,
     service_type: order.service_type,
 
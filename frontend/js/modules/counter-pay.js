@@ -220,23 +220,17 @@ Kiosk.modules["pay-counter"] = {
         // 3) Build receipt payload from shared helper
         const payload = Kiosk.receiptPayload.fromOrder(o);
 
-        // 4) Print
+        // 4) Queue print (the print worker marks the order PRINTED once it prints)
         const pr = await window.pywebview.api.print_receipt(payload);
         if (!pr?.ok) throw new Error(pr?.error || "Print failed");
 
-        // 5) Mark PRINTED
-        const printedRes = await Api.call("order_mark_printed", this.orderId);
-        if (printedRes?.status !== "ok") {
-          console.warn("order_mark_printed failed:", printedRes?.message);
-        }
-
         // store for receipt screen
         this.router.state.lastReceipt = payload;
 
         // clear cart after print success
         this.router.state.cart = [];
 
-        this.router.setFooter("Printed ✅");
+        Kiosk.printStatus.watch(this.router, pr.job_id);   // "queued" until the worker prints it
         this.router.go("receipt");
       } catch (e) {
         console.error(e);
@@ -92,8 +92,8 @@ Kiosk.modules.menu = {
         // raw string path
         url = objOrPath;
       } else if (objOrPath && typeof objOrPath === "object") {
-        // prefer image_url from backend
-        url = objOrPath.image_url || objOrPath.imageUrl || objOrPath.image || objOrPath.image_path || "";
+        // prefer the tile rendition (320px), then image_url from backend
+        url = objOrPath.image_tile_url || objOrPath.image_url || objOrPath.imageUrl || objOrPath.image || objOrPath.image_path || "";
       }
 
       if (!url) return "./assets/placeholder.png";
@@ -117,10 +117,9 @@ Kiosk.modules.menu = {
       this.router.setFooter("Loading menu...");
 
       try {
-        const res = await Api.call("kiosk_menu_all");
-        if (res?.status !== "ok") throw new Error(res?.message || "Menu load failed");
-
-        this.menuAll = res.data || this.menuAll;
+        // ✅ delta sync against the last loaded menu (full load the first time)
+        const data = await Kiosk.menuSync.load(this.router.state.menuAll);
+        this.menuAll = data || this.menuAll;
 
         // ✅ share for product-variant page
         this.router.state.menuAll = this.menuAll;
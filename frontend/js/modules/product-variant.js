@@ -128,7 +128,8 @@ Kiosk.modules["product-variant"] = {
       let url = "";
       if (typeof objOrPath === "string") url = objOrPath;
       else if (objOrPath && typeof objOrPath === "object") {
-        url = objOrPath.image_url || objOrPath.imageUrl || objOrPath.image_path || "";
+        // detail rendition (800px) when the backend has made one
+        url = objOrPath.image_detail_url || objOrPath.image_url || objOrPath.imageUrl || objOrPath.image_path || "";
       }
 
       if (!url) return "./assets/placeholder.png";
@@ -235,7 +236,7 @@ Kiosk.modules["product-variant"] = {
         // UI fields (not trusted by backend)
         name: this.product.name,
         image_path: this.product.image_path || null,
-        image_url: this.product.image_url || null,
+        image_url: this.product.image_tile_url || this.product.image_url || null,
         base_price: Number(this.product.base_price || 0),
         variants,
         line_total: Number(this.lineTotal || 0)